@@ -1,41 +1,112 @@
 from __future__ import annotations
 
+from collections.abc import Awaitable, Callable
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.security import Principal
 from app.core.security.jwt import decode_access_token
 from app.db.models.accounts import User
-from app.db.repositories import users as users_repo
 from app.db.session import get_db
+from app.repositories import UserRepository
+from app.services import token_revocation, user_state
+from app.services.permissions import Permission, has_permission
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/accounts/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/accounts/login", auto_error=False)
 
 
-async def get_current_user(
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def get_current_principal(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db),
-) -> User:
-    payload = decode_access_token(token)
-    user_id = payload.get("sub")
-    if not user_id:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+) -> Principal:
+    """
+    Caller identity from the access token; no query while the user's cached state is fresh.
+    """
+    try:
+        payload = decode_access_token(token)
+        claims = Principal.from_claims(payload)
+    except ValueError:
+        raise _unauthorized("Invalid token")
+
+    # Bloom filter in memory; a DB lookup only when the filter reports a (possible) hit
+    jti = payload.get("jti")
+    if jti and await token_revocation.is_revoked(db, str(jti)):
+        raise _unauthorized("Token revoked")
+
+    state = await user_state.get_user_state(db, claims.id)
+    if state is None:
+        raise _unauthorized("User not found")
+
+    if state.token_version != claims.token_version:
+        raise _unauthorized("Token revoked")
+
+    if not state.is_active:
+        raise _unauthorized("Account is not active")
+
+    # group/activity from the cached row: admin promotions apply without a new token
+    return Principal(
+        id=claims.id,
+        group=state.group,
+        is_active=state.is_active,
+        token_version=claims.token_version,
+    )
+
 
-    user = await users_repo.get_user_by_id(db, int(user_id))
+async def get_optional_principal(
+    token: str | None = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> Principal | None:
+    """
+    Principal for endpoints that also serve anonymous callers; a token that is sent must be valid.
+    """
+    if token is None:
+        return None
+    return await get_current_principal(token, db)
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """
+    Full User entity, for endpoints that modify the user; everything else should use the principal.
+    """
+    user = await UserRepository.get_by_id(db, principal.id)
     if user is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        raise _unauthorized("User not found")
 
     return user
 
 
-async def require_admin(current_user: User = Depends(get_current_user)) -> User:
-    # group name stored as enum string
-    if getattr(current_user, "group", None) is not None:
-        group_name = getattr(current_user.group, "name", None)
-    else:
-        group_name = None
+PrincipalDependency = Callable[..., Awaitable[Principal]]
+
+
+def require_permission(permission: Permission) -> PrincipalDependency:
+    """
+    Dependency accepting principals whose role grants `permission`; pure check on the principal.
+    """
+
+    async def _require_permission(
+        principal: Principal = Depends(get_current_principal),
+    ) -> Principal:
+        if not has_permission(principal.group, permission):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+        return principal
+
+    return _require_permission
 
-    if str(group_name) != "ADMIN":
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
 
-    return current_user
+require_catalog_manager = require_permission(Permission.MANAGE_CATALOG)
+require_cart_viewer = require_permission(Permission.VIEW_ANY_CART)
+require_payments_viewer = require_permission(Permission.VIEW_ALL_PAYMENTS)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import Principal
+from app.services import idempotency
+from app.services.idempotency import StoredResponse
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+async def respond_once(
+    db: AsyncSession,
+    principal: Principal,
+    *,
+    scope: str,
+    key: str | None,
+    body: bytes,
+    handler: Callable[[], Awaitable[StoredResponse]],
+) -> JSONResponse:
+    """
+    Run the endpoint body through the Idempotency-Key store when the client sent a key.
+    """
+    replayed = False
+    if key is None:
+        response = await handler()
+    else:
+        try:
+            response, replayed = await idempotency.run_once(
+                db,
+                user_id=principal.id,
+                scope=scope,
+                key=key,
+                request_fingerprint=idempotency.fingerprint(body),
+                handler=handler,
+            )
+        except ValueError as e:
+            in_progress = "in progress" in str(e).lower()
+            raise HTTPException(
+                status_code=(
+                    status.HTTP_409_CONFLICT
+                    if in_progress
+                    else status.HTTP_422_UNPROCESSABLE_ENTITY
+                ),
+                detail=str(e),
+            )
+
+    return JSONResponse(
+        status_code=response.status_code,
+        content=response.body,
+        headers={REPLAYED_HEADER: "true"} if replayed else None,
+    )
@@ -1,14 +1,16 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user
-from app.core.emails import send_activation_email, send_password_reset_email
+from app.api.deps import get_current_principal, get_current_user
+from app.core.security import Principal
 from app.db.models.accounts import User
 from app.db.session import get_db
 from app.schemas.accounts import (
     ChangePasswordRequest,
+    LibraryItemResponse,
+    LibraryResponse,
     LogoutRequest,
     MessageResponse,
     PasswordResetConfirmRequest,
@@ -18,6 +20,7 @@ from app.schemas.accounts import (
     UserLoginRequest,
     UserRegistrationRequest,
 )
+from app.services import library, rate_limit
 from app.services.accounts import (
     activate_user,
     change_password,
@@ -35,6 +38,10 @@ router = APIRouter(
 )
 
 
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
 @router.post(
     "/register",
     response_model=MessageResponse,
@@ -42,14 +49,16 @@ router = APIRouter(
 )
 async def register(
     payload: UserRegistrationRequest,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ) -> MessageResponse:
+    await rate_limit.enforce("register", _client_ip(request))
     try:
-        token = await register_user(db, payload.email, payload.password)
+        # the activation email is sent by the outbox relay once the user row is committed
+        await register_user(db, payload.email, payload.password)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    send_activation_email(payload.email, token)
     return MessageResponse(message="Activation email sent")
 
 
@@ -77,8 +86,11 @@ async def activate(
 )
 async def login(
     payload: UserLoginRequest,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ) -> TokenPairResponse:
+    # before the user lookup and bcrypt verification
+    await rate_limit.enforce("login", _client_ip(request), payload.email)
     try:
         access, refresh = await login_user(db, payload.email, payload.password)
     except ValueError as e:
@@ -147,12 +159,12 @@ async def change_password_endpoint(
 )
 async def forgot_password(
     payload: PasswordResetRequest,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ) -> MessageResponse:
+    await rate_limit.enforce("password_reset", _client_ip(request), payload.email)
     # Return generic response to avoid user enumeration
-    token = await request_password_reset(db, payload.email)
-    if token:
-        send_password_reset_email(payload.email, token)
+    await request_password_reset(db, payload.email)
 
     return MessageResponse(
         message="If the email is registered and active, a password reset link has been sent"
@@ -174,3 +186,29 @@ async def reset_password(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     return MessageResponse(message="Password has been reset")
+
+
+@router.get(
+    "/me/library",
+    response_model=LibraryResponse,
+    summary="List movies owned by the current user",
+    description="Movies bought through paid orders, most recent first.",
+)
+async def my_library(
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
+) -> LibraryResponse:
+    rows = await library.list_library(db, current_user.id)
+    return LibraryResponse(
+        items=[
+            LibraryItemResponse(
+                movie_id=row.movie_id,
+                movie_uuid=row.movie_uuid,
+                title=row.title,
+                year=row.year,
+                order_id=row.order_id,
+                acquired_at=row.acquired_at,
+            )
+            for row in rows
+        ]
+    )
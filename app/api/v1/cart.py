@@ -3,45 +3,36 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user, require_admin
-from app.db.models.accounts import User
+from app.api.deps import get_current_principal, require_cart_viewer
+from app.core.security import Principal
 from app.db.session import get_db
 from app.schemas.cart import (
     CartAddItemRequest,
+    CartBatchItemResult,
+    CartBatchRequest,
+    CartBatchResponse,
     CartItemResponse,
     CartRemoveItemRequest,
     CartResponse,
+    CartSummaryResponse,
 )
 from app.services import cart as cart_service
 
 router = APIRouter(prefix="/cart", tags=["Cart"])
 
 
-def _build_cart_response(user_id: int, cart_items, movies) -> CartResponse:
-    movies_by_id = {m.id: m for m in movies}
-
-    items: list[CartItemResponse] = []
-    for item in cart_items:
-        m = movies_by_id.get(item.movie_id)
-        if m is None:
-            # Movie deleted/unavailable:
-            # for cart we simply skip missing movie rows in response.
-            continue
-
-        items.append(
-            CartItemResponse(
-                movie_id=m.id,
-                movie_uuid=m.uuid,
-                title=m.name,
-                year=m.year,
-                price=m.price,
-                added_at=item.added_at.isoformat(),
-            )
+def _build_cart_response(user_id: int, rows, total) -> CartResponse:
+    items = [
+        CartItemResponse(
+            movie_id=row.movie_id,
+            movie_uuid=row.movie_uuid,
+            title=row.title,
+            year=row.year,
+            price=row.price,
+            added_at=row.added_at.isoformat(),
         )
-
-    total = cart_service.calc_total(
-        [movies_by_id[i.movie_id] for i in cart_items if i.movie_id in movies_by_id]
-    )
+        for row in rows
+    ]
     return CartResponse(user_id=user_id, items=items, total_amount=total)
 
 
@@ -52,16 +43,25 @@ def _build_cart_response(user_id: int, cart_items, movies) -> CartResponse:
     description="Returns cart items with movie info and total amount.",
 )
 async def get_my_cart(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ) -> CartResponse:
-    cart, movies = await cart_service.get_cart_details(db, current_user.id)
-    if cart is None:
-        return CartResponse(
-            user_id=current_user.id, items=[], total_amount=cart_service.calc_total([])
-        )
+    rows, total = await cart_service.get_cart_details(db, current_user.id)
+    return _build_cart_response(current_user.id, rows, total)
+
 
-    return _build_cart_response(current_user.id, cart.items, movies)
+@router.get(
+    "/summary",
+    response_model=CartSummaryResponse,
+    summary="Get current user's cart summary",
+    description="Item count and total amount only (e.g. for a cart badge); cached briefly per user.",
+)
+async def get_my_cart_summary(
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
+) -> CartSummaryResponse:
+    summary = await cart_service.get_cart_summary(db, current_user.id)
+    return CartSummaryResponse(item_count=summary.item_count, total_amount=summary.total_amount)
 
 
 @router.post(
@@ -73,11 +73,11 @@ async def get_my_cart(
 )
 async def add_to_cart(
     payload: CartAddItemRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ) -> dict:
     try:
-        await cart_service.add_movie_to_cart(db, current_user, payload.movie_id)
+        await cart_service.add_movie_to_cart(db, current_user.id, payload.movie_id)
     except ValueError as e:
         msg = str(e).lower()
         raise HTTPException(
@@ -96,11 +96,11 @@ async def add_to_cart(
 )
 async def remove_from_cart(
     payload: CartRemoveItemRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ) -> dict:
     try:
-        await cart_service.remove_movie_from_cart(db, current_user, payload.movie_id)
+        await cart_service.remove_movie_from_cart(db, current_user.id, payload.movie_id)
     except ValueError as e:
         msg = str(e).lower()
         raise HTTPException(
@@ -118,13 +118,41 @@ async def remove_from_cart(
     description="Clears all items from the authenticated user's cart.",
 )
 async def clear_my_cart(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ) -> dict:
-    await cart_service.clear_cart(db, current_user)
+    await cart_service.clear_cart(db, current_user.id)
     return {"message": "Cart cleared"}
 
 
+@router.post(
+    "/items:batch",
+    response_model=CartBatchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Apply cart operations in bulk",
+    description=(
+        "Applies a list of add/remove operations to the authenticated user's cart in one "
+        "transaction (e.g. syncing a cart from another device). Returns a result per "
+        "operation and the new cart total."
+    ),
+)
+async def batch_cart_items(
+    payload: CartBatchRequest,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
+) -> CartBatchResponse:
+    outcomes, total = await cart_service.apply_batch(
+        db, current_user.id, [(o.op, o.movie_id) for o in payload.operations]
+    )
+    return CartBatchResponse(
+        results=[
+            CartBatchItemResult(op=o.op, movie_id=o.movie_id, status=outcomes[o.movie_id])
+            for o in payload.operations
+        ],
+        total_amount=total,
+    )
+
+
 # -------------------------
 # Admin endpoint (analysis / troubleshooting)
 # -------------------------
@@ -138,11 +166,8 @@ async def clear_my_cart(
 )
 async def get_user_cart_admin(
     user_id: int,
-    _admin=Depends(require_admin),
+    _admin=Depends(require_cart_viewer),
     db: AsyncSession = Depends(get_db),
 ) -> CartResponse:
-    cart, movies = await cart_service.get_cart_details(db, user_id)
-    if cart is None:
-        return CartResponse(user_id=user_id, items=[], total_amount=cart_service.calc_total([]))
-
-    return _build_cart_response(user_id, cart.items, movies)
+    rows, total = await cart_service.get_cart_details(db, user_id)
+    return _build_cart_response(user_id, rows, total)
@@ -2,26 +2,33 @@ from __future__ import annotations
 
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import require_moderator
+from app.api.deps import get_optional_principal, require_catalog_manager
+from app.core.security import Principal
 from app.db.session import get_db
 from app.schemas.movies import (
+    AutocompleteResponse,
     CertificationBase,
     CertificationResponse,
     DirectorBase,
     DirectorResponse,
     GenreBase,
     GenreResponse,
+    MovieCreateRequest,
     MovieDetailResponse,
+    MoviesDiscoverQuery,
     MovieShortResponse,
+    MoviesListQuery,
+    MovieUpdateRequest,
     PaginatedMoviesResponse,
     StarBase,
     StarResponse,
+    SuggestionResponse,
 )
-from app.services import movies as movies_service
+from app.services import cart as cart_service, movies as movies_service
 
 router = APIRouter(prefix="/movies", tags=["Movies"])
 
@@ -31,6 +38,17 @@ router = APIRouter(prefix="/movies", tags=["Movies"])
 # -------------------------
 
 
+async def _movie_flags(
+    db: AsyncSession, principal: Principal | None, movie_ids: list[int]
+) -> tuple[set[int], set[int]]:
+    """
+    (in cart, owned) for the caller, one query for the whole page; nothing for anonymous calls.
+    """
+    if principal is None:
+        return set(), set()
+    return await cart_service.get_movie_flags(db, principal.id, movie_ids)
+
+
 @router.get(
     "",
     response_model=PaginatedMoviesResponse,
@@ -39,22 +57,24 @@ router = APIRouter(prefix="/movies", tags=["Movies"])
 async def list_movies(
     query: MoviesListQuery = Depends(),
     db: AsyncSession = Depends(get_db),
+    principal: Principal | None = Depends(get_optional_principal),
 ) -> PaginatedMoviesResponse:
     total, items = await movies_service.list_movies(
         db,
-        page=page,
-        page_size=page_size,
-        q=q,
-        year=year,
-        imdb_min=imdb_min,
-        imdb_max=imdb_max,
-        certification_id=certification_id,
-        genre_id=genre_id,
-        director_id=director_id,
-        star_id=star_id,
-        sort_by=sort_by,  # type: ignore[arg-type]
-        order=order,  # type: ignore[arg-type]
+        page=query.page,
+        page_size=query.page_size,
+        q=query.q,
+        year=query.year,
+        imdb_min=query.imdb_min,
+        imdb_max=query.imdb_max,
+        certification_id=query.certification_id,
+        genre_id=query.genre_id,
+        director_id=query.director_id,
+        star_id=query.star_id,
+        sort_by=query.sort_by,
+        order=query.order,
     )
+    in_cart, owned = await _movie_flags(db, principal, [m.id for m in items])
 
     return PaginatedMoviesResponse(
         page=query.page,
@@ -70,17 +90,83 @@ async def list_movies(
                 imdb=m.imdb,
                 price=m.price,
                 certification=CertificationResponse(id=m.certification.id, name=m.certification.name),
+                in_cart=None if principal is None else m.id in in_cart,
+                owned=None if principal is None else m.id in owned,
             )
             for m in items
         ],
     )
 
 
+@router.get(
+    "/discover",
+    response_model=list[MovieShortResponse],
+    summary="Random movies matching the catalog filters",
+)
+async def discover_movies(
+    query: MoviesDiscoverQuery = Depends(),
+    db: AsyncSession = Depends(get_db),
+) -> list[MovieShortResponse]:
+    items = await movies_service.discover_movies(
+        db,
+        n=query.n,
+        q=query.q,
+        year=query.year,
+        imdb_min=query.imdb_min,
+        imdb_max=query.imdb_max,
+        certification_id=query.certification_id,
+        genre_id=query.genre_id,
+        director_id=query.director_id,
+        star_id=query.star_id,
+    )
+
+    return [
+        MovieShortResponse(
+            id=m.id,
+            uuid=m.uuid,
+            name=m.name,
+            year=m.year,
+            time=m.time,
+            imdb=m.imdb,
+            price=m.price,
+            certification=CertificationResponse(id=m.certification.id, name=m.certification.name),
+        )
+        for m in items
+    ]
+
+
+@router.get(
+    "/autocomplete",
+    response_model=AutocompleteResponse,
+    summary="Autocomplete movie titles, stars and directors",
+)
+async def autocomplete(
+    q: str = Query(min_length=1, max_length=100),
+    limit: int = Query(default=5, ge=1, le=20),
+    db: AsyncSession = Depends(get_db),
+) -> AutocompleteResponse:
+    suggestions = await movies_service.autocomplete(db, q, limit)
+
+    def _items(kind: str) -> list[SuggestionResponse]:
+        return [SuggestionResponse(id=s.id, name=s.name) for s in suggestions.get(kind, [])]
+
+    return AutocompleteResponse(
+        movies=_items("movie"),
+        stars=_items("star"),
+        directors=_items("director"),
+    )
+
+
 @router.get("/{movie_uuid}", response_model=MovieDetailResponse)
-async def get_movie(movie_uuid: UUID, db: AsyncSession = Depends(get_db)) -> MovieDetailResponse:
+async def get_movie(
+    movie_uuid: UUID,
+    db: AsyncSession = Depends(get_db),
+    principal: Principal | None = Depends(get_optional_principal),
+) -> MovieDetailResponse:
     movie = await movies_service.get_movie_by_uuid(db, movie_uuid)
     if movie is None:
         raise HTTPException(status_code=404, detail="Movie not found")
+    in_cart, owned = await _movie_flags(db, principal, [movie.id])
 
     return MovieDetailResponse(
         id=movie.id,
@@ -98,6 +184,8 @@ async def get_movie(movie_uuid: UUID, db: AsyncSession = Depends(get_db)) -> Mov
         genres=[GenreResponse(id=g.id, name=g.name) for g in movie.genres],
         directors=[DirectorResponse(id=d.id, name=d.name) for d in movie.directors],
         stars=[StarResponse(id=s.id, name=s.name) for s in movie.stars],
+        in_cart=None if principal is None else movie.id in in_cart,
+        owned=None if principal is None else movie.id in owned,
     )
 
 
@@ -115,7 +203,7 @@ async def get_movie(movie_uuid: UUID, db: AsyncSession = Depends(get_db)) -> Mov
 async def create_genre(
     payload: GenreBase,
     db: AsyncSession = Depends(get_db),
-    _moderator=Depends(require_moderator),
+    _moderator=Depends(require_catalog_manager),
 ) -> GenreResponse:
     try:
         entity = await movies_service.create_genre(db, payload.name)
@@ -128,7 +216,7 @@ async def create_genre(
 async def create_star(
     payload: StarBase,
     db: AsyncSession = Depends(get_db),
-    _moderator=Depends(require_moderator),
+    _moderator=Depends(require_catalog_manager),
 ) -> StarResponse:
     try:
         entity = await movies_service.create_star(db, payload.name)
@@ -141,7 +229,7 @@ async def create_star(
 async def create_director(
     payload: DirectorBase,
     db: AsyncSession = Depends(get_db),
-    _moderator=Depends(require_moderator),
+    _moderator=Depends(require_catalog_manager),
 ) -> DirectorResponse:
     try:
         entity = await movies_service.create_director(db, payload.name)
@@ -154,7 +242,7 @@ async def create_director(
 async def create_certification(
     payload: CertificationBase,
     db: AsyncSession = Depends(get_db),
-    _moderator=Depends(require_moderator),
+    _moderator=Depends(require_catalog_manager),
 ) -> CertificationResponse:
     try:
         entity = await movies_service.create_certification(db, payload.name)
@@ -167,7 +255,7 @@ async def create_certification(
 async def create_movie(
     payload: MovieCreateRequest,
     db: AsyncSession = Depends(get_db),
-    _moderator=Depends(require_moderator),
+    _moderator=Depends(require_catalog_manager),
 ) -> MovieDetailResponse:
     try:
         movie = await movies_service.create_movie(db, payload)
@@ -203,7 +291,7 @@ async def update_movie(
     movie_id: int,
     payload: MovieUpdateRequest,
     db: AsyncSession = Depends(get_db),
-    _moderator=Depends(require_moderator),
+    _moderator=Depends(require_catalog_manager),
 ) -> MovieDetailResponse:
     try:
         movie = await movies_service.update_movie(db, movie_id, payload)
@@ -236,7 +324,7 @@ async def update_movie(
 async def delete_movie(
     movie_id: int,
     db: AsyncSession = Depends(get_db),
-    _moderator=Depends(require_moderator),
+    _moderator=Depends(require_catalog_manager),
 ) -> dict:
     try:
         await movies_service.delete_movie(db, movie_id)
@@ -1,20 +1,26 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import JSONResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user
-from app.db.models.accounts import User
+from app.api.deps import get_current_principal
+from app.api.idempotency import IDEMPOTENCY_KEY_HEADER, respond_once
+from app.core.security import Principal
 from app.db.models.movies import Movie
+from app.db.models.orders import OrderStatusEnum
 from app.db.session import get_db
 from app.schemas.orders import (
     CreateOrderResponse,
     OrderItemResponse,
     OrderResponse,
+    OrdersListQuery,
     OrdersListResponse,
+    OrderSummaryResponse,
 )
 from app.services import orders as orders_service
+from app.services.idempotency import StoredResponse
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
@@ -32,56 +38,78 @@ async def _movies_map(db: AsyncSession, movie_ids: list[int]) -> dict[int, Movie
     response_model=CreateOrderResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Create order from current cart",
-    description="Creates a new order from the authenticated user's cart items.",
+    description=(
+        "Creates a new order from the authenticated user's cart items. With an Idempotency-Key "
+        "header, retries get the first response replayed instead of creating another order."
+    ),
 )
 async def create_order(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
-) -> CreateOrderResponse:
-    try:
-        order = await orders_service.create_order_from_cart(db, current_user.id)
-    except ValueError as e:
-        msg = str(e).lower()
-        raise HTTPException(status_code=400 if "not found" not in msg else 404, detail=str(e))
-
-    return CreateOrderResponse(message="Order created", order_id=order.id)
+    idempotency_key: str | None = Header(
+        default=None, alias=IDEMPOTENCY_KEY_HEADER, max_length=255
+    ),
+) -> JSONResponse:
+    async def _create() -> StoredResponse:
+        try:
+            order = await orders_service.create_order_from_cart(db, current_user.id)
+        except ValueError as e:
+            msg = str(e).lower()
+            return StoredResponse(400 if "not found" not in msg else 404, {"detail": str(e)})
+        body = CreateOrderResponse(message="Order created", order_id=order.id)
+        return StoredResponse(status.HTTP_201_CREATED, body.model_dump(mode="json"))
+
+    return await respond_once(
+        db, current_user, scope="orders:create", key=idempotency_key, body=b"", handler=_create
+    )
 
 
 @router.get(
     "",
     response_model=OrdersListResponse,
     summary="List current user's orders",
-    description="Returns a list of orders with items and totals.",
+    description=(
+        "Returns one page of orders, newest first, with items and totals. Pass `next_cursor` "
+        "back as `cursor` for the next page; `summary=true` leaves the items out."
+    ),
 )
 async def list_my_orders(
-    current_user: User = Depends(get_current_user),
+    query: OrdersListQuery = Depends(),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ) -> OrdersListResponse:
-    orders = await orders_service.list_orders(db, current_user.id)
-
-    all_movie_ids: list[int] = []
-    for o in orders:
-        all_movie_ids.extend([i.movie_id for i in o.items])
-
-    movies_by_id = await _movies_map(db, list(set(all_movie_ids)))
+    try:
+        orders, next_cursor = await orders_service.list_orders(
+            db,
+            current_user.id,
+            limit=query.limit,
+            cursor=query.cursor,
+            status=OrderStatusEnum(query.status) if query.status else None,
+            summary=query.summary,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    items: list[OrderResponse] = []
+    items: list[OrderResponse | OrderSummaryResponse] = []
     for o in orders:
+        fields = dict(
+            id=o.id,
+            status=o.status.value,
+            created_at=o.created_at.isoformat(),
+            total_amount=o.total_amount,
+            item_count=o.item_count,
+        )
+        if o.items is None:
+            items.append(OrderSummaryResponse(**fields))
+            continue
         items.append(
             OrderResponse(
-                id=o.id,
-                status=o.status.value,
-                created_at=o.created_at.isoformat(),
-                total_amount=o.total_amount,
+                **fields,
                 items=[
                     OrderItemResponse(
                         movie_id=i.movie_id,
-                        movie_uuid=movies_by_id[i.movie_id].uuid
-                        if i.movie_id in movies_by_id
-                        else None,  # type: ignore[arg-type]
-                        title=movies_by_id[i.movie_id].name
-                        if i.movie_id in movies_by_id
-                        else "Unknown",
+                        movie_uuid=i.movie_uuid,
+                        title=i.title if i.title is not None else "Unknown",
                         price_at_order=i.price_at_order,
                     )
                     for i in o.items
@@ -89,7 +117,7 @@ async def list_my_orders(
             )
         )
 
-    return OrdersListResponse(items=items)
+    return OrdersListResponse(items=items, next_cursor=next_cursor)
 
 
 @router.get(
@@ -100,7 +128,7 @@ async def list_my_orders(
 )
 async def get_my_order(
     order_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ) -> OrderResponse:
     order = await orders_service.get_order(db, current_user.id, order_id)
@@ -115,6 +143,7 @@ async def get_my_order(
         status=order.status.value,
         created_at=order.created_at.isoformat(),
         total_amount=order.total_amount,
+        item_count=len(order.items),
         items=[
             OrderItemResponse(
                 movie_id=i.movie_id,
@@ -135,7 +164,7 @@ async def get_my_order(
 )
 async def cancel_my_order(
     order_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ) -> dict:
     try:
@@ -4,12 +4,14 @@ from datetime import datetime
 from typing import Literal
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
 from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.api.deps import get_current_user, require_admin
-from app.db.models.accounts import User
+from app.api.deps import get_current_principal, require_payments_viewer
+from app.api.idempotency import IDEMPOTENCY_KEY_HEADER, respond_once
+from app.core.security import Principal
 from app.db.models.payments import Payment
 from app.db.session import get_db
 from app.schemas.payments import (
@@ -21,6 +23,7 @@ from app.schemas.payments import (
     PaymentsListResponse,
 )
 from app.services import payments as payments_service
+from app.services.idempotency import StoredResponse
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
@@ -28,22 +31,35 @@ router = APIRouter(prefix="/payments", tags=["Payments"])
 @router.post("/checkout-session", response_model=CreateCheckoutSessionResponse)
 async def create_checkout_session(
     payload: CreateCheckoutSessionRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
-) -> CreateCheckoutSessionResponse:
-    try:
-        checkout_url = await payments_service.create_stripe_checkout_session(
-            db,
-            user_id=current_user.id,
-            order_id=payload.order_id,
-        )
-    except ValueError as e:
-        msg = str(e).lower()
-        raise HTTPException(status_code=404 if "not found" in msg else 400, detail=str(e))
-    except Exception:
-        raise HTTPException(status_code=500, detail="Failed to create Stripe checkout session")
-
-    return CreateCheckoutSessionResponse(checkout_url=checkout_url)
+    idempotency_key: str | None = Header(
+        default=None, alias=IDEMPOTENCY_KEY_HEADER, max_length=255
+    ),
+) -> JSONResponse:
+    async def _create() -> StoredResponse:
+        try:
+            checkout_url = await payments_service.create_stripe_checkout_session(
+                db,
+                user_id=current_user.id,
+                order_id=payload.order_id,
+            )
+        except ValueError as e:
+            msg = str(e).lower()
+            return StoredResponse(404 if "not found" in msg else 400, {"detail": str(e)})
+        except Exception:
+            raise HTTPException(status_code=500, detail="Failed to create Stripe checkout session")
+        body = CreateCheckoutSessionResponse(checkout_url=checkout_url)
+        return StoredResponse(200, body.model_dump(mode="json"))
+
+    return await respond_once(
+        db,
+        current_user,
+        scope="payments:checkout-session",
+        key=idempotency_key,
+        body=payload.model_dump_json().encode(),
+        handler=_create,
+    )
 
 
 @router.post("/webhook", response_model=dict)
@@ -80,7 +96,7 @@ def _to_response(p: Payment) -> PaymentResponse:
 
 @router.get("", response_model=PaymentsListResponse)
 async def list_my_payments(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ) -> PaymentsListResponse:
     stmt = (
@@ -97,7 +113,7 @@ async def list_my_payments(
 @router.get("/admin", response_model=PaymentsListResponse)
 async def list_payments_admin(
     query: PaymentsAdminQuery = Depends(),
-    _admin=Depends(require_admin),
+    _admin=Depends(require_payments_viewer),
     db: AsyncSession = Depends(get_db),
 ) -> PaymentsListResponse:
     conditions = []
@@ -9,7 +9,10 @@ celery = Celery(
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
     include=[
+        "app.tasks.cart",
         "app.tasks.cleanup_tokens",
+        "app.tasks.emails",
+        "app.tasks.outbox",
     ],
 )
 
@@ -20,9 +23,21 @@ celery.conf.update(
 
 # Periodic tasks (celery beat)
 celery.conf.beat_schedule = {
-    # every 10 minutes cleanup expired tokens
-    "cleanup-expired-tokens-every-10-min": {
+    # batched purge of expired token rows
+    "cleanup-expired-tokens": {
         "task": "app.tasks.cleanup_tokens.cleanup_expired_tokens",
-        "schedule": 600.0,
+        "schedule": settings.TOKEN_PURGE_INTERVAL_SECONDS,
+    },
+    # deliver side effects recorded in outbox_events (emails, ...)
+    "relay-outbox": {
+        "task": "app.tasks.outbox.relay_outbox",
+        "schedule": settings.OUTBOX_RELAY_INTERVAL_SECONDS,
     },
 }
+
+if settings.CART_BACKEND == "redis":
+    # write-behind of carts kept in Redis
+    celery.conf.beat_schedule["flush-carts"] = {
+        "task": "app.tasks.cart.flush_carts",
+        "schedule": settings.CART_FLUSH_INTERVAL_SECONDS,
+    }
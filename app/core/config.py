@@ -12,11 +12,67 @@ class Settings(BaseSettings):
     DATABASE_URL: str = "postgresql+asyncpg://cinema:cinema@db:5432/cinema"
     DB_ECHO: bool = False
 
+    # In-memory catalog snapshot for GET /movies (optional, requires numpy)
+    CATALOG_SNAPSHOT_ENABLED: bool = False
+    CATALOG_SNAPSHOT_RELOAD_SECONDS: int = 300
+    # "local": every worker loads its own copy; "shared": workers map generations published
+    # by scripts/catalog_loader.py from CATALOG_SHM_DIR
+    CATALOG_SNAPSHOT_MODE: str = "local"
+    CATALOG_SHM_DIR: str = "/dev/shm/cinema-catalog"
+    CATALOG_SHM_POLL_SECONDS: float = 1.0
+
+    # In-process search index for `q` and /movies/autocomplete (falls back to ILIKE when disabled)
+    CATALOG_SEARCH_ENABLED: bool = False
+    CATALOG_SEARCH_RELOAD_SECONDS: int = 300
+
     # JWT
     JWT_SECRET_KEY: str = "change-me-in-env"
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TTL_MINUTES: int = 15
     JWT_REFRESH_TTL_DAYS: int = 14
+    # Per-worker cache of (group, is_active, token_version) checked against access token claims;
+    # revocation through another worker becomes visible within this TTL
+    AUTH_USER_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 50_000
+    # Access-token revocation (logout): per-worker Bloom filter over revoked jtis
+    AUTH_REVOCATION_SYNC_SECONDS: float = 5.0
+    AUTH_REVOCATION_REBUILD_SECONDS: float = 600.0
+    AUTH_REVOCATION_FILTER_CAPACITY: int = 100_000
+    AUTH_REVOCATION_FILTER_ERROR_RATE: float = 0.001
+
+    # bcrypt runs in a dedicated thread pool; beyond workers + queue, requests get 503
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+    # bcrypt cost: pinned rounds win; otherwise optionally calibrated at startup to the target
+    PASSWORD_BCRYPT_ROUNDS: int | None = None
+    PASSWORD_HASH_TARGET_MS: float = 250.0
+    PASSWORD_HASH_CALIBRATE_ON_STARTUP: bool = False
+
+    # Rate limits for login / register / password reset (attempts per window)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per process) or "redis" (shared, REDIS_URL)
+    RATE_LIMIT_WINDOW_SECONDS: int = 60
+    RATE_LIMIT_LOGIN_PER_IP: int = 20
+    RATE_LIMIT_LOGIN_PER_EMAIL: int = 5
+    RATE_LIMIT_REGISTER_PER_IP: int = 10
+    RATE_LIMIT_PASSWORD_RESET_PER_IP: int = 5
+    RATE_LIMIT_PASSWORD_RESET_PER_EMAIL: int = 3
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+
+    # Cart storage: "db" (Postgres) or "redis" (REDIS_URL, written behind to Postgres)
+    CART_BACKEND: str = "db"
+    CART_FLUSH_INTERVAL_SECONDS: float = 5.0
+    CART_FLUSH_BATCH_SIZE: int = 500  # dirty carts per flush task
+    CART_STORE_IDLE_TTL_SECONDS: int = 86_400  # flushed carts are evicted from Redis after this
+    # Per-worker cache of cart summaries (item count, total); 0 disables. Dropped on the worker
+    # that mutates the cart, so another worker may serve a stale badge for up to this TTL
+    CART_SUMMARY_CACHE_TTL_SECONDS: float = 10.0
+    CART_SUMMARY_CACHE_MAX_ENTRIES: int = 50_000
+
+    # Idempotency-Key on POST /orders and POST /payments/checkout-session
+    IDEMPOTENCY_TTL_SECONDS: int = 86_400  # responses are replayed for this long
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0  # a duplicate waits this long for the first request
+    IDEMPOTENCY_STALE_CLAIM_SECONDS: float = 120.0  # unfinished claims older than this are retaken
 
     # Stripe
     STRIPE_SECRET_KEY: str = "change-me"
@@ -24,11 +80,17 @@ class Settings(BaseSettings):
     STRIPE_CURRENCY: str = "usd"
     STRIPE_SUCCESS_URL: str = "http://localhost:8000/success"
     STRIPE_CANCEL_URL: str = "http://localhost:8000/cancel"
+    # an open checkout session is reused for the same order unless it expires sooner than this
+    STRIPE_CHECKOUT_REUSE_MARGIN_SECONDS: int = 300
 
     # Celery / Redis
     CELERY_BROKER_URL: str = "redis://redis:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://redis:6379/1"
 
+    # Redis for app state (refresh tokens when REFRESH_TOKEN_BACKEND="redis")
+    REDIS_URL: str = "redis://redis:6379/2"
+    REFRESH_TOKEN_BACKEND: str = "db"  # "db" or "redis"
+
     # SMTP (MailHog defaults)
     SMTP_HOST: str = "mailhog"
     SMTP_PORT: int = 1025
@@ -36,6 +98,26 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str | None = None
     SMTP_USE_TLS: bool = False
     EMAIL_FROM: str = "no-reply@cinema.local"
+    # Delivery runs in Celery workers over pooled connections
+    SMTP_POOL_SIZE: int = 2
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+    SMTP_MAX_IDLE_SECONDS: float = 30.0  # older connections are NOOP-checked before reuse
+    SMTP_MAX_USES_PER_CONNECTION: int = 100  # checkouts (tasks/batches) before reconnecting
+    EMAIL_MAX_RETRIES: int = 5
+    EMAIL_RETRY_BACKOFF_SECONDS: int = 10
+    EMAIL_RETRY_BACKOFF_MAX_SECONDS: int = 600
+
+    # Expired token purge (Celery beat)
+    TOKEN_PURGE_INTERVAL_SECONDS: float = 600.0
+    TOKEN_PURGE_BATCH_SIZE: int = 1000
+    TOKEN_PURGE_PAUSE_SECONDS: float = 0.05
+
+    # Transactional outbox relay
+    OUTBOX_RELAY_BATCH_SIZE: int = 100
+    OUTBOX_RELAY_INTERVAL_SECONDS: float = 2.0
+    OUTBOX_RELAY_MAX_BATCHES_PER_TASK: int = 50
+    OUTBOX_RETRY_BACKOFF_SECONDS: int = 5
+    OUTBOX_RETRY_BACKOFF_MAX_SECONDS: int = 900
 
     # MinIO (for avatars / media later)
     MINIO_ENDPOINT: str = "minio:9000"
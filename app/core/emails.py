@@ -1,54 +1,208 @@
+"""
+Transactional emails.
+
+Request handlers never talk to SMTP: services render an email with one of the `*_email` helpers
+and record it in the transactional outbox; the relay hands each batch of due emails to one Celery
+task (`app.tasks.emails.send_email_batch`). Workers deliver through a per-process
+`SmtpConnectionPool`, so the whole batch - and the batches after it - reuse an authenticated
+connection instead of paying TCP + STARTTLS + AUTH per email. Idle connections are checked with
+NOOP before reuse and recycled after a number of uses.
+"""
 from __future__ import annotations
 
+import logging
+import queue
 import smtplib
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
 from email.message import EmailMessage
 
+from app.core.celery_app import celery
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+SEND_EMAIL_BATCH_TASK = "app.tasks.emails.send_email_batch"
+
+RenderedEmail = tuple[str, str, str]  # (to_email, subject, body)
+
 
-def _send_email(to_email: str, subject: str, body: str) -> None:
+def build_message(to_email: str, subject: str, body: str) -> EmailMessage:
     msg = EmailMessage()
     msg["From"] = settings.EMAIL_FROM
     msg["To"] = to_email
     msg["Subject"] = subject
     msg.set_content(body)
+    return msg
+
+
+class _PooledConnection:
+    def __init__(self, server: smtplib.SMTP) -> None:
+        self.server = server
+        self.last_used = time.monotonic()
+        self.uses = 0
+
+    def close(self) -> None:
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+
+
+class SmtpConnectionPool:
+    """
+    Thread-safe pool of open SMTP connections for one worker process.
+
+    A connection is dropped (instead of returned) after any error, so a broken connection is
+    never handed out twice.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        *,
+        username: str | None = None,
+        password: str | None = None,
+        use_tls: bool = False,
+        size: int = 2,
+        timeout: float = 10.0,
+        max_idle_seconds: float = 30.0,
+        max_uses: int = 100,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.max_idle_seconds = max_idle_seconds
+        self.max_uses = max_uses
+        self._idle: queue.LifoQueue[_PooledConnection] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.opened = 0
+
+    def _open(self) -> _PooledConnection:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username and self.password:
+                server.login(self.username, self.password)
+        except BaseException:
+            server.close()
+            raise
+        self.opened += 1
+        return _PooledConnection(server)
+
+    def _healthy(self, conn: _PooledConnection) -> bool:
+        if conn.uses >= self.max_uses:
+            return False
+        if time.monotonic() - conn.last_used < self.max_idle_seconds:
+            return True
+        try:
+            return conn.server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
 
-    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-        if settings.SMTP_USE_TLS:
-            server.starttls()
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if self._healthy(conn):
+                return conn
+            conn.close()
 
-        if settings.SMTP_USER and settings.SMTP_PASSWORD:
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        self._slots.acquire()
+        try:
+            conn = self._checkout()
+            try:
+                yield conn.server
+            except BaseException:
+                conn.close()
+                raise
+            conn.last_used = time.monotonic()
+            conn.uses += 1
+            self._idle.put(conn)
+        finally:
+            self._slots.release()
 
-        server.send_message(msg)
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
 
 
-def send_activation_email(email: str, token: str) -> None:
+_pool: SmtpConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SmtpConnectionPool:
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = SmtpConnectionPool(
+                settings.SMTP_HOST,
+                settings.SMTP_PORT,
+                username=settings.SMTP_USER,
+                password=settings.SMTP_PASSWORD,
+                use_tls=settings.SMTP_USE_TLS,
+                size=settings.SMTP_POOL_SIZE,
+                timeout=settings.SMTP_TIMEOUT_SECONDS,
+                max_idle_seconds=settings.SMTP_MAX_IDLE_SECONDS,
+                max_uses=settings.SMTP_MAX_USES_PER_CONNECTION,
+            )
+        return _pool
+
+
+def close_smtp_pool() -> None:
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def deliver_later(messages: Sequence[RenderedEmail]) -> None:
+    """
+    Hand rendered emails to the Celery workers as one batch. Services do not call this directly:
+    they record the email in the outbox (`app.services.outbox.enqueue_email`) inside their
+    transaction.
+    """
+    celery.send_task(SEND_EMAIL_BATCH_TASK, args=([list(m) for m in messages],))
+
+
+def activation_email(email: str, token: str) -> RenderedEmail:
     link = f"http://localhost:8000/api/v1/accounts/activate?token={token}"
-    _send_email(
-        to_email=email,
-        subject="Activate your account",
-        body=f"Welcome!\n\nActivate your account using this link:\n{link}\n\nThis link expires in 24 hours.",
+    return (
+        email,
+        "Activate your account",
+        f"Welcome!\n\nActivate your account using this link:\n{link}\n\nThis link expires in 24 hours.",
     )
 
 
-def send_password_reset_email(email: str, token: str) -> None:
+def password_reset_email(email: str, token: str) -> RenderedEmail:
     link = f"http://localhost:8000/api/v1/accounts/reset-password?token={token}"
-    _send_email(
-        to_email=email,
-        subject="Password reset",
-        body=f"You requested a password reset.\n\nUse this link to set a new password:\n{link}\n\nIf you did not request this, ignore this email.",
+    return (
+        email,
+        "Password reset",
+        f"You requested a password reset.\n\nUse this link to set a new password:\n{link}\n\nIf you did not request this, ignore this email.",
     )
 
 
-def send_payment_confirmation_email(email: str, order_id: int, amount: str) -> None:
-    _send_email(
-        to_email=email,
-        subject="Payment confirmation",
-        body=f"Thanks for your purchase!\n\nOrder #{order_id} is paid.\nAmount: {amount}\n",
+def payment_confirmation_email(email: str, order_id: int, amount: str) -> RenderedEmail:
+    return (
+        email,
+        "Payment confirmation",
+        f"Thanks for your purchase!\n\nOrder #{order_id} is paid.\nAmount: {amount}\n",
     )
-
-
-def send_payment_confirmation_email(email: str, order_id: int, amount: str) -> None:
-    # Temporary stub (MailHog/SMTP later)
-    print(f"[EMAIL] Payment confirmation for {email}: Order #{order_id} paid, amount: {amount}")
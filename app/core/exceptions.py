@@ -25,3 +25,29 @@ class ValidationError(AppError):
 @dataclass(frozen=True)
 class AuthError(AppError):
     pass
+
+
+class PasswordHasherBusyError(Exception):
+    """
+    The password hashing pool is saturated; mapped to 503 with Retry-After.
+
+    Not a frozen dataclass, for the same reason as RateLimitExceededError.
+    """
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+        self.message = message
+
+
+class RateLimitExceededError(Exception):
+    """
+    Too many attempts for a throttled endpoint; mapped to 429 with Retry-After.
+
+    A plain exception rather than a frozen dataclass: it propagates through async context
+    managers, which assign __traceback__ on the way out.
+    """
+
+    def __init__(self, message: str, retry_after: int = 1) -> None:
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
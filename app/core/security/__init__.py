@@ -1,10 +1,17 @@
 from .jwt import create_access_token, create_refresh_token, decode_token
 from .passwords import (
     PasswordError,
+    configure_password_hashing,
+    get_password_hasher,
     hash_password,
+    hash_password_async,
+    needs_rehash,
+    shutdown_password_hasher,
     validate_password_complexity,
     verify_password,
+    verify_password_async,
 )
+from .principal import Principal, principal_claims
 
 __all__ = [
     "create_access_token",
@@ -12,6 +19,14 @@ __all__ = [
     "decode_token",
     "hash_password",
     "verify_password",
+    "hash_password_async",
+    "verify_password_async",
+    "get_password_hasher",
+    "configure_password_hashing",
+    "needs_rehash",
+    "shutdown_password_hasher",
     "validate_password_complexity",
     "PasswordError",
+    "Principal",
+    "principal_claims",
 ]
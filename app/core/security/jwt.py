@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
 from typing import Any
+from uuid import uuid4
 
 from jose import JWTError, jwt
 
@@ -12,26 +13,36 @@ def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def create_access_token(subject: str) -> str:
+def create_access_token(
+    subject: str, claims: dict[str, Any] | None = None, jti: str | None = None
+) -> str:
     now = _utcnow()
     expire = now + timedelta(minutes=settings.JWT_ACCESS_TTL_MINUTES)
 
     payload: dict[str, Any] = {
+        **(claims or {}),
         "sub": subject,
         "type": "access",
+        # revocation key (logout); callers pass one to reference the token elsewhere
+        "jti": jti or uuid4().hex,
         "iat": int(now.timestamp()),
         "exp": int(expire.timestamp()),
     }
     return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
 
-def create_refresh_token(subject: str) -> tuple[str, datetime]:
+def create_refresh_token(
+    subject: str, claims: dict[str, Any] | None = None
+) -> tuple[str, datetime]:
     now = _utcnow()
     expire = now + timedelta(days=settings.JWT_REFRESH_TTL_DAYS)
 
     payload: dict[str, Any] = {
+        **(claims or {}),
         "sub": subject,
         "type": "refresh",
+        # unique per token: two logins within the same second must not collide in the store
+        "jti": uuid4().hex,
         "iat": int(now.timestamp()),
         "exp": int(expire.timestamp()),
     }
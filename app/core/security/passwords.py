@@ -1,9 +1,20 @@
 from __future__ import annotations
 
+import asyncio
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from typing import Any, TypeVar
 
 import bcrypt
 
+from app.core.config import settings
+from app.core.exceptions import PasswordHasherBusyError
+
+T = TypeVar("T")
+
 
 class PasswordError(str, Enum):
     TOO_SHORT = "Password must be at least 8 characters long."
@@ -32,9 +43,206 @@ def validate_password_complexity(password: str) -> None:
         raise ValueError(PasswordError.NEED_SPECIAL.value)
 
 
+# -------------------------
+# Work factor
+# -------------------------
+
+BCRYPT_PREFIX = "2b"
+BCRYPT_DEFAULT_ROUNDS = 12
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+
+_rounds = BCRYPT_DEFAULT_ROUNDS
+
+
+def get_bcrypt_rounds() -> int:
+    return _rounds
+
+
+def set_bcrypt_rounds(rounds: int) -> None:
+    global _rounds
+
+    if not 4 <= rounds <= 31:
+        raise ValueError("bcrypt rounds must be between 4 and 31")
+    _rounds = rounds
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float,
+    min_rounds: int = BCRYPT_MIN_ROUNDS,
+    max_rounds: int = BCRYPT_MAX_ROUNDS,
+) -> int:
+    """
+    Highest work factor whose hash time on this machine stays within `target_ms`.
+
+    Every extra round doubles the cost, so one timing at `min_rounds` is extrapolated and the
+    pick is confirmed with a single measurement (stepping down if it overshoots).
+    """
+    sample = b"calibration-Password-1!"
+
+    def _measure(rounds: int) -> float:
+        started = time.perf_counter()
+        bcrypt.hashpw(sample, bcrypt.gensalt(rounds=rounds))
+        return (time.perf_counter() - started) * 1000
+
+    base_ms = min(_measure(min_rounds) for _ in range(3))
+    rounds = min_rounds
+    while rounds < max_rounds and base_ms * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+        rounds += 1
+
+    while rounds > min_rounds and _measure(rounds) > target_ms:
+        rounds -= 1
+    return rounds
+
+
+def configure_password_hashing() -> int:
+    """
+    Apply PASSWORD_BCRYPT_ROUNDS, or calibrate against PASSWORD_HASH_TARGET_MS when enabled.
+
+    Pin PASSWORD_BCRYPT_ROUNDS (see scripts/calibrate_password_hash.py) on multi-host fleets:
+    hosts calibrating to different costs would keep rehashing each other's hashes on login.
+    """
+    if settings.PASSWORD_BCRYPT_ROUNDS is not None:
+        set_bcrypt_rounds(settings.PASSWORD_BCRYPT_ROUNDS)
+    elif settings.PASSWORD_HASH_CALIBRATE_ON_STARTUP:
+        set_bcrypt_rounds(calibrate_bcrypt_rounds(settings.PASSWORD_HASH_TARGET_MS))
+    return _rounds
+
+
+def hash_parameters(hashed: str) -> tuple[str, int] | None:
+    """
+    (algorithm prefix, rounds) encoded in a modular-crypt bcrypt hash such as "$2b$12$...".
+    """
+    parts = hashed.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return parts[1], int(parts[2])
+
+
+def needs_rehash(hashed: str) -> bool:
+    return hash_parameters(hashed) != (BCRYPT_PREFIX, _rounds)
+
+
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=_rounds)).decode()
 
 
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode(), hashed.encode())
+
+
+# -------------------------
+# Off-loop hashing
+# -------------------------
+
+
+class _LatencyWindow:
+    """
+    Last N samples (seconds) for cheap percentiles.
+    """
+
+    def __init__(self, size: int = 1024) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def add(self, value: float) -> None:
+        self._samples.append(value)
+
+    def percentile_ms(self, pct: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))] * 1000, 3)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated, size-limited thread pool (bcrypt releases the GIL).
+
+    At most `workers + max_queue` operations may be in flight; beyond that callers get
+    PasswordHasherBusyError immediately instead of queueing behind a login storm.
+    The counters are only touched from the event loop thread, so they need no lock.
+    """
+
+    def __init__(self, workers: int, max_queue: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.workers = workers
+        self.limit = workers + max_queue
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait = _LatencyWindow()
+        self.hash_time = _LatencyWindow()
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            raise PasswordHasherBusyError("Too many concurrent password operations, retry shortly")
+
+        submitted = time.perf_counter()
+
+        def job() -> tuple[T, float, float]:
+            started = time.perf_counter()
+            result = fn(*args)
+            return result, started - submitted, time.perf_counter() - started
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result, waited, took = await loop.run_in_executor(self._executor, job)
+        finally:
+            self.in_flight -= 1
+
+        self.completed += 1
+        self.queue_wait.add(waited)
+        self.hash_time.add(took)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(verify_password, password, hashed)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "bcrypt_rounds": _rounds,
+            "workers": self.workers,
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_p50_ms": self.queue_wait.percentile_ms(0.5),
+            "queue_wait_p99_ms": self.queue_wait.percentile_ms(0.99),
+            "hash_p50_ms": self.hash_time.percentile_ms(0.5),
+            "hash_p99_ms": self.hash_time.percentile_ms(0.99),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_hasher: PasswordHasher | None = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _hasher
+
+    if _hasher is None:
+        _hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+    return _hasher
+
+
+def shutdown_password_hasher() -> None:
+    global _hasher
+
+    if _hasher is not None:
+        _hasher.shutdown()
+        _hasher = None
+
+
+async def hash_password_async(password: str) -> str:
+    return await get_password_hasher().hash(password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await get_password_hasher().verify(password, hashed)
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from app.db.models.accounts import UserGroupEnum
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    Authenticated caller built from access token claims, without loading the User row.
+
+    `id` keeps the name of `User.id` so handlers that only need the caller's id accept either.
+    """
+
+    id: int
+    group: UserGroupEnum
+    is_active: bool
+    token_version: int
+
+    @classmethod
+    def from_claims(cls, payload: dict[str, Any]) -> Principal:
+        try:
+            return cls(
+                id=int(payload["sub"]),
+                group=UserGroupEnum(payload["grp"]),
+                is_active=bool(payload["act"]),
+                token_version=int(payload["ver"]),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError("Invalid token claims") from e
+
+
+def principal_claims(group: UserGroupEnum, is_active: bool, token_version: int) -> dict[str, Any]:
+    """
+    Extra JWT claims issued next to `sub` (the user id).
+    """
+    return {"grp": group.value, "act": is_active, "ver": token_version}
@@ -40,7 +40,7 @@ def run_migrations_online() -> None:
         url=get_url(),
     )
 
-    async def do_migrations(connection: Connection) -> None:
+    def do_migrations(connection: Connection) -> None:
         context.configure(connection=connection, target_metadata=target_metadata)
         with context.begin_transaction():
             context.run_migrations()
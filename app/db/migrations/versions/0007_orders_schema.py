@@ -0,0 +1,56 @@
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0007_orders_schema"
+down_revision = "0006_cart_schema"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "orders",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "user_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "status",
+            sa.Enum("pending", "paid", "canceled", name="order_status"),
+            nullable=False,
+            server_default="pending",
+        ),
+        sa.Column("total_amount", sa.Numeric(10, 2), nullable=False, server_default="0.00"),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+    op.create_table(
+        "order_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "order_id",
+            sa.Integer(),
+            sa.ForeignKey("orders.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "movie_id",
+            sa.Integer(),
+            sa.ForeignKey("movies.id", ondelete="RESTRICT"),
+            nullable=False,
+        ),
+        sa.Column("price_at_order", sa.Numeric(10, 2), nullable=False),
+    )
+    op.create_index("ix_order_items_order_id", "order_items", ["order_id"])
+    op.create_index("ix_order_items_movie_id", "order_items", ["movie_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_order_items_movie_id", table_name="order_items")
+    op.drop_index("ix_order_items_order_id", table_name="order_items")
+    op.drop_table("order_items")
+    op.drop_table("orders")
+    sa.Enum(name="order_status").drop(op.get_bind(), checkfirst=True)
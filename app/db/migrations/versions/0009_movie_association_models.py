@@ -1,7 +1,7 @@
 """movie association tables as declarative models
 
 Revision ID: 20260217_0001
-Revises: <PUT_PREVIOUS_REVISION_HERE>
+Revises: 0008_payments_schema
 Create Date: 2026-02-17
 """
 
@@ -12,9 +12,8 @@ import sqlalchemy as sa
 from sqlalchemy import inspect
 
 
-# IMPORTANT: replace with your actual previous revision
 revision = "20260217_0001"
-down_revision = "<PUT_PREVIOUS_REVISION_HERE>"
+down_revision = "0008_payments_schema"
 branch_labels = None
 depends_on = None
 
@@ -0,0 +1,18 @@
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0010_user_token_version"
+down_revision = "20260217_0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "token_version")
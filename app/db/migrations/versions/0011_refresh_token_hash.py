@@ -0,0 +1,29 @@
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0011_refresh_token_hash"
+down_revision = "0010_user_token_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("refresh_tokens", sa.Column("token_hash", sa.LargeBinary(length=32)))
+    # existing sessions stay valid: hash the stored JWTs in place
+    op.execute("UPDATE refresh_tokens SET token_hash = sha256(convert_to(token, 'UTF8'))")
+    op.alter_column("refresh_tokens", "token_hash", nullable=False)
+    op.create_unique_constraint(
+        "uq_refresh_tokens_token_hash", "refresh_tokens", ["token_hash"]
+    )
+    op.drop_column("refresh_tokens", "token")
+
+
+def downgrade() -> None:
+    # raw tokens cannot be recovered from their digests: everyone logs in again
+    op.execute("DELETE FROM refresh_tokens")
+    op.drop_constraint("uq_refresh_tokens_token_hash", "refresh_tokens", type_="unique")
+    op.drop_column("refresh_tokens", "token_hash")
+    op.add_column(
+        "refresh_tokens",
+        sa.Column("token", sa.String(length=512), nullable=False, unique=True),
+    )
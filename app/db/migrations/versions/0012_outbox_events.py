@@ -0,0 +1,39 @@
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "0012_outbox_events"
+down_revision = "0011_refresh_token_hash"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "outbox_events",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("topic", sa.String(length=64), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.func.timezone("utc", sa.func.now()),
+            nullable=False,
+        ),
+        sa.Column(
+            "available_at",
+            sa.DateTime(),
+            server_default=sa.func.timezone("utc", sa.func.now()),
+            nullable=False,
+        ),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+    )
+    op.create_index(
+        "ix_outbox_events_available_at_id", "outbox_events", ["available_at", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbox_events_available_at_id", table_name="outbox_events")
+    op.drop_table("outbox_events")
@@ -0,0 +1,24 @@
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0013_revoked_access_tokens"
+down_revision = "0012_outbox_events"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "revoked_access_tokens",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("jti", sa.String(length=64), nullable=False, unique=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_revoked_access_tokens_expires_at", "revoked_access_tokens", ["expires_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_revoked_access_tokens_expires_at", table_name="revoked_access_tokens")
+    op.drop_table("revoked_access_tokens")
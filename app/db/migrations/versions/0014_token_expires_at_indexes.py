@@ -0,0 +1,32 @@
+from alembic import op
+
+revision = "0014_token_expires_at_indexes"
+down_revision = "0013_revoked_access_tokens"
+branch_labels = None
+depends_on = None
+
+# expired-token purge walks these; built without blocking writes on large tables
+TABLES = ("activation_tokens", "password_reset_tokens", "refresh_tokens")
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(
+                f"ix_{table}_expires_at",
+                table,
+                ["expires_at"],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.drop_index(
+                f"ix_{table}_expires_at",
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,37 @@
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0015_user_library"
+down_revision = "0014_token_expires_at_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # filled for past orders by scripts/backfill_user_library.py
+    op.create_table(
+        "user_library",
+        sa.Column(
+            "user_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "movie_id",
+            sa.Integer(),
+            sa.ForeignKey("movies.id", ondelete="RESTRICT"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "order_id",
+            sa.Integer(),
+            sa.ForeignKey("orders.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("acquired_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_library")
@@ -0,0 +1,26 @@
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0016_orders_user_created_at_idx"
+down_revision = "0015_user_library"
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_orders_user_id_created_at_id"
+
+
+def upgrade() -> None:
+    # order history pages; built without blocking order creation
+    with op.get_context().autocommit_block():
+        op.create_index(
+            INDEX,
+            "orders",
+            ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(INDEX, table_name="orders", postgresql_concurrently=True, if_exists=True)
@@ -2,13 +2,17 @@ from app.db.models.accounts import (
     ActivationToken,
     PasswordResetToken,
     RefreshToken,
+    RevokedAccessToken,
     User,
     UserGroup,
     UserProfile,
 )
 from app.db.models.cart import Cart, CartItem
+from app.db.models.idempotency import IdempotencyKey
+from app.db.models.library import UserLibraryItem
 from app.db.models.movies import Certification, Director, Genre, Movie, Star
 from app.db.models.orders import Order, OrderItem, OrderStatusEnum
+from app.db.models.outbox import OutboxEvent
 from app.db.models.payments import Payment, PaymentItem, PaymentStatusEnum
 
 __all__ = [
@@ -18,6 +22,7 @@ __all__ = [
     "UserProfile",
     "ActivationToken",
     "RefreshToken",
+    "RevokedAccessToken",
     "PasswordResetToken",
     # movies
     "Genre",
@@ -28,6 +33,8 @@ __all__ = [
     # cart
     "Cart",
     "CartItem",
+    # library
+    "UserLibraryItem",
     # orders
     "Order",
     "OrderItem",
@@ -36,4 +43,8 @@ __all__ = [
     "Payment",
     "PaymentItem",
     "PaymentStatusEnum",
+    # outbox
+    "OutboxEvent",
+    # idempotency
+    "IdempotencyKey",
 ]
@@ -2,12 +2,27 @@ from __future__ import annotations
 
 import enum
 from datetime import datetime
-
-from sqlalchemy import Boolean, Date, DateTime, Enum, ForeignKey, Integer, String, Text
+from typing import TYPE_CHECKING
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Date,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
 
+if TYPE_CHECKING:
+    from app.db.models.orders import Order
+
 
 class UserGroupEnum(str, enum.Enum):
     USER = "USER"
@@ -41,6 +56,13 @@ class User(Base):
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
 
     is_active: Mapped[bool] = mapped_column(Boolean, default=False)
+    # bumped on password change / reset and group change; access tokens carry it as "ver"
+    token_version: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        server_default="0",
+        nullable=False,
+    )
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime,
@@ -82,6 +104,11 @@ class User(Base):
         cascade="all, delete-orphan",
     )
 
+    orders: Mapped[list["Order"]] = relationship(
+        back_populates="user",
+        cascade="all, delete-orphan",
+    )
+
 
 class UserProfile(Base):
     __tablename__ = "user_profiles"
@@ -113,7 +140,7 @@ class ActivationToken(Base):
         nullable=False,
     )
     token: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
-    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
 
     user: Mapped["User"] = relationship(back_populates="activation_token")
 
@@ -124,12 +151,26 @@ class RefreshToken(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
 
-    token: Mapped[str] = mapped_column(String(512), unique=True, nullable=False)
-    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # SHA-256 of the JWT (32 bytes); the raw token is never stored
+    token_hash: Mapped[bytes] = mapped_column(LargeBinary(32), unique=True, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
 
     user: Mapped["User"] = relationship(back_populates="refresh_tokens")
 
 
+class RevokedAccessToken(Base):
+    """
+    Access tokens revoked before their expiry (by `jti`); rows are useless once expires_at passes.
+    """
+
+    __tablename__ = "revoked_access_tokens"
+
+    # monotonically increasing: workers sync their Bloom filters incrementally by id
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    jti: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
 class PasswordResetToken(Base):
     __tablename__ = "password_reset_tokens"
 
@@ -141,6 +182,6 @@ class PasswordResetToken(Base):
     )
 
     token: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
-    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
 
     user: Mapped["User"] = relationship(back_populates="password_reset_token")
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class UserLibraryItem(Base):
+    """
+    A movie the user owns (bought through a paid order). Maintained when a payment succeeds, so
+    "already purchased" is a primary-key lookup instead of a join over paid orders.
+    """
+
+    __tablename__ = "user_library"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    movie_id: Mapped[int] = mapped_column(
+        ForeignKey("movies.id", ondelete="RESTRICT"),
+        primary_key=True,
+    )
+    order_id: Mapped[int | None] = mapped_column(
+        Integer,
+        ForeignKey("orders.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    acquired_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
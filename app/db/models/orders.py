@@ -4,20 +4,39 @@ from datetime import datetime
 from decimal import Decimal
 from enum import Enum
 
-from sqlalchemy import DateTime, Enum as SAEnum, ForeignKey, Integer, Numeric
+from sqlalchemy import (
+    DateTime,
+    Enum as SAEnum,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    Text,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
 
 
-class OrderStatus(str, Enum):
-    PENDING = "pending"
-    PAID = "paid"
-    CANCELED = "canceled"
+class OrderStatusEnum(str, Enum):
+    pending = "pending"
+    paid = "paid"
+    canceled = "canceled"
 
 
 class Order(Base):
     __tablename__ = "orders"
+    # order history: one user's orders newest first, keyset-paginated on (created_at, id)
+    __table_args__ = (
+        Index(
+            "ix_orders_user_id_created_at_id",
+            "user_id",
+            text("created_at DESC"),
+            text("id DESC"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
@@ -26,10 +45,10 @@ class Order(Base):
         nullable=False,
     )
 
-    status: Mapped[OrderStatus] = mapped_column(
-        SAEnum(OrderStatus, name="order_status"),
+    status: Mapped[OrderStatusEnum] = mapped_column(
+        SAEnum(OrderStatusEnum, name="order_status"),
         nullable=False,
-        default=OrderStatus.PENDING,
+        default=OrderStatusEnum.pending,
     )
 
     total_amount: Mapped[Decimal] = mapped_column(
@@ -44,6 +63,11 @@ class Order(Base):
         default=datetime.utcnow,
     )
 
+    # the open Stripe Checkout Session of a pending order, reused until it is about to expire
+    checkout_session_id: Mapped[str | None] = mapped_column(String(255))
+    checkout_url: Mapped[str | None] = mapped_column(Text)
+    checkout_expires_at: Mapped[datetime | None] = mapped_column(DateTime)
+
     # relationships
     user = relationship("User", back_populates="orders")
     items: Mapped[list["OrderItem"]] = relationship(
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class OutboxEvent(Base):
+    """
+    Side effect recorded in the same transaction as the change that caused it; delivered (and
+    deleted) by the outbox relay.
+    """
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (Index("ix_outbox_events_available_at_id", "available_at", "id"),)
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+
+    topic: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.timezone("utc", func.now()), nullable=False
+    )
+    # not before this time: pushed back after a failed delivery
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.timezone("utc", func.now()), nullable=False
+    )
+
+    attempts: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+    last_error: Mapped[str | None] = mapped_column(Text)
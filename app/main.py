@@ -1,13 +1,24 @@
 from __future__ import annotations
 
-from fastapi import Depends, FastAPI
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Request, status
 from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
 from starlette.responses import JSONResponse, Response
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_principal
 from app.api.v1.router import api_v1_router
 from app.core.config import settings
+from app.core.exceptions import PasswordHasherBusyError, RateLimitExceededError
+from app.core.security import (
+    configure_password_hashing,
+    get_password_hasher,
+    shutdown_password_hasher,
+)
+from app.services import catalog_events, catalog_search, catalog_shm, catalog_snapshot
 
 OPENAPI_TAGS = [
     {
@@ -36,6 +47,35 @@ OPENAPI_TAGS = [
     },
 ]
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # calibration hashes for up to a few seconds; keep it off the event loop
+    await asyncio.to_thread(configure_password_hashing)
+
+    shared_catalog = settings.CATALOG_SNAPSHOT_MODE == "shared"
+    # Start listening before the engines load so no change slips in between.
+    listen = (
+        settings.CATALOG_SNAPSHOT_ENABLED and not shared_catalog
+    ) or settings.CATALOG_SEARCH_ENABLED
+    if listen:
+        catalog_events.start()
+    if settings.CATALOG_SNAPSHOT_ENABLED:
+        await (catalog_shm.start_reader() if shared_catalog else catalog_snapshot.start())
+    if settings.CATALOG_SEARCH_ENABLED:
+        await catalog_search.start()
+    try:
+        yield
+    finally:
+        if settings.CATALOG_SEARCH_ENABLED:
+            await catalog_search.stop()
+        if settings.CATALOG_SNAPSHOT_ENABLED:
+            await (catalog_shm.stop_reader() if shared_catalog else catalog_snapshot.stop())
+        if listen:
+            await catalog_events.stop()
+        shutdown_password_hasher()
+
+
 # Disable default docs and openapi routes; we will expose protected versions manually.
 app = FastAPI(
     title=settings.APP_NAME,
@@ -60,16 +100,40 @@ app = FastAPI(
     docs_url=None,
     redoc_url=None,
     openapi_url=None,
+    lifespan=lifespan,
 )
 
 app.include_router(api_v1_router, prefix="/api/v1")
 
 
+@app.exception_handler(PasswordHasherBusyError)
+async def password_hasher_busy_handler(_: Request, exc: PasswordHasherBusyError) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": exc.message},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(RateLimitExceededError)
+async def rate_limit_exceeded_handler(_: Request, exc: RateLimitExceededError) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": exc.message},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.get("/health", tags=["System"], summary="Healthcheck")
 async def healthcheck() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/health/password-hasher", tags=["System"], summary="Password hashing pool metrics")
+async def password_hasher_health() -> dict:
+    return get_password_hasher().stats()
+
+
 def _build_openapi_schema() -> dict:
     schema = get_openapi(
         title=settings.APP_NAME,
@@ -97,7 +161,7 @@ def _build_openapi_schema() -> dict:
 
 
 @app.get("/openapi.json", include_in_schema=False)
-async def openapi_json(_=Depends(get_current_user)) -> JSONResponse:
+async def openapi_json(_=Depends(get_current_principal)) -> JSONResponse:
     return JSONResponse(_build_openapi_schema())
 
 
@@ -107,7 +171,7 @@ async def openapi_json(_=Depends(get_current_user)) -> JSONResponse:
 
 
 @app.get("/docs", include_in_schema=False)
-async def swagger_ui(_=Depends(get_current_user)) -> Response:
+async def swagger_ui(_=Depends(get_current_principal)) -> Response:
     return get_swagger_ui_html(
         openapi_url="/openapi.json",
         title=f"{settings.APP_NAME} - Swagger UI",
@@ -115,7 +179,7 @@ async def swagger_ui(_=Depends(get_current_user)) -> Response:
 
 
 @app.get("/redoc", include_in_schema=False)
-async def redoc_ui(_=Depends(get_current_user)) -> Response:
+async def redoc_ui(_=Depends(get_current_principal)) -> Response:
     return get_redoc_html(
         openapi_url="/openapi.json",
         title=f"{settings.APP_NAME} - ReDoc",
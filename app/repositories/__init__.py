@@ -2,10 +2,13 @@ from app.repositories.accounts import (
     ActivationTokenRepository,
     PasswordResetTokenRepository,
     RefreshTokenRepository,
+    RevokedAccessTokenRepository,
     UserGroupRepository,
     UserRepository,
 )
 from app.repositories.cart import CartItemRepository, CartRepository
+from app.repositories.idempotency import IdempotencyKeyRepository
+from app.repositories.library import UserLibraryRepository
 from app.repositories.movies import (
     CertificationRepository,
     DirectorRepository,
@@ -14,6 +17,7 @@ from app.repositories.movies import (
     StarRepository,
 )
 from app.repositories.orders import OrderItemRepository, OrderRepository
+from app.repositories.outbox import OutboxRepository
 from app.repositories.payments import PaymentItemRepository, PaymentRepository
 
 __all__ = [
@@ -22,6 +26,7 @@ __all__ = [
     "ActivationTokenRepository",
     "PasswordResetTokenRepository",
     "RefreshTokenRepository",
+    "RevokedAccessTokenRepository",
     "MovieRepository",
     "GenreRepository",
     "DirectorRepository",
@@ -29,8 +34,11 @@ __all__ = [
     "CertificationRepository",
     "CartRepository",
     "CartItemRepository",
+    "UserLibraryRepository",
     "OrderRepository",
     "OrderItemRepository",
+    "OutboxRepository",
     "PaymentRepository",
     "PaymentItemRepository",
+    "IdempotencyKeyRepository",
 ]
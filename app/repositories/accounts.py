@@ -1,14 +1,17 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import Row, case, delete, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.accounts import (
     ActivationToken,
     PasswordResetToken,
     RefreshToken,
+    RevokedAccessToken,
     User,
     UserGroup,
 )
@@ -24,14 +27,76 @@ class UserRepository(BaseRepository[User]):
         return await cls.get_one_by(db, email=email)
 
     @classmethod
-    async def set_active(cls, db: AsyncSession, user: User, is_active: bool) -> None:
-        user.is_active = is_active
-        await db.flush()
+    async def create_with_activation_token(
+        cls,
+        db: AsyncSession,
+        *,
+        email: str,
+        hashed_password: str,
+        group_id: int,
+        token: str,
+        token_expires_at: datetime,
+        now: datetime,
+    ) -> int | None:
+        """
+        Insert an inactive user and its activation token in one statement.
+        Returns the new user id, or None when the email is already registered.
+        """
+        new_user = (
+            pg_insert(User)
+            .values(
+                email=email,
+                hashed_password=hashed_password,
+                is_active=False,
+                group_id=group_id,
+                token_version=0,
+                created_at=now,
+                updated_at=now,
+            )
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.id)
+            .cte("new_user")
+        )
+        stmt = (
+            insert(ActivationToken)
+            .from_select(
+                ["user_id", "token", "expires_at"],
+                select(new_user.c.id, literal(token), literal(token_expires_at)),
+            )
+            .returning(ActivationToken.user_id)
+        )
+        res = await db.execute(stmt)
+        return res.scalar()
 
     @classmethod
-    async def update_password_hash(cls, db: AsyncSession, user: User, password_hash: str) -> None:
-        user.hashed_password = password_hash
-        await db.flush()
+    async def get_auth_state(cls, db: AsyncSession, user_id: int) -> Row[Any] | None:
+        """
+        (group_id, is_active, token_version) of a user, without loading the User entity.
+        """
+        stmt = select(User.group_id, User.is_active, User.token_version).where(User.id == user_id)
+        res = await db.execute(stmt)
+        return res.first()
+
+    @classmethod
+    async def bump_token_version(cls, db: AsyncSession, user_id: int) -> None:
+        await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(token_version=User.token_version + 1)
+            .execution_options(synchronize_session="fetch")
+        )
+
+    @classmethod
+    async def set_group(cls, db: AsyncSession, user_id: int, group_id: int) -> None:
+        """
+        Move the user to another group and revoke their access tokens (bumps token_version).
+        """
+        await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(group_id=group_id, token_version=User.token_version + 1)
+            .execution_options(synchronize_session="fetch")
+        )
 
 
 class UserGroupRepository(BaseRepository[UserGroup]):
@@ -45,6 +110,30 @@ class UserGroupRepository(BaseRepository[UserGroup]):
 class ActivationTokenRepository(BaseRepository[ActivationToken]):
     model = ActivationToken
 
+    @classmethod
+    async def consume_and_activate(
+        cls, db: AsyncSession, token: str, now: datetime
+    ) -> Row[Any] | None:
+        """
+        Delete the token and activate its user if it has not expired, in one statement.
+        Returns (user_id, expires_at) of the consumed token, or None if it did not exist.
+        """
+        consumed = (
+            delete(ActivationToken)
+            .where(ActivationToken.token == token)
+            .returning(ActivationToken.user_id, ActivationToken.expires_at)
+            .cte("consumed")
+        )
+        stmt = (
+            update(User)
+            .where(User.id == consumed.c.user_id)
+            .values(is_active=User.is_active | (consumed.c.expires_at >= now), updated_at=now)
+            .returning(User.id.label("user_id"), consumed.c.expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        res = await db.execute(stmt)
+        return res.first()
+
     @classmethod
     async def get_by_token(cls, db: AsyncSession, token: str) -> ActivationToken | None:
         return await cls.get_one_by(db, token=token)
@@ -53,14 +142,60 @@ class ActivationTokenRepository(BaseRepository[ActivationToken]):
     async def delete_for_user(cls, db: AsyncSession, user_id: int) -> int:
         return await cls.delete_where(db, cls.col("user_id") == user_id)
 
-    @classmethod
-    async def delete_expired(cls, db: AsyncSession, now: datetime) -> int:
-        return await cls.delete_where(db, cls.col("expires_at") < now)
-
 
 class PasswordResetTokenRepository(BaseRepository[PasswordResetToken]):
     model = PasswordResetToken
 
+    @classmethod
+    async def replace_for_active_email(
+        cls, db: AsyncSession, email: str, token: str, expires_at: datetime
+    ) -> int | None:
+        """
+        Create or replace the reset token of an active user, looked up by email, in one statement.
+        Returns the user id, or None for unknown / inactive emails.
+        """
+        source = select(User.id, literal(token), literal(expires_at)).where(
+            User.email == email, User.is_active.is_(True)
+        )
+        stmt = pg_insert(PasswordResetToken).from_select(
+            ["user_id", "token", "expires_at"], source
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PasswordResetToken.user_id],
+            set_={"token": stmt.excluded.token, "expires_at": stmt.excluded.expires_at},
+        ).returning(PasswordResetToken.user_id)
+        res = await db.execute(stmt)
+        return res.scalar()
+
+    @classmethod
+    async def consume_and_set_password(
+        cls, db: AsyncSession, token: str, hashed_password: str, now: datetime
+    ) -> Row[Any] | None:
+        """
+        Delete the token and, if it has not expired, set the new password hash and bump the user's
+        token_version, in one statement. Returns (user_id, expires_at) or None if it did not exist.
+        """
+        consumed = (
+            delete(PasswordResetToken)
+            .where(PasswordResetToken.token == token)
+            .returning(PasswordResetToken.user_id, PasswordResetToken.expires_at)
+            .cte("consumed")
+        )
+        valid = consumed.c.expires_at >= now
+        stmt = (
+            update(User)
+            .where(User.id == consumed.c.user_id)
+            .values(
+                hashed_password=case((valid, hashed_password), else_=User.hashed_password),
+                token_version=User.token_version + case((valid, 1), else_=0),
+                updated_at=now,
+            )
+            .returning(User.id.label("user_id"), consumed.c.expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        res = await db.execute(stmt)
+        return res.first()
+
     @classmethod
     async def get_by_token(cls, db: AsyncSession, token: str) -> PasswordResetToken | None:
         return await cls.get_one_by(db, token=token)
@@ -69,17 +204,13 @@ class PasswordResetTokenRepository(BaseRepository[PasswordResetToken]):
     async def delete_for_user(cls, db: AsyncSession, user_id: int) -> int:
         return await cls.delete_where(db, cls.col("user_id") == user_id)
 
-    @classmethod
-    async def delete_expired(cls, db: AsyncSession, now: datetime) -> int:
-        return await cls.delete_where(db, cls.col("expires_at") < now)
-
 
 class RefreshTokenRepository(BaseRepository[RefreshToken]):
     model = RefreshToken
 
     @classmethod
-    async def get_by_token(cls, db: AsyncSession, token: str) -> RefreshToken | None:
-        return await cls.get_one_by(db, token=token)
+    async def get_by_hash(cls, db: AsyncSession, token_hash: bytes) -> RefreshToken | None:
+        return await cls.get_one_by(db, token_hash=token_hash)
 
     @classmethod
     async def list_for_user(cls, db: AsyncSession, user_id: int) -> list[RefreshToken]:
@@ -88,9 +219,71 @@ class RefreshTokenRepository(BaseRepository[RefreshToken]):
         return list(res.scalars().all())
 
     @classmethod
-    async def delete_by_token(cls, db: AsyncSession, token: str) -> int:
-        return await cls.delete_where(db, cls.col("token") == token)
+    async def rotate(
+        cls,
+        db: AsyncSession,
+        old_hash: bytes,
+        new_hash: bytes,
+        user_id: int,
+        expires_at: datetime,
+        now: datetime,
+    ) -> bool:
+        """
+        Swap a live token for a new one in a single UPDATE; False if it was missing or expired.
+        """
+        stmt = (
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == old_hash,
+                RefreshToken.user_id == user_id,
+                RefreshToken.expires_at > now,
+            )
+            .values(token_hash=new_hash, expires_at=expires_at)
+            .returning(RefreshToken.id)
+            .execution_options(synchronize_session=False)
+        )
+        res = await db.execute(stmt)
+        return res.first() is not None
 
     @classmethod
-    async def delete_expired(cls, db: AsyncSession, now: datetime) -> int:
-        return await cls.delete_where(db, cls.col("expires_at") < now)
+    async def delete_by_hash(cls, db: AsyncSession, token_hash: bytes) -> int:
+        return await cls.delete_where(db, cls.col("token_hash") == token_hash)
+
+    @classmethod
+    async def delete_for_user(cls, db: AsyncSession, user_id: int) -> int:
+        return await cls.delete_where(db, cls.col("user_id") == user_id)
+
+
+class RevokedAccessTokenRepository(BaseRepository[RevokedAccessToken]):
+    model = RevokedAccessToken
+
+    @classmethod
+    async def revoke(cls, db: AsyncSession, jti: str, expires_at: datetime) -> None:
+        stmt = (
+            pg_insert(RevokedAccessToken)
+            .values(jti=jti, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[RevokedAccessToken.jti])
+        )
+        await db.execute(stmt)
+
+    @classmethod
+    async def is_revoked(cls, db: AsyncSession, jti: str) -> bool:
+        res = await db.execute(
+            select(literal(1)).where(RevokedAccessToken.jti == jti).limit(1)
+        )
+        return res.first() is not None
+
+    @classmethod
+    async def list_after(
+        cls, db: AsyncSession, last_id: int, now: datetime
+    ) -> list[tuple[int, str]]:
+        """
+        (id, jti) of unexpired revocations with id > last_id, in id order.
+        """
+        stmt = (
+            select(RevokedAccessToken.id, RevokedAccessToken.jti)
+            .where(RevokedAccessToken.id > last_id, RevokedAccessToken.expires_at > now)
+            .order_by(RevokedAccessToken.id)
+        )
+        res = await db.execute(stmt)
+        return [(int(row.id), row.jti) for row in res]
@@ -51,6 +51,35 @@ class BaseRepository(Generic[ModelT]):
         await db.flush()
         return int(res.rowcount or 0)
 
+    @classmethod
+    async def delete_expired_batch(
+        cls, db: AsyncSession, now: Any, *, after_id: int, limit: int
+    ) -> list[int]:
+        """
+        Delete up to `limit` rows with expires_at < now and id > after_id, lowest ids first.
+
+        Bounded so each batch holds its locks briefly; rows locked by a concurrent transaction are
+        skipped (picked up by a later run). Returns the deleted ids in ascending order, so the
+        caller can continue after the last one.
+        """
+        id_col, expires_col = cls.col("id"), cls.col("expires_at")
+        batch = (
+            select(id_col)
+            .where(expires_col < now, id_col > after_id)
+            .order_by(id_col)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .cte("batch")
+        )
+        stmt = (
+            delete(cls.model)
+            .where(id_col.in_(select(batch.c.id)))
+            .returning(id_col)
+            .execution_options(synchronize_session=False)
+        )
+        res = await db.execute(stmt)
+        return sorted(res.scalars().all())
+
     @classmethod
     def col(cls, name: str) -> InstrumentedAttribute:
         return getattr(cls.model, name)
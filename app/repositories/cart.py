@@ -1,10 +1,29 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    Row,
+    cast,
+    delete,
+    exists,
+    func,
+    literal,
+    select,
+    true,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.db.models.cart import Cart, CartItem
+from app.db.models.library import UserLibraryItem
+from app.db.models.movies import Movie
 from app.repositories.base import BaseRepository
 
 
@@ -25,6 +44,21 @@ class CartRepository(BaseRepository[Cart]):
     async def create_for_user(cls, db: AsyncSession, user_id: int) -> Cart:
         return await cls.create(db, user_id=user_id)
 
+    @classmethod
+    async def lock_for_user(cls, db: AsyncSession, user_id: int) -> int:
+        """
+        Get or create the user's cart and keep its row locked until the transaction ends.
+        """
+        stmt = pg_insert(Cart).values(user_id=user_id)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Cart.user_id], set_={"user_id": stmt.excluded.user_id}
+        ).returning(Cart.id)
+        return int(await db.scalar(stmt))
+
+    @classmethod
+    async def exists_for_user(cls, db: AsyncSession, user_id: int) -> bool:
+        return bool(await db.scalar(select(exists().where(Cart.user_id == user_id))))
+
 
 class CartItemRepository(BaseRepository[CartItem]):
     model = CartItem
@@ -43,3 +77,235 @@ class CartItemRepository(BaseRepository[CartItem]):
     @classmethod
     async def delete_for_cart(cls, db: AsyncSession, cart_id: int) -> int:
         return await cls.delete_where(db, cls.col("cart_id") == cart_id)
+
+    @classmethod
+    async def add_many_for_user(
+        cls, db: AsyncSession, user_id: int, movie_ids: Sequence[int], now: datetime
+    ) -> dict[int, str]:
+        """
+        Create the user's cart if needed and add the movies, in one statement.
+
+        Returns {movie_id: "added" | "already_in_cart" | "already_owned"} for the movies that
+        exist; owned movies (user_library) are never added. No cart is created when nothing can
+        be added. Concurrent adds for one user serialize on the cart row instead of racing into
+        the unique constraints.
+        """
+        owned = (
+            select(UserLibraryItem.movie_id)
+            .where(UserLibraryItem.user_id == user_id, UserLibraryItem.movie_id == Movie.id)
+            .exists()
+        )
+        found = (
+            select(Movie.id, owned.label("owned")).where(Movie.id.in_(movie_ids)).cte("found")
+        )
+        addable = select(found.c.id).where(~found.c.owned)
+        cart_insert = pg_insert(Cart).from_select(
+            ["user_id"], select(literal(user_id, Integer)).where(addable.exists())
+        )
+        cart = (
+            # no-op update, so RETURNING also yields an existing cart's id
+            cart_insert.on_conflict_do_update(
+                index_elements=[Cart.user_id],
+                set_={"user_id": cart_insert.excluded.user_id},
+            )
+            .returning(Cart.id)
+            .cte("cart")
+        )
+        items = (
+            pg_insert(CartItem)
+            .from_select(
+                ["cart_id", "movie_id", "added_at"],
+                select(cart.c.id, found.c.id, literal(now, DateTime))
+                .select_from(cart.join(found, true()))
+                .where(~found.c.owned)
+                # same key order in every transaction, so concurrent batches cannot deadlock
+                .order_by(found.c.id),
+            )
+            .on_conflict_do_nothing(index_elements=[CartItem.cart_id, CartItem.movie_id])
+            .returning(CartItem.movie_id)
+            .cte("items")
+        )
+        stmt = select(
+            found.c.id, found.c.owned, found.c.id.in_(select(items.c.movie_id)).label("added")
+        )
+        res = await db.execute(stmt)
+        return {
+            movie_id: "already_owned" if is_owned else "added" if added else "already_in_cart"
+            for movie_id, is_owned, added in res.all()
+        }
+
+    @classmethod
+    async def remove_many_for_user(
+        cls, db: AsyncSession, user_id: int, movie_ids: Sequence[int]
+    ) -> set[int]:
+        """
+        Delete the movies from the user's cart; returns the ids that were there.
+        """
+        stmt = (
+            delete(CartItem)
+            .where(
+                CartItem.cart_id == Cart.id,
+                Cart.user_id == user_id,
+                CartItem.movie_id.in_(movie_ids),
+            )
+            .returning(CartItem.movie_id)
+            .execution_options(synchronize_session=False)
+        )
+        res = await db.execute(stmt)
+        return set(res.scalars().all())
+
+    @classmethod
+    async def list_items_for_user(
+        cls, db: AsyncSession, user_id: int
+    ) -> list[tuple[int, datetime]]:
+        stmt = (
+            select(CartItem.movie_id, CartItem.added_at)
+            .join(Cart, Cart.id == CartItem.cart_id)
+            .where(Cart.user_id == user_id)
+        )
+        res = await db.execute(stmt)
+        return [(int(movie_id), added_at) for movie_id, added_at in res.all()]
+
+    @classmethod
+    async def replace_items(
+        cls, db: AsyncSession, cart_id: int, items: Sequence[tuple[int, datetime]]
+    ) -> None:
+        """
+        Make the cart hold exactly `items` (movie_id, added_at), in one statement.
+
+        Rows already present keep their added_at; movies that no longer exist are skipped.
+        """
+        snapshot = (
+            func.unnest(
+                cast([movie_id for movie_id, _ in items], ARRAY(Integer)),
+                cast([added_at for _, added_at in items], ARRAY(DateTime)),
+            )
+            .table_valued("movie_id", "added_at")
+            .render_derived(name="snapshot")
+        )
+        stale = (
+            delete(CartItem)
+            .where(
+                CartItem.cart_id == cart_id,
+                CartItem.movie_id.not_in(select(snapshot.c.movie_id)),
+            )
+            .cte("stale")
+        )
+        stmt = (
+            pg_insert(CartItem)
+            .from_select(
+                ["cart_id", "movie_id", "added_at"],
+                select(literal(cart_id, Integer), snapshot.c.movie_id, snapshot.c.added_at)
+                .join(Movie, Movie.id == snapshot.c.movie_id)
+                .order_by(snapshot.c.movie_id),
+            )
+            .on_conflict_do_nothing(index_elements=[CartItem.cart_id, CartItem.movie_id])
+            .add_cte(stale)
+        )
+        await db.execute(stmt)
+
+    @classmethod
+    async def list_details_for_items(
+        cls, db: AsyncSession, items: Sequence[tuple[int, datetime]]
+    ) -> list[Row[Any]]:
+        """
+        Same rows as `list_details_for_user`, for cart items held outside Postgres.
+        """
+        snapshot = (
+            func.unnest(
+                cast([movie_id for movie_id, _ in items], ARRAY(Integer)),
+                cast([added_at for _, added_at in items], ARRAY(DateTime)),
+            )
+            .table_valued("movie_id", "added_at")
+            .render_derived(name="snapshot")
+        )
+        stmt = (
+            select(
+                snapshot.c.movie_id,
+                snapshot.c.added_at,
+                Movie.uuid.label("movie_uuid"),
+                Movie.name.label("title"),
+                Movie.year,
+                Movie.price,
+                func.sum(Movie.price).over().label("total_amount"),
+            )
+            .join(Movie, Movie.id == snapshot.c.movie_id)
+            .order_by(snapshot.c.added_at, snapshot.c.movie_id)
+        )
+        res = await db.execute(stmt)
+        return list(res.all())
+
+    @classmethod
+    async def list_details_for_user(cls, db: AsyncSession, user_id: int) -> list[Row[Any]]:
+        """
+        The user's cart items joined to their movies, oldest first, each row carrying the cart
+        total (`total_amount`, a window sum). Items whose movie is gone are left out.
+        """
+        stmt = (
+            select(
+                CartItem.movie_id,
+                CartItem.added_at,
+                Movie.uuid.label("movie_uuid"),
+                Movie.name.label("title"),
+                Movie.year,
+                Movie.price,
+                func.sum(Movie.price).over().label("total_amount"),
+            )
+            .join(Cart, Cart.id == CartItem.cart_id)
+            .join(Movie, Movie.id == CartItem.movie_id)
+            .where(Cart.user_id == user_id)
+            .order_by(CartItem.added_at, CartItem.id)
+        )
+        res = await db.execute(stmt)
+        return list(res.all())
+
+    @classmethod
+    async def summary_for_user(cls, db: AsyncSession, user_id: int) -> Row[Any]:
+        """
+        (item_count, total_amount) of the user's cart; zeros when there is none.
+        """
+        stmt = (
+            select(
+                func.count().label("item_count"),
+                func.coalesce(func.sum(Movie.price), 0).label("total_amount"),
+            )
+            .select_from(CartItem)
+            .join(Cart, Cart.id == CartItem.cart_id)
+            .join(Movie, Movie.id == CartItem.movie_id)
+            .where(Cart.user_id == user_id)
+        )
+        res = await db.execute(stmt)
+        return res.one()
+
+    @classmethod
+    async def flags_for_user(
+        cls, db: AsyncSession, user_id: int, movie_ids: Sequence[int]
+    ) -> tuple[set[int], set[int]]:
+        """
+        (in cart, owned) subsets of `movie_ids` for the user, in one statement.
+        """
+        if not movie_ids:
+            return set(), set()
+        in_cart = (
+            select(CartItem.movie_id, literal("cart").label("kind"))
+            .join(Cart, Cart.id == CartItem.cart_id)
+            .where(Cart.user_id == user_id, CartItem.movie_id.in_(movie_ids))
+        )
+        owned = select(UserLibraryItem.movie_id, literal("owned").label("kind")).where(
+            UserLibraryItem.user_id == user_id, UserLibraryItem.movie_id.in_(movie_ids)
+        )
+        res = await db.execute(union_all(in_cart, owned))
+        flags: dict[str, set[int]] = {"cart": set(), "owned": set()}
+        for movie_id, kind in res.all():
+            flags[kind].add(int(movie_id))
+        return flags["cart"], flags["owned"]
+
+    @classmethod
+    async def clear_for_user(cls, db: AsyncSession, user_id: int) -> int:
+        stmt = (
+            delete(CartItem)
+            .where(CartItem.cart_id == Cart.id, Cart.user_id == user_id)
+            .execution_options(synchronize_session=False)
+        )
+        res = await db.execute(stmt)
+        return int(res.rowcount or 0)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import null, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.idempotency import IdempotencyKey
+from app.repositories.base import BaseRepository
+
+
+class IdempotencyKeyRepository(BaseRepository[IdempotencyKey]):
+    model = IdempotencyKey
+
+    @classmethod
+    async def claim(
+        cls,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        scope: str,
+        key: str,
+        fingerprint: str,
+        now: datetime,
+        stale_before: datetime,
+        expires_at: datetime,
+    ) -> int | None:
+        """
+        Claim the key for a new request, in one statement; returns the row id, or None when the
+        key is held by another request (in progress, or completed and not expired yet).
+
+        Expired rows and in-progress claims older than `stale_before` (the request died) are
+        taken over.
+        """
+        stmt = pg_insert(IdempotencyKey).values(
+            user_id=user_id,
+            scope=scope,
+            key=key,
+            fingerprint=fingerprint,
+            claimed_at=now,
+            expires_at=expires_at,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_id, IdempotencyKey.scope, IdempotencyKey.key],
+            set_={
+                "fingerprint": stmt.excluded.fingerprint,
+                "status_code": None,
+                "response": null(),  # SQL NULL, not a JSON null
+                "claimed_at": stmt.excluded.claimed_at,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=or_(
+                IdempotencyKey.expires_at <= now,
+                IdempotencyKey.status_code.is_(None) & (IdempotencyKey.claimed_at < stale_before),
+            ),
+        ).returning(IdempotencyKey.id)
+        return await db.scalar(stmt)
+
+    @classmethod
+    async def get_for_user(
+        cls, db: AsyncSession, user_id: int, scope: str, key: str
+    ) -> IdempotencyKey | None:
+        stmt = select(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+        )
+        res = await db.execute(stmt.execution_options(populate_existing=True))
+        return res.scalars().first()
+
+    @classmethod
+    async def complete(
+        cls, db: AsyncSession, key_id: int, status_code: int, response: dict[str, Any]
+    ) -> None:
+        await db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == key_id)
+            .values(status_code=status_code, response=response)
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    async def release(cls, db: AsyncSession, key_id: int) -> None:
+        """
+        Drop an unfinished claim, so the client's retry runs the request again.
+        """
+        await cls.delete_where(
+            db, IdempotencyKey.id == key_id, IdempotencyKey.status_code.is_(None)
+        )
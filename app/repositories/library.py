@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, Row, func, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.library import UserLibraryItem
+from app.db.models.movies import Movie
+from app.db.models.orders import Order, OrderItem, OrderStatusEnum
+from app.repositories.base import BaseRepository
+
+
+class UserLibraryRepository(BaseRepository[UserLibraryItem]):
+    model = UserLibraryItem
+
+    @classmethod
+    async def add_from_order(cls, db: AsyncSession, order_id: int, acquired_at: datetime) -> int:
+        """
+        Add the order's movies to its user's library; movies already owned keep their row.
+        """
+        stmt = (
+            pg_insert(UserLibraryItem)
+            .from_select(
+                ["user_id", "movie_id", "order_id", "acquired_at"],
+                select(Order.user_id, OrderItem.movie_id, Order.id, literal(acquired_at, DateTime))
+                .join(OrderItem, OrderItem.order_id == Order.id)
+                .where(Order.id == order_id)
+                .order_by(OrderItem.movie_id),
+            )
+            .on_conflict_do_nothing(
+                index_elements=[UserLibraryItem.user_id, UserLibraryItem.movie_id]
+            )
+        )
+        res = await db.execute(stmt)
+        return int(res.rowcount or 0)
+
+    @classmethod
+    async def owned_ids(
+        cls, db: AsyncSession, user_id: int, movie_ids: Sequence[int]
+    ) -> set[int]:
+        stmt = select(UserLibraryItem.movie_id).where(
+            UserLibraryItem.user_id == user_id, UserLibraryItem.movie_id.in_(movie_ids)
+        )
+        res = await db.execute(stmt)
+        return set(res.scalars().all())
+
+    @classmethod
+    async def list_for_user(cls, db: AsyncSession, user_id: int) -> list[Row[Any]]:
+        stmt = (
+            select(
+                UserLibraryItem.movie_id,
+                Movie.uuid.label("movie_uuid"),
+                Movie.name.label("title"),
+                Movie.year,
+                UserLibraryItem.order_id,
+                UserLibraryItem.acquired_at,
+            )
+            .join(Movie, Movie.id == UserLibraryItem.movie_id)
+            .where(UserLibraryItem.user_id == user_id)
+            .order_by(UserLibraryItem.acquired_at.desc(), UserLibraryItem.movie_id)
+        )
+        res = await db.execute(stmt)
+        return list(res.all())
+
+    @classmethod
+    async def backfill_batch(
+        cls, db: AsyncSession, *, after_order_id: int, limit: int
+    ) -> tuple[int | None, int]:
+        """
+        Add the movies of the next `limit` paid orders (by id, after `after_order_id`).
+
+        Returns (last order id of the batch or None when there are no more, rows inserted).
+        Idempotent: rows that already exist are left alone.
+        """
+        batch = (
+            select(Order.id, Order.user_id, Order.created_at)
+            .where(Order.status == OrderStatusEnum.paid, Order.id > after_order_id)
+            .order_by(Order.id)
+            .limit(limit)
+            .cte("batch")
+        )
+        inserted = (
+            pg_insert(UserLibraryItem)
+            .from_select(
+                ["user_id", "movie_id", "order_id", "acquired_at"],
+                select(batch.c.user_id, OrderItem.movie_id, batch.c.id, batch.c.created_at)
+                .join(OrderItem, OrderItem.order_id == batch.c.id)
+                # the earliest order wins when a movie was bought twice
+                .order_by(batch.c.id, OrderItem.movie_id),
+            )
+            .on_conflict_do_nothing(
+                index_elements=[UserLibraryItem.user_id, UserLibraryItem.movie_id]
+            )
+            .returning(UserLibraryItem.movie_id)
+            .cte("inserted")
+        )
+        stmt = select(
+            select(func.max(batch.c.id)).scalar_subquery(),
+            select(func.count()).select_from(inserted).scalar_subquery(),
+        )
+        res = await db.execute(stmt)
+        last_order_id, count = res.one()
+        return last_order_id, int(count)
@@ -1,15 +1,42 @@
 from __future__ import annotations
 
+from collections.abc import Iterable, Sequence
+from typing import Any
 from uuid import UUID
 
-from sqlalchemy import Select, func, select
+from sqlalchemy import Integer, Row, Select, Table, cast, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.db.models.movies import Certification, Director, Genre, Movie, Star
+from app.db.models.movies import (
+    Certification,
+    Director,
+    Genre,
+    Movie,
+    Star,
+    movie_directors,
+    movie_genres,
+    movie_stars,
+)
 from app.repositories.base import BaseRepository
 
 
+class _NameSearchMixin:
+    model: type[Movie] | type[Star] | type[Director]
+
+    @classmethod
+    async def list_name_matches(cls, db: AsyncSession, q: str, limit: int) -> list[Any]:
+        stmt = (
+            select(cls.model)
+            .where(cls.model.name.ilike(f"%{q.strip()}%"))
+            .order_by(cls.model.name.asc())
+            .limit(limit)
+        )
+        res = await db.execute(stmt)
+        return list(res.scalars().all())
+
+
 class GenreRepository(BaseRepository[Genre]):
     model = Genre
 
@@ -19,7 +46,7 @@ class GenreRepository(BaseRepository[Genre]):
         return list(res.scalars().all())
 
 
-class StarRepository(BaseRepository[Star]):
+class StarRepository(_NameSearchMixin, BaseRepository[Star]):
     model = Star
 
     @classmethod
@@ -28,7 +55,7 @@ class StarRepository(BaseRepository[Star]):
         return list(res.scalars().all())
 
 
-class DirectorRepository(BaseRepository[Director]):
+class DirectorRepository(_NameSearchMixin, BaseRepository[Director]):
     model = Director
 
     @classmethod
@@ -46,7 +73,7 @@ class CertificationRepository(BaseRepository[Certification]):
         return list(res.scalars().all())
 
 
-class MovieRepository(BaseRepository[Movie]):
+class MovieRepository(_NameSearchMixin, BaseRepository[Movie]):
     model = Movie
 
     @classmethod
@@ -81,3 +108,85 @@ class MovieRepository(BaseRepository[Movie]):
     async def list_movies(cls, db: AsyncSession, stmt: Select) -> list[Movie]:
         res = await db.execute(stmt)
         return list(res.scalars().all())
+
+    @classmethod
+    async def existing_ids(cls, db: AsyncSession, movie_ids: Sequence[int]) -> set[int]:
+        res = await db.execute(select(Movie.id).where(Movie.id.in_(movie_ids)))
+        return set(res.scalars().all())
+
+    @classmethod
+    async def get_id_range(cls, db: AsyncSession) -> tuple[int, int] | None:
+        res = await db.execute(select(func.min(Movie.id), func.max(Movie.id)))
+        low, high = res.one()
+        return None if low is None else (int(low), int(high))
+
+    @classmethod
+    async def probe_ids(cls, db: AsyncSession, candidates: Select, probes: list[int]) -> list[int]:
+        """
+        For every probe, the first id >= probe among `candidates` (a `select(Movie.id)` with filters).
+
+        One round trip; each probe walks the primary key index up to the next match - a few
+        entries for broad filters, longer for selective ones. Probes past the last matching id
+        yield nothing.
+        """
+        probe = func.unnest(cast(probes, ARRAY(Integer))).table_valued("id").render_derived(name="probe")
+        first_match = (
+            candidates.where(Movie.id >= probe.c.id)
+            .order_by(Movie.id.asc())
+            .limit(1)
+            .correlate(probe)
+            .scalar_subquery()
+        )
+        res = await db.execute(select(first_match).select_from(probe))
+        return [int(movie_id) for movie_id in res.scalars().all() if movie_id is not None]
+
+    @classmethod
+    async def list_snapshot_rows(
+        cls, db: AsyncSession, movie_ids: Iterable[int] | None = None
+    ) -> list[Row[Any]]:
+        """
+        Flat movie rows (joined with certification name) used to build in-memory catalog snapshots.
+        """
+        stmt = (
+            select(
+                Movie.id,
+                Movie.uuid,
+                Movie.name,
+                Movie.year,
+                Movie.time,
+                Movie.imdb,
+                Movie.votes,
+                Movie.price,
+                Movie.certification_id,
+                Certification.name.label("certification_name"),
+            )
+            .join(Certification, Certification.id == Movie.certification_id)
+            .order_by(Movie.id.asc())
+        )
+        if movie_ids is not None:
+            stmt = stmt.where(Movie.id.in_(list(movie_ids)))
+        res = await db.execute(stmt)
+        return list(res.all())
+
+    @classmethod
+    async def list_relation_pairs(
+        cls, db: AsyncSession, movie_ids: Iterable[int] | None = None
+    ) -> dict[str, list[tuple[int, int]]]:
+        """
+        (movie_id, entity_id) pairs for genres, directors and stars.
+        """
+        tables: dict[str, tuple[Table, str]] = {
+            "genre": (movie_genres, "genre_id"),
+            "director": (movie_directors, "director_id"),
+            "star": (movie_stars, "star_id"),
+        }
+        ids = list(movie_ids) if movie_ids is not None else None
+
+        pairs: dict[str, list[tuple[int, int]]] = {}
+        for relation, (table, column) in tables.items():
+            stmt = select(table.c.movie_id, table.c[column])
+            if ids is not None:
+                stmt = stmt.where(table.c.movie_id.in_(ids))
+            res = await db.execute(stmt)
+            pairs[relation] = [(int(m), int(e)) for m, e in res.all()]
+        return pairs
@@ -1,26 +1,107 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import (
+    Integer,
+    Row,
+    Select,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    true,
+    tuple_,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
-from app.db.models.orders import Order, OrderItem
+from app.db.models.cart import Cart, CartItem
+from app.db.models.library import UserLibraryItem
+from app.db.models.movies import Movie
+from app.db.models.orders import Order, OrderItem, OrderStatusEnum
 from app.repositories.base import BaseRepository
 
 
 class OrderRepository(BaseRepository[Order]):
     model = Order
 
+    @staticmethod
+    def _history_page(
+        user_id: int,
+        *,
+        limit: int,
+        after: tuple[datetime, int] | None,
+        status: OrderStatusEnum | None,
+    ) -> Select:
+        item_count = (
+            select(func.count()).where(OrderItem.order_id == Order.id).scalar_subquery()
+        )
+        stmt = select(
+            Order.id,
+            Order.status,
+            Order.created_at,
+            Order.total_amount,
+            item_count.label("item_count"),
+        ).where(Order.user_id == user_id)
+        if status is not None:
+            stmt = stmt.where(Order.status == status)
+        if after is not None:
+            stmt = stmt.where(tuple_(Order.created_at, Order.id) < tuple_(*after))
+        # matches ix_orders_user_id_created_at_id: an index range scan that stops after `limit`
+        return stmt.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit)
+
+    @classmethod
+    async def list_page_for_user(
+        cls,
+        db: AsyncSession,
+        user_id: int,
+        *,
+        limit: int,
+        after: tuple[datetime, int] | None = None,
+        status: OrderStatusEnum | None = None,
+    ) -> list[Row[Any]]:
+        """
+        The user's orders newest first, `limit` of them after the (created_at, id) keyset
+        cursor; (id, status, created_at, total_amount, item_count) rows.
+        """
+        res = await db.execute(
+            cls._history_page(user_id, limit=limit, after=after, status=status)
+        )
+        return list(res.all())
+
     @classmethod
-    async def list_for_user(cls, db: AsyncSession, user_id: int) -> list[Order]:
+    async def list_page_with_items_for_user(
+        cls,
+        db: AsyncSession,
+        user_id: int,
+        *,
+        limit: int,
+        after: tuple[datetime, int] | None = None,
+        status: OrderStatusEnum | None = None,
+    ) -> list[Row[Any]]:
+        """
+        Same page as `list_page_for_user`, one row per order item joined to its movie (movie
+        columns are NULL when the movie is gone, item columns when the order has no items).
+        """
+        page = cls._history_page(user_id, limit=limit, after=after, status=status).cte("page")
         stmt = (
-            select(Order)
-            .where(Order.user_id == user_id)
-            .order_by(Order.created_at.desc())
-            .options(selectinload(Order.items))
+            select(
+                page,
+                OrderItem.movie_id,
+                OrderItem.price_at_order,
+                Movie.uuid.label("movie_uuid"),
+                Movie.name.label("title"),
+            )
+            .select_from(page)
+            .outerjoin(OrderItem, OrderItem.order_id == page.c.id)
+            .outerjoin(Movie, Movie.id == OrderItem.movie_id)
+            .order_by(page.c.created_at.desc(), page.c.id.desc(), OrderItem.id)
         )
         res = await db.execute(stmt)
-        return list(res.scalars().all())
+        return list(res.all())
 
     @classmethod
     async def get_for_user(cls, db: AsyncSession, user_id: int, order_id: int) -> Order | None:
@@ -29,9 +110,91 @@ class OrderRepository(BaseRepository[Order]):
             .where(Order.user_id == user_id, Order.id == order_id)
             .options(selectinload(Order.items))
         )
-        res = await db.execute(stmt)
+        # fresh state, not the session's copy: callers re-check the order under a lock
+        res = await db.execute(stmt.execution_options(populate_existing=True))
         return res.scalars().first()
 
+    @classmethod
+    async def create_from_cart(
+        cls, db: AsyncSession, user_id: int, now: datetime
+    ) -> tuple[Order, list[int]] | None:
+        """
+        Turn the user's cart into a pending order, in one statement: the order row with its total
+        summed in SQL, one order item per orderable cart movie at its current price, and the cart
+        emptied. Movies that are gone or already owned are left out of the order.
+
+        Returns (order, movie ids removed from the cart), or None - with the cart untouched - when
+        nothing in it can be ordered.
+        """
+        owned = (
+            select(UserLibraryItem.movie_id)
+            .where(
+                UserLibraryItem.user_id == user_id,
+                UserLibraryItem.movie_id == CartItem.movie_id,
+            )
+            .exists()
+        )
+        orderable = (
+            select(CartItem.movie_id, Movie.price)
+            .join(Cart, Cart.id == CartItem.cart_id)
+            .join(Movie, Movie.id == CartItem.movie_id)
+            .where(Cart.user_id == user_id, ~owned)
+            .cte("orderable")
+        )
+        new_order = (
+            insert(Order)
+            .from_select(
+                ["user_id", "status", "total_amount", "created_at"],
+                select(
+                    literal(user_id, Integer),
+                    literal(OrderStatusEnum.pending, Order.status.type),
+                    func.sum(orderable.c.price),
+                    literal(now, Order.created_at.type),
+                )
+                .select_from(orderable)
+                # no row at all (rather than a NULL total) for an empty selection
+                .having(func.count() > 0),
+            )
+            .returning(*Order.__table__.c)
+            .cte("new_order")
+        )
+        new_items = (
+            insert(OrderItem)
+            .from_select(
+                ["order_id", "movie_id", "price_at_order"],
+                select(new_order.c.id, orderable.c.movie_id, orderable.c.price)
+                .select_from(new_order.join(orderable, true()))
+                .order_by(orderable.c.movie_id),
+            )
+            .returning(OrderItem.movie_id)
+            .cte("new_items")
+        )
+        cleared = (
+            delete(CartItem)
+            .where(
+                CartItem.cart_id == Cart.id,
+                Cart.user_id == user_id,
+                select(new_order.c.id).exists(),
+            )
+            .returning(CartItem.movie_id)
+            .cte("cleared")
+        )
+        stmt = (
+            select(
+                aliased(Order, new_order),
+                select(func.array_agg(cleared.c.movie_id)).scalar_subquery(),
+            )
+            # data-modifying CTEs run to completion whether or not they are read
+            .add_cte(new_items)
+            .execution_options(synchronize_session=False)
+        )
+        res = await db.execute(stmt)
+        row = res.first()
+        if row is None:
+            return None
+        order, cleared_ids = row
+        return order, list(cleared_ids or [])
+
 
 class OrderItemRepository(BaseRepository[OrderItem]):
     model = OrderItem
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.outbox import OutboxEvent
+from app.repositories.base import BaseRepository
+
+
+class OutboxRepository(BaseRepository[OutboxEvent]):
+    model = OutboxEvent
+
+    @classmethod
+    def add(
+        cls, db: AsyncSession, topic: str, payload: dict[str, Any], now: datetime
+    ) -> OutboxEvent:
+        """
+        Stage an event in the caller's transaction; it is flushed together with the commit.
+        """
+        event = OutboxEvent(topic=topic, payload=payload, created_at=now, available_at=now)
+        db.add(event)
+        return event
+
+    @classmethod
+    async def claim_batch(
+        cls, db: AsyncSession, limit: int, now: datetime
+    ) -> list[OutboxEvent]:
+        """
+        Lock up to `limit` due events; rows locked by other relays are skipped, not waited on.
+        """
+        stmt = (
+            select(OutboxEvent)
+            .where(OutboxEvent.available_at <= now)
+            .order_by(OutboxEvent.available_at, OutboxEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        res = await db.execute(stmt)
+        return list(res.scalars().all())
+
+    @classmethod
+    async def delete_ids(cls, db: AsyncSession, ids: Sequence[int]) -> None:
+        if ids:
+            await db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(ids)))
+
+    @classmethod
+    async def reschedule(
+        cls, db: AsyncSession, event_id: int, available_at: datetime, error: str
+    ) -> None:
+        await db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id == event_id)
+            .values(
+                attempts=OutboxEvent.attempts + 1,
+                available_at=available_at,
+                last_error=error,
+            )
+        )
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from datetime import datetime
+from uuid import UUID
+
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -43,3 +46,16 @@ class PasswordResetConfirmRequest(BaseModel):
 
 class MessageResponse(BaseModel):
     message: str
+
+
+class LibraryItemResponse(BaseModel):
+    movie_id: int
+    movie_uuid: UUID
+    title: str
+    year: int
+    order_id: int | None
+    acquired_at: datetime
+
+
+class LibraryResponse(BaseModel):
+    items: list[LibraryItemResponse]
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 from decimal import Decimal
+from typing import Literal
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+CART_BATCH_MAX_OPERATIONS = 100
 
 
 class CartAddItemRequest(BaseModel):
@@ -27,3 +30,38 @@ class CartResponse(BaseModel):
     user_id: int
     items: list[CartItemResponse]
     total_amount: Decimal
+
+
+class CartSummaryResponse(BaseModel):
+    item_count: int
+    total_amount: Decimal
+
+
+class CartBatchOperation(BaseModel):
+    op: Literal["add", "remove"]
+    movie_id: int = Field(ge=1)
+
+
+class CartBatchRequest(BaseModel):
+    operations: list[CartBatchOperation] = Field(min_length=1, max_length=CART_BATCH_MAX_OPERATIONS)
+
+    @field_validator("operations")
+    @classmethod
+    def _one_operation_per_movie(cls, v: list[CartBatchOperation]) -> list[CartBatchOperation]:
+        movie_ids = [o.movie_id for o in v]
+        if len(set(movie_ids)) != len(movie_ids):
+            raise ValueError("Each movie_id may appear only once per batch")
+        return v
+
+
+class CartBatchItemResult(BaseModel):
+    op: Literal["add", "remove"]
+    movie_id: int
+    status: Literal[
+        "added", "already_in_cart", "already_owned", "not_found", "removed", "not_in_cart"
+    ]
+
+
+class CartBatchResponse(BaseModel):
+    results: list[CartBatchItemResult]
+    total_amount: Decimal
@@ -87,6 +87,9 @@ class MovieShortResponse(BaseModel):
     imdb: float
     price: Decimal
     certification: CertificationResponse
+    # only for authenticated callers
+    in_cart: bool | None = None
+    owned: bool | None = None
 
 
 class MovieDetailResponse(BaseModel):
@@ -105,6 +108,8 @@ class MovieDetailResponse(BaseModel):
     genres: list[GenreResponse]
     directors: list[DirectorResponse]
     stars: list[StarResponse]
+    in_cart: bool | None = None
+    owned: bool | None = None
 
 
 class PaginatedMoviesResponse(BaseModel):
@@ -114,6 +119,17 @@ class PaginatedMoviesResponse(BaseModel):
     items: list[MovieShortResponse]
 
 
+class SuggestionResponse(BaseModel):
+    id: int
+    name: str
+
+
+class AutocompleteResponse(BaseModel):
+    movies: list[SuggestionResponse]
+    stars: list[SuggestionResponse]
+    directors: list[SuggestionResponse]
+
+
 # -------------------------
 # Query schema with enums
 # -------------------------
@@ -134,3 +150,17 @@ class MoviesListQuery(BaseModel):
 
     sort_by: MovieSortField = MovieSortField.year
     order: SortOrder = SortOrder.desc
+
+
+class MoviesDiscoverQuery(BaseModel):
+    n: int = Field(default=10, ge=1, le=50)
+
+    q: str | None = None
+    year: int | None = None
+    imdb_min: float | None = None
+    imdb_max: float | None = None
+
+    certification_id: int | None = None
+    genre_id: int | None = None
+    director_id: int | None = None
+    star_id: int | None = None
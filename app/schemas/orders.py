@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Literal
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+ORDERS_PAGE_SIZE_MAX = 100
+
+
+class CreateOrderResponse(BaseModel):
+    message: str
+    order_id: int
+
+
+class OrderItemResponse(BaseModel):
+    movie_id: int
+    movie_uuid: UUID | None  # None once the movie is gone
+    title: str
+    price_at_order: Decimal
+
+
+class OrderSummaryResponse(BaseModel):
+    id: int
+    status: str
+    created_at: str  # ISO string
+    total_amount: Decimal
+    item_count: int
+
+
+class OrderResponse(OrderSummaryResponse):
+    items: list[OrderItemResponse]
+
+
+class OrdersListResponse(BaseModel):
+    items: list[OrderResponse | OrderSummaryResponse]
+    next_cursor: str | None = None
+
+
+class OrdersListQuery(BaseModel):
+    cursor: str | None = None
+    limit: int = Field(default=20, ge=1, le=ORDERS_PAGE_SIZE_MAX)
+    status: Literal["pending", "paid", "canceled"] | None = None
+    summary: bool = False
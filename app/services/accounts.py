@@ -2,25 +2,31 @@ from __future__ import annotations
 
 import secrets
 from datetime import datetime, timedelta
+from uuid import uuid4
 
-from sqlalchemy import delete, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.emails import activation_email, password_reset_email
 from app.core.security import (
     create_access_token,
     create_refresh_token,
-    hash_password,
+    hash_password_async,
+    needs_rehash,
+    principal_claims,
     validate_password_complexity,
-    verify_password,
+    verify_password_async,
 )
-from app.db.models.accounts import (
-    ActivationToken,
-    PasswordResetToken,
-    RefreshToken,
-    User,
-    UserGroup,
-    UserGroupEnum,
+from app.core.security.jwt import decode_refresh_token
+from app.db.models.accounts import User, UserGroupEnum
+from app.repositories import (
+    ActivationTokenRepository,
+    PasswordResetTokenRepository,
+    UserRepository,
 )
+from app.services import outbox, permissions, token_revocation, user_state
+from app.services.refresh_tokens import get_refresh_token_store
 
 ACTIVATION_TTL_HOURS = 24
 PASSWORD_RESET_TTL_HOURS = 2
@@ -36,60 +42,58 @@ async def register_user(
     email: str,
     password: str,
 ) -> str:
-    result = await session.execute(select(User).where(User.email == email))
-    existing = result.scalar_one_or_none()
-    if existing:
-        raise ValueError("User already exists")
-
     validate_password_complexity(password)
 
-    group_result = await session.execute(
-        select(UserGroup).where(UserGroup.name == UserGroupEnum.USER)
-    )
-    group = group_result.scalar_one()
-
-    user = User(
-        email=email,
-        hashed_password=hash_password(password),
-        is_active=False,
-        group_id=group.id,
-    )
-    session.add(user)
-    await session.flush()
+    group_id = await permissions.group_id_for(session, UserGroupEnum.USER)
+    hashed_password = await hash_password_async(password)
 
+    now = _utcnow_naive()
     token_str = secrets.token_urlsafe(32)
-    expires_at = _utcnow_naive() + timedelta(hours=ACTIVATION_TTL_HOURS)
 
-    token = ActivationToken(
-        user_id=user.id,
+    # user + activation token in one INSERT; a duplicate email inserts nothing
+    user_id = await UserRepository.create_with_activation_token(
+        session,
+        email=email,
+        hashed_password=hashed_password,
+        group_id=group_id,
         token=token_str,
-        expires_at=expires_at,
+        token_expires_at=now + timedelta(hours=ACTIVATION_TTL_HOURS),
+        now=now,
     )
-    session.add(token)
+    if user_id is None:
+        raise ValueError("User already exists")
 
+    outbox.enqueue_email(session, activation_email(email, token_str))
     await session.commit()
     return token_str
 
 
 async def activate_user(session: AsyncSession, token_str: str) -> None:
-    result = await session.execute(
-        select(ActivationToken).where(ActivationToken.token == token_str)
-    )
-    token = result.scalar_one_or_none()
+    now = _utcnow_naive()
+    consumed = await ActivationTokenRepository.consume_and_activate(session, token_str, now)
 
-    if not token:
+    if consumed is None:
         raise ValueError("Invalid token")
 
-    if token.expires_at < _utcnow_naive():
+    if consumed.expires_at < now:
+        await session.commit()  # the expired token is deleted, the user stays inactive
         raise ValueError("Token expired")
 
-    user = token.user
-    user.is_active = True
-
-    await session.delete(token)
     await session.commit()
 
 
+def _issue_token_pair(user: User, group: UserGroupEnum) -> tuple[str, str, datetime]:
+    # sub is the user id; the principal claims let read-only endpoints skip loading the user
+    claims = principal_claims(group, user.is_active, user.token_version)
+    access_jti = uuid4().hex
+    access = create_access_token(subject=str(user.id), claims=claims, jti=access_jti)
+    # the refresh token names its access token, so logout can revoke both
+    refresh, refresh_exp = create_refresh_token(
+        subject=str(user.id), claims={"ver": user.token_version, "ajti": access_jti}
+    )
+    return access, refresh, refresh_exp.replace(tzinfo=None)
+
+
 async def login_user(session: AsyncSession, email: str, password: str) -> tuple[str, str]:
     result = await session.execute(select(User).where(User.email == email))
     user = result.scalar_one_or_none()
@@ -100,59 +104,67 @@ async def login_user(session: AsyncSession, email: str, password: str) -> tuple[
     if not user.is_active:
         raise ValueError("Account is not active")
 
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         raise ValueError("Invalid credentials")
 
-    access = create_access_token(subject=user.email)
-    refresh, refresh_exp = create_refresh_token(subject=user.email)
+    # the plaintext is only available here: upgrade hashes made with other parameters
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = await hash_password_async(password)
 
-    session.add(
-        RefreshToken(
-            user_id=user.id,
-            token=refresh,
-            expires_at=refresh_exp.replace(tzinfo=None),
-        )
-    )
+    group = await permissions.role_for_group(session, user.group_id)
+    access, refresh, refresh_exp = _issue_token_pair(user, group)
+
+    await get_refresh_token_store().add(session, user.id, refresh, refresh_exp)
     await session.commit()
     return access, refresh
 
 
 async def refresh_access_token(session: AsyncSession, refresh_token: str) -> tuple[str, str]:
-    result = await session.execute(select(RefreshToken).where(RefreshToken.token == refresh_token))
-    stored = result.scalar_one_or_none()
-    if stored is None:
+    try:
+        payload = decode_refresh_token(refresh_token)
+        user_id = int(payload["sub"])
+    except (KeyError, ValueError):
         raise ValueError("Invalid refresh token")
 
-    if stored.expires_at < _utcnow_naive():
-        await session.delete(stored)
+    user = await UserRepository.get_by_id(session, user_id)
+    if user is None:
+        raise ValueError("Invalid refresh token")
+
+    store = get_refresh_token_store()
+
+    # tokens issued before a password change / deactivation carry an older version
+    if payload.get("ver") != user.token_version:
+        await store.revoke(session, refresh_token)
         await session.commit()
-        raise ValueError("Refresh token expired")
+        raise ValueError("Refresh token revoked")
 
-    user = stored.user
     if not user.is_active:
         raise ValueError("Account is not active")
 
-    # Rotate refresh token
-    await session.delete(stored)
-    await session.flush()
+    group = await permissions.role_for_group(session, user.group_id)
+    new_access, new_refresh, new_refresh_exp = _issue_token_pair(user, group)
 
-    new_access = create_access_token(subject=user.email)
-    new_refresh, new_refresh_exp = create_refresh_token(subject=user.email)
-
-    session.add(
-        RefreshToken(
-            user_id=user.id,
-            token=new_refresh,
-            expires_at=new_refresh_exp.replace(tzinfo=None),
-        )
-    )
+    # Rotate refresh token: fails if it was already used, revoked or expired
+    if not await store.rotate(session, refresh_token, new_refresh, user.id, new_refresh_exp):
+        raise ValueError("Invalid refresh token")
     await session.commit()
 
     return new_access, new_refresh
 
 
 async def logout_user(session: AsyncSession, refresh_token: str) -> None:
-    await session.execute(delete(RefreshToken).where(RefreshToken.token == refresh_token))
+    await get_refresh_token_store().revoke(session, refresh_token)
+
+    try:
+        payload = decode_refresh_token(refresh_token)
+    except ValueError:
+        payload = {}
+    access_jti = payload.get("ajti")
+    if access_jti:
+        # the paired access token stays valid for at most its TTL from now
+        expires_at = _utcnow_naive() + timedelta(minutes=settings.JWT_ACCESS_TTL_MINUTES)
+        await token_revocation.revoke(session, str(access_jti), expires_at)
+
     await session.commit()
 
 
@@ -162,13 +174,26 @@ async def change_password(
     old_password: str,
     new_password: str,
 ) -> None:
-    if not verify_password(old_password, user.hashed_password):
+    if not await verify_password_async(old_password, user.hashed_password):
         raise ValueError("Old password is incorrect")
 
     validate_password_complexity(new_password)
 
-    user.hashed_password = hash_password(new_password)
+    user.hashed_password = await hash_password_async(new_password)
+    await UserRepository.bump_token_version(session, user.id)
+    await session.commit()
+    user_state.invalidate(user.id)
+
+
+async def change_user_group(session: AsyncSession, user_id: int, role: UserGroupEnum) -> None:
+    """
+    Tokens issued for the old group stop working at once in this worker, and in the others once
+    their cached user state expires.
+    """
+    group_id = await permissions.group_id_for(session, role)
+    await UserRepository.set_group(session, user_id, group_id)
     await session.commit()
+    user_state.invalidate(user_id)
 
 
 async def request_password_reset(session: AsyncSession, email: str) -> str | None:
@@ -177,26 +202,17 @@ async def request_password_reset(session: AsyncSession, email: str) -> str | Non
 
     Security note: endpoints should respond with a generic message either way.
     """
-    result = await session.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
-
-    if user is None or not user.is_active:
-        return None
-
-    # invalidate previous token (unique by user_id)
-    await session.execute(delete(PasswordResetToken).where(PasswordResetToken.user_id == user.id))
-    await session.flush()
-
     token_str = secrets.token_urlsafe(32)
     expires_at = _utcnow_naive() + timedelta(hours=PASSWORD_RESET_TTL_HOURS)
 
-    session.add(
-        PasswordResetToken(
-            user_id=user.id,
-            token=token_str,
-            expires_at=expires_at,
-        )
+    # replaces any previous token (unique by user_id)
+    user_id = await PasswordResetTokenRepository.replace_for_active_email(
+        session, email, token_str, expires_at
     )
+    if user_id is None:
+        return None
+
+    outbox.enqueue_email(session, password_reset_email(email, token_str))
     await session.commit()
     return token_str
 
@@ -204,23 +220,21 @@ async def request_password_reset(session: AsyncSession, email: str) -> str | Non
 async def confirm_password_reset(session: AsyncSession, token_str: str, new_password: str) -> None:
     validate_password_complexity(new_password)
 
-    result = await session.execute(
-        select(PasswordResetToken).where(PasswordResetToken.token == token_str)
+    # hashed up front so the token is consumed and the password set by a single UPDATE
+    hashed_password = await hash_password_async(new_password)
+    now = _utcnow_naive()
+    consumed = await PasswordResetTokenRepository.consume_and_set_password(
+        session, token_str, hashed_password, now
     )
-    token = result.scalar_one_or_none()
-    if token is None:
+    if consumed is None:
         raise ValueError("Invalid token")
 
-    if token.expires_at < _utcnow_naive():
-        await session.delete(token)
-        await session.commit()
+    if consumed.expires_at < now:
+        await session.commit()  # the expired token is deleted, the password untouched
         raise ValueError("Token expired")
 
-    user = token.user
-    user.hashed_password = hash_password(new_password)
-
     # revoke all refresh tokens (optional but правильний security)
-    await session.execute(delete(RefreshToken).where(RefreshToken.user_id == user.id))
+    await get_refresh_token_store().revoke_all(session, consumed.user_id)
 
-    await session.delete(token)
     await session.commit()
+    user_state.invalidate(consumed.user_id)
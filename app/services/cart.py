@@ -1,70 +1,168 @@
 from __future__ import annotations
 
+import time
+from dataclasses import dataclass
+from datetime import datetime
 from decimal import Decimal
+from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models.accounts import User
-from app.db.models.movies import Movie
-from app.repositories import CartItemRepository, CartRepository, MovieRepository
+from app.core.config import settings
+from app.services.cart_store import get_cart_store
 
 
-def calc_total(movies: list[Movie]) -> Decimal:
-    total = Decimal("0.00")
-    for m in movies:
-        total += Decimal(str(m.price))
-    return total
+@dataclass(frozen=True, slots=True)
+class CartSummary:
+    item_count: int
+    total_amount: Decimal
 
 
-async def get_cart_details(db: AsyncSession, user_id: int):
-    cart = await CartRepository.get_by_user_id(db, user_id)
-    if cart is None:
-        return None, []
+def _money(value) -> Decimal:
+    return Decimal(value).quantize(Decimal("0.01"))
 
-    movie_ids = [i.movie_id for i in cart.items]
-    if not movie_ids:
-        return cart, []
 
-    res = await db.execute(select(Movie).where(Movie.id.in_(movie_ids)))
-    movies = res.scalars().all()
-    return cart, movies
+# per-worker {user_id: (expires_at, summary)}, same shape as the user_state cache
+_summary_cache: dict[int, tuple[float, CartSummary]] = {}
 
 
-async def add_movie_to_cart(db: AsyncSession, user: User, movie_id: int) -> None:
-    movie = await MovieRepository.get_by_id(db, movie_id)
-    if movie is None:
-        raise ValueError("Movie not found")
+def _evict_summaries(now: float) -> None:
+    for user_id in [uid for uid, (expires, _) in _summary_cache.items() if expires <= now]:
+        del _summary_cache[user_id]
+    while len(_summary_cache) >= settings.CART_SUMMARY_CACHE_MAX_ENTRIES:
+        del _summary_cache[next(iter(_summary_cache))]
 
-    cart = await CartRepository.get_by_user_id(db, user.id)
-    if cart is None:
-        cart = await CartRepository.create_for_user(db, user.id)
 
-    existing = await CartItemRepository.get_one(db, cart.id, movie_id)
-    if existing is not None:
-        raise ValueError("Movie already in cart")
+def _cache_summary(user_id: int, summary: CartSummary) -> None:
+    if settings.CART_SUMMARY_CACHE_TTL_SECONDS <= 0:
+        return
+    now = time.monotonic()
+    if len(_summary_cache) >= settings.CART_SUMMARY_CACHE_MAX_ENTRIES:
+        _evict_summaries(now)
+    _summary_cache[user_id] = (now + settings.CART_SUMMARY_CACHE_TTL_SECONDS, summary)
 
-    await CartItemRepository.create(db, cart_id=cart.id, movie_id=movie_id)
-    await db.flush()
 
+def invalidate_summary(user_id: int) -> None:
+    """
+    Drop the cached summary; call after any change to the user's cart.
+    """
+    _summary_cache.pop(user_id, None)
 
-async def remove_movie_from_cart(db: AsyncSession, user: User, movie_id: int) -> None:
-    cart = await CartRepository.get_by_user_id(db, user.id)
-    if cart is None:
-        raise ValueError("Cart is empty")
 
-    existing = await CartItemRepository.get_one(db, cart.id, movie_id)
-    if existing is None:
-        raise ValueError("Movie not in cart")
+def clear_summary_cache() -> None:
+    _summary_cache.clear()
 
-    await db.delete(existing)
-    await db.flush()
 
+async def get_cart_details(db: AsyncSession, user_id: int) -> tuple[list[Row[Any]], Decimal]:
+    """
+    Cart items joined to their movies plus the total, in one statement.
+    """
+    rows = await get_cart_store().details(db, user_id)
+    total = _money(rows[0].total_amount if rows else 0)
+    _cache_summary(user_id, CartSummary(item_count=len(rows), total_amount=total))
+    return rows, total
 
-async def clear_cart(db: AsyncSession, user: User) -> None:
-    cart = await CartRepository.get_by_user_id(db, user.id)
-    if cart is None:
-        return
 
-    await CartItemRepository.delete_for_cart(db, cart.id)
-    await db.flush()
+async def get_cart_summary(db: AsyncSession, user_id: int) -> CartSummary:
+    cached = _summary_cache.get(user_id)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    item_count, total = await get_cart_store().summary(db, user_id)
+    summary = CartSummary(item_count=item_count, total_amount=_money(total))
+    _cache_summary(user_id, summary)
+    return summary
+
+
+async def get_movie_flags(
+    db: AsyncSession, user_id: int, movie_ids: list[int]
+) -> tuple[set[int], set[int]]:
+    """
+    (in cart, owned) among `movie_ids`, for a whole catalog page at once.
+    """
+    return await get_cart_store().flags(db, user_id, movie_ids)
+
+
+def _utcnow_naive() -> datetime:
+    return datetime.utcnow()
+
+
+async def add_movie_to_cart(db: AsyncSession, user_id: int, movie_id: int) -> None:
+    # one round trip: movie check, cart upsert and item insert; the unique
+    # (cart_id, movie_id) constraint decides duplicates, also under concurrency
+    outcome = (await get_cart_store().add(db, user_id, [movie_id], _utcnow_naive())).get(movie_id)
+    if outcome is None:
+        raise ValueError("Movie not found")
+    if outcome == "already_owned":
+        raise ValueError("Movie already purchased")
+    if outcome == "already_in_cart":
+        raise ValueError("Movie already in cart")
+    await db.commit()
+    invalidate_summary(user_id)
+
+
+async def remove_movie_from_cart(db: AsyncSession, user_id: int, movie_id: int) -> None:
+    store = get_cart_store()
+    removed = await store.remove(db, user_id, [movie_id])
+    if not removed:
+        # only the failure path pays for telling the two errors apart
+        if not await store.exists(db, user_id):
+            raise ValueError("Cart is empty")
+        raise ValueError("Movie not in cart")
+    await db.commit()
+    invalidate_summary(user_id)
+
+
+async def apply_batch(
+    db: AsyncSession, user_id: int, operations: list[tuple[str, int]]
+) -> tuple[dict[int, str], Decimal]:
+    """
+    Apply ("add" | "remove", movie_id) operations in one transaction.
+
+    Each movie may appear once. Returns the outcome per movie id - "added", "already_in_cart",
+    "already_owned", "not_found", "removed" or "not_in_cart" - and the new cart total. At most
+    three statements regardless of the batch size.
+    """
+    to_add = [mid for op, mid in operations if op == "add"]
+    to_remove = [mid for op, mid in operations if op == "remove"]
+    outcomes: dict[int, str] = {}
+    store = get_cart_store()
+
+    if to_remove:
+        removed = await store.remove(db, user_id, to_remove)
+        for mid in to_remove:
+            outcomes[mid] = "removed" if mid in removed else "not_in_cart"
+
+    if to_add:
+        found = await store.add(db, user_id, to_add, _utcnow_naive())
+        for mid in to_add:
+            outcomes[mid] = found.get(mid, "not_found")
+
+    item_count, total = await store.summary(db, user_id)
+    await db.commit()
+    summary = CartSummary(item_count=item_count, total_amount=_money(total))
+    _cache_summary(user_id, summary)
+    return outcomes, summary.total_amount
+
+
+async def clear_cart(db: AsyncSession, user_id: int) -> None:
+    await get_cart_store().clear(db, user_id)
+    await db.commit()
+    invalidate_summary(user_id)
+
+
+async def flush_cart(db: AsyncSession, user_id: int) -> None:
+    """
+    Write the user's cart through to `carts` / `cart_items` in the caller's transaction
+    (no-op for the "db" backend). Order creation calls this before reading the cart.
+    """
+    await get_cart_store().flush(db, user_id)
+
+
+async def discard_items(user_id: int, movie_ids: list[int]) -> None:
+    """
+    Drop checked-out movies from the cart store once the order is committed.
+    """
+    await get_cart_store().discard(user_id, movie_ids)
+    invalidate_summary(user_id)
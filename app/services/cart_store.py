@@ -0,0 +1,469 @@
+"""
+Cart storage.
+
+Two backends (CART_BACKEND):
+
+- "db" (default): `carts` / `cart_items` rows; every add or remove is one Postgres statement.
+- "redis": each user's cart is a Redis hash (movie id -> added_at). A mutation is one Lua call
+  that also bumps a per-user version and puts the user into a dirty set. Dirty carts are written
+  to Postgres in the background by the `flush_carts` beat task (write-behind), and order creation
+  flushes the user's cart synchronously before reading it. A cart that is not in Redis yet is
+  loaded from Postgres on first use; flushed carts expire from Redis after
+  CART_STORE_IDLE_TTL_SECONDS and are loaded again when needed.
+
+Flushes of one user's cart serialize on the `carts` row lock, and a user leaves the dirty set
+only if nothing changed since the flushed snapshot. Changes Redis loses before they are flushed
+are lost.
+"""
+from __future__ import annotations
+
+import logging
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable, Sequence
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Protocol, TypeVar
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.repositories import (
+    CartItemRepository,
+    CartRepository,
+    MovieRepository,
+    UserLibraryRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+CartItems = list[tuple[int, datetime]]  # (movie_id, added_at), oldest first
+
+T = TypeVar("T")
+
+
+class CartStore(Protocol):
+    async def add(
+        self, db: AsyncSession, user_id: int, movie_ids: Sequence[int], now: datetime
+    ) -> dict[int, str]: ...
+
+    async def remove(
+        self, db: AsyncSession, user_id: int, movie_ids: Sequence[int]
+    ) -> set[int]: ...
+
+    async def exists(self, db: AsyncSession, user_id: int) -> bool: ...
+
+    async def clear(self, db: AsyncSession, user_id: int) -> None: ...
+
+    async def details(self, db: AsyncSession, user_id: int) -> list[Row[Any]]: ...
+
+    async def summary(self, db: AsyncSession, user_id: int) -> tuple[int, Decimal]: ...
+
+    async def flags(
+        self, db: AsyncSession, user_id: int, movie_ids: Sequence[int]
+    ) -> tuple[set[int], set[int]]: ...
+
+    async def flush(self, db: AsyncSession, user_id: int) -> int | None: ...
+
+    async def discard(self, user_id: int, movie_ids: Sequence[int]) -> None: ...
+
+    async def flush_dirty(
+        self, session_factory: async_sessionmaker[AsyncSession], limit: int
+    ) -> int: ...
+
+
+class SqlCartStore:
+    async def add(
+        self, db: AsyncSession, user_id: int, movie_ids: Sequence[int], now: datetime
+    ) -> dict[int, str]:
+        return await CartItemRepository.add_many_for_user(db, user_id, movie_ids, now)
+
+    async def remove(self, db: AsyncSession, user_id: int, movie_ids: Sequence[int]) -> set[int]:
+        return await CartItemRepository.remove_many_for_user(db, user_id, movie_ids)
+
+    async def exists(self, db: AsyncSession, user_id: int) -> bool:
+        return await CartRepository.exists_for_user(db, user_id)
+
+    async def clear(self, db: AsyncSession, user_id: int) -> None:
+        await CartItemRepository.clear_for_user(db, user_id)
+
+    async def details(self, db: AsyncSession, user_id: int) -> list[Row[Any]]:
+        return await CartItemRepository.list_details_for_user(db, user_id)
+
+    async def summary(self, db: AsyncSession, user_id: int) -> tuple[int, Decimal]:
+        row = await CartItemRepository.summary_for_user(db, user_id)
+        return int(row.item_count), row.total_amount
+
+    async def flags(
+        self, db: AsyncSession, user_id: int, movie_ids: Sequence[int]
+    ) -> tuple[set[int], set[int]]:
+        return await CartItemRepository.flags_for_user(db, user_id, movie_ids)
+
+    async def flush(self, db: AsyncSession, user_id: int) -> int | None:
+        return None  # Postgres is the store
+
+    async def discard(self, user_id: int, movie_ids: Sequence[int]) -> None:
+        return None  # order creation deletes the rows in its own transaction
+
+    async def flush_dirty(
+        self, session_factory: async_sessionmaker[AsyncSession], limit: int
+    ) -> int:
+        return 0
+
+
+class _KeyValueCartStore(ABC):
+    """
+    Carts held outside Postgres. Subclasses provide the primitives below; those that need the
+    user's cart return None while it has not been loaded into the store.
+    """
+
+    @abstractmethod
+    async def _seed(self, user_id: int, items: CartItems) -> None: ...
+
+    @abstractmethod
+    async def _add(
+        self, user_id: int, movie_ids: list[int], added_at: datetime
+    ) -> list[int] | None: ...
+
+    @abstractmethod
+    async def _remove(self, user_id: int, movie_ids: Sequence[int]) -> list[int] | None: ...
+
+    @abstractmethod
+    async def _clear(self, user_id: int) -> None: ...
+
+    @abstractmethod
+    async def _snapshot(self, user_id: int) -> tuple[CartItems, int] | None: ...
+
+    @abstractmethod
+    async def _mark_clean(self, user_id: int, version: int | None) -> None: ...
+
+    @abstractmethod
+    async def _dirty_users(self, limit: int) -> list[int]: ...
+
+    async def _items(self, user_id: int) -> CartItems | None:
+        snapshot = await self._snapshot(user_id)
+        return None if snapshot is None else snapshot[0]
+
+    async def _loaded(
+        self, db: AsyncSession, user_id: int, op: Callable[[], Awaitable[T | None]]
+    ) -> T:
+        result = await op()
+        if result is None:
+            await self._seed(user_id, await CartItemRepository.list_items_for_user(db, user_id))
+            result = await op()
+        return result  # type: ignore[return-value]
+
+    async def add(
+        self, db: AsyncSession, user_id: int, movie_ids: Sequence[int], now: datetime
+    ) -> dict[int, str]:
+        found = await MovieRepository.existing_ids(db, movie_ids)
+        if not found:
+            return {}
+        owned = await UserLibraryRepository.owned_ids(db, user_id, list(found))
+        addable = sorted(found - owned)
+        added: set[int] = set()
+        if addable:
+            added = set(await self._loaded(db, user_id, lambda: self._add(user_id, addable, now)))
+        return {
+            movie_id: "already_owned" if movie_id in owned
+            else "added" if movie_id in added
+            else "already_in_cart"
+            for movie_id in found
+        }
+
+    async def remove(self, db: AsyncSession, user_id: int, movie_ids: Sequence[int]) -> set[int]:
+        return set(await self._loaded(db, user_id, lambda: self._remove(user_id, movie_ids)))
+
+    async def exists(self, db: AsyncSession, user_id: int) -> bool:
+        return bool(await self._loaded(db, user_id, lambda: self._items(user_id)))
+
+    async def clear(self, db: AsyncSession, user_id: int) -> None:
+        await self._clear(user_id)
+
+    async def details(self, db: AsyncSession, user_id: int) -> list[Row[Any]]:
+        items = await self._loaded(db, user_id, lambda: self._items(user_id))
+        if not items:
+            return []
+        return await CartItemRepository.list_details_for_items(db, items)
+
+    async def summary(self, db: AsyncSession, user_id: int) -> tuple[int, Decimal]:
+        rows = await self.details(db, user_id)
+        return len(rows), rows[0].total_amount if rows else Decimal("0")
+
+    async def flags(
+        self, db: AsyncSession, user_id: int, movie_ids: Sequence[int]
+    ) -> tuple[set[int], set[int]]:
+        if not movie_ids:
+            return set(), set()
+        items = await self._loaded(db, user_id, lambda: self._items(user_id))
+        in_cart = {movie_id for movie_id, _ in items}.intersection(movie_ids)
+        return in_cart, await UserLibraryRepository.owned_ids(db, user_id, movie_ids)
+
+    async def flush(self, db: AsyncSession, user_id: int) -> int | None:
+        """
+        Write the user's cart to Postgres in the caller's transaction; returns the flushed
+        version (None if the store does not hold the cart, i.e. Postgres is current).
+        """
+        # taken before the snapshot: concurrent flushes of one cart commit in snapshot order
+        cart_id = await CartRepository.lock_for_user(db, user_id)
+        snapshot = await self._snapshot(user_id)
+        if snapshot is None:
+            return None
+        items, version = snapshot
+        await CartItemRepository.replace_items(db, cart_id, items)
+        return version
+
+    async def discard(self, user_id: int, movie_ids: Sequence[int]) -> None:
+        if movie_ids:
+            await self._remove(user_id, movie_ids)
+
+    async def flush_dirty(
+        self, session_factory: async_sessionmaker[AsyncSession], limit: int
+    ) -> int:
+        flushed = 0
+        for user_id in await self._dirty_users(limit):
+            try:
+                async with session_factory() as session:
+                    version = await self.flush(session, user_id)
+                    await session.commit()
+            except Exception:
+                # stays dirty; retried on the next run
+                logger.exception("Cart flush failed for user %s", user_id)
+                continue
+            await self._mark_clean(user_id, version)
+            flushed += 1
+        return flushed
+
+
+class InMemoryCartStore(_KeyValueCartStore):
+    """
+    Per-process store with the semantics of the Redis one; for tests and single-process setups
+    (other workers would not see these carts).
+    """
+
+    def __init__(self) -> None:
+        self._carts: dict[int, dict[int, datetime]] = {}
+        self._versions: dict[int, int] = {}
+        self._dirty: set[int] = set()
+
+    def _touch(self, user_id: int) -> None:
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        self._dirty.add(user_id)
+
+    async def _seed(self, user_id: int, items: CartItems) -> None:
+        if user_id not in self._versions:
+            self._carts[user_id] = dict(items)
+            self._versions[user_id] = 0
+
+    async def _add(
+        self, user_id: int, movie_ids: list[int], added_at: datetime
+    ) -> list[int] | None:
+        if user_id not in self._versions:
+            return None
+        cart = self._carts.setdefault(user_id, {})
+        added = [movie_id for movie_id in movie_ids if movie_id not in cart]
+        for movie_id in added:
+            cart[movie_id] = added_at
+        if added:
+            self._touch(user_id)
+        return added
+
+    async def _remove(self, user_id: int, movie_ids: Sequence[int]) -> list[int] | None:
+        if user_id not in self._versions:
+            return None
+        cart = self._carts.get(user_id, {})
+        removed = [movie_id for movie_id in movie_ids if cart.pop(movie_id, None) is not None]
+        if removed:
+            self._touch(user_id)
+        return removed
+
+    async def _clear(self, user_id: int) -> None:
+        self._carts[user_id] = {}
+        self._touch(user_id)
+
+    async def _snapshot(self, user_id: int) -> tuple[CartItems, int] | None:
+        if user_id not in self._versions:
+            return None
+        items = sorted(self._carts.get(user_id, {}).items(), key=lambda kv: (kv[1], kv[0]))
+        return items, self._versions[user_id]
+
+    async def _mark_clean(self, user_id: int, version: int | None) -> None:
+        if self._versions.get(user_id) == version:
+            self._dirty.discard(user_id)
+
+    async def _dirty_users(self, limit: int) -> list[int]:
+        return list(self._dirty)[:limit]
+
+
+# KEYS: items, version, dirty set | ARGV: user id, added_at, movie ids...
+_ADD_LUA = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    return false
+end
+local added = {}
+for i = 3, #ARGV do
+    if redis.call('HSETNX', KEYS[1], ARGV[i], ARGV[2]) == 1 then
+        added[#added + 1] = ARGV[i]
+    end
+end
+if #added > 0 then
+    redis.call('INCR', KEYS[2])
+    redis.call('PERSIST', KEYS[1])
+    redis.call('PERSIST', KEYS[2])
+    redis.call('SADD', KEYS[3], ARGV[1])
+end
+return added
+"""
+
+# KEYS: items, version, dirty set | ARGV: user id, movie ids...
+_REMOVE_LUA = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    return false
+end
+local removed = {}
+for i = 2, #ARGV do
+    if redis.call('HDEL', KEYS[1], ARGV[i]) == 1 then
+        removed[#removed + 1] = ARGV[i]
+    end
+end
+if #removed > 0 then
+    redis.call('INCR', KEYS[2])
+    redis.call('PERSIST', KEYS[2])
+    redis.call('SADD', KEYS[3], ARGV[1])
+end
+return removed
+"""
+
+# KEYS: items, version, dirty set | ARGV: user id
+_CLEAR_LUA = """
+redis.call('DEL', KEYS[1])
+redis.call('INCR', KEYS[2])
+redis.call('PERSIST', KEYS[2])
+redis.call('SADD', KEYS[3], ARGV[1])
+return 1
+"""
+
+# KEYS: items, version | ARGV: idle ttl, movie id / added_at pairs...
+_SEED_LUA = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return 0
+end
+if #ARGV > 1 then
+    redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+redis.call('SET', KEYS[2], 0, 'EX', ARGV[1])
+return 1
+"""
+
+# KEYS: items, version
+_SNAPSHOT_LUA = """
+local version = redis.call('GET', KEYS[2])
+if not version then
+    return false
+end
+return {version, redis.call('HGETALL', KEYS[1])}
+"""
+
+# KEYS: items, version, dirty set | ARGV: user id, flushed version ('' if none), idle ttl
+_MARK_CLEAN_LUA = """
+local current = redis.call('GET', KEYS[2])
+if (current or '') ~= ARGV[2] then
+    return 0
+end
+redis.call('SREM', KEYS[3], ARGV[1])
+if current then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+end
+return 1
+"""
+
+
+class RedisCartStore(_KeyValueCartStore):
+    ITEMS_PREFIX = "cart:items:"
+    VERSION_PREFIX = "cart:version:"
+    DIRTY_KEY = "cart:dirty"
+
+    def __init__(self, client: Any, idle_ttl_seconds: int | None = None) -> None:
+        self.client = client
+        self.idle_ttl = idle_ttl_seconds or settings.CART_STORE_IDLE_TTL_SECONDS
+        self._add_script = client.register_script(_ADD_LUA)
+        self._remove_script = client.register_script(_REMOVE_LUA)
+        self._clear_script = client.register_script(_CLEAR_LUA)
+        self._seed_script = client.register_script(_SEED_LUA)
+        self._snapshot_script = client.register_script(_SNAPSHOT_LUA)
+        self._mark_clean_script = client.register_script(_MARK_CLEAN_LUA)
+
+    @classmethod
+    def from_url(cls, url: str) -> RedisCartStore:
+        from redis.asyncio import Redis
+
+        return cls(Redis.from_url(url, decode_responses=True))
+
+    def _keys(self, user_id: int) -> list[str]:
+        return [f"{self.ITEMS_PREFIX}{user_id}", f"{self.VERSION_PREFIX}{user_id}"]
+
+    async def _seed(self, user_id: int, items: CartItems) -> None:
+        pairs = [v for movie_id, added_at in items for v in (movie_id, added_at.isoformat())]
+        await self._seed_script(keys=self._keys(user_id), args=[self.idle_ttl, *pairs])
+
+    async def _add(
+        self, user_id: int, movie_ids: list[int], added_at: datetime
+    ) -> list[int] | None:
+        added = await self._add_script(
+            keys=[*self._keys(user_id), self.DIRTY_KEY],
+            args=[user_id, added_at.isoformat(), *movie_ids],
+        )
+        return None if added is None else [int(movie_id) for movie_id in added]
+
+    async def _remove(self, user_id: int, movie_ids: Sequence[int]) -> list[int] | None:
+        removed = await self._remove_script(
+            keys=[*self._keys(user_id), self.DIRTY_KEY], args=[user_id, *movie_ids]
+        )
+        return None if removed is None else [int(movie_id) for movie_id in removed]
+
+    async def _clear(self, user_id: int) -> None:
+        await self._clear_script(keys=[*self._keys(user_id), self.DIRTY_KEY], args=[user_id])
+
+    async def _snapshot(self, user_id: int) -> tuple[CartItems, int] | None:
+        res = await self._snapshot_script(keys=self._keys(user_id))
+        if res is None:
+            return None
+        version, flat = res
+        items = [
+            (int(movie_id), datetime.fromisoformat(added_at))
+            for movie_id, added_at in zip(flat[::2], flat[1::2], strict=True)
+        ]
+        items.sort(key=lambda item: (item[1], item[0]))
+        return items, int(version)
+
+    async def _mark_clean(self, user_id: int, version: int | None) -> None:
+        await self._mark_clean_script(
+            keys=[*self._keys(user_id), self.DIRTY_KEY],
+            args=[user_id, "" if version is None else version, self.idle_ttl],
+        )
+
+    async def _dirty_users(self, limit: int) -> list[int]:
+        members = await self.client.srandmember(self.DIRTY_KEY, limit)
+        return [int(user_id) for user_id in members]
+
+
+_store: CartStore | None = None
+
+
+def get_cart_store() -> CartStore:
+    global _store
+
+    if _store is None:
+        if settings.CART_BACKEND == "redis":
+            _store = RedisCartStore.from_url(settings.REDIS_URL)
+        else:
+            _store = SqlCartStore()
+    return _store
+
+
+def set_cart_store(store: CartStore | None) -> None:
+    global _store
+
+    _store = store
@@ -0,0 +1,132 @@
+"""
+Catalog change signal shared by the in-process catalog engines (snapshot, search index).
+
+Writers call `publish_*` inside their transaction; Postgres NOTIFY is transactional, so the signal
+is only delivered after commit (and never for rolled back writes). Each worker runs one LISTEN
+connection and fans batches of change keys out to the subscribed handlers.
+
+Keys look like "movie:<id>", "star:<id>" or "director:<id>".
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CHANNEL = "catalog_changes"
+
+ChangeHandler = Callable[[set[str]], Awaitable[None]]
+
+_handlers: list[ChangeHandler] = []
+_listener: asyncio.Task[None] | None = None
+
+
+def _signals_enabled() -> bool:
+    return settings.CATALOG_SNAPSHOT_ENABLED or settings.CATALOG_SEARCH_ENABLED
+
+
+async def _publish(db: AsyncSession, key: str) -> None:
+    if not _signals_enabled():
+        return
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": CATALOG_CHANNEL, "payload": key},
+    )
+
+
+async def publish_movie_change(db: AsyncSession, movie_id: int) -> None:
+    await _publish(db, f"movie:{movie_id}")
+
+
+async def publish_person_change(db: AsyncSession, kind: str, person_id: int) -> None:
+    """
+    `kind` is "star" or "director".
+    """
+    await _publish(db, f"{kind}:{person_id}")
+
+
+def ids_for(kind: str, keys: set[str]) -> set[int]:
+    """
+    Extract the ids of one kind from a batch of change keys.
+    """
+    prefix = f"{kind}:"
+    ids: set[int] = set()
+    for key in keys:
+        if key.startswith(prefix):
+            try:
+                ids.add(int(key[len(prefix) :]))
+            except ValueError:
+                continue
+    return ids
+
+
+def subscribe(handler: ChangeHandler) -> None:
+    _handlers.append(handler)
+
+
+def unsubscribe(handler: ChangeHandler) -> None:
+    if handler in _handlers:
+        _handlers.remove(handler)
+
+
+async def _listen() -> None:
+    pending: set[str] = set()
+    wake = asyncio.Event()
+
+    def _on_notify(_conn: Any, _pid: int, _channel: str, payload: str) -> None:
+        pending.add(payload)
+        wake.set()
+
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.add_listener(CATALOG_CHANNEL, _on_notify)
+
+        while True:
+            await wake.wait()
+            wake.clear()
+            batch, pending = pending, set()
+
+            for handler in list(_handlers):
+                try:
+                    await handler(batch)
+                except Exception:
+                    logger.exception("Catalog change handler %r failed", handler)
+
+
+async def _run_listener() -> None:
+    while True:
+        try:
+            await _listen()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Catalog change listener failed, reconnecting")
+            await asyncio.sleep(5)
+
+
+def start() -> None:
+    global _listener
+
+    if _listener is None:
+        _listener = asyncio.create_task(_run_listener())
+
+
+async def stop() -> None:
+    global _listener
+
+    if _listener is not None:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+        _listener = None
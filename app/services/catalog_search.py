@@ -0,0 +1,393 @@
+"""
+In-process catalog search (CATALOG_SEARCH_ENABLED).
+
+Pure-Python inverted index over movie names plus star and director names, with BM25F-style scoring
+(title terms weigh more than credits) and a prefix trie for autocomplete. Loaded from the database
+at startup and kept current from the catalog change signal (`app.services.catalog_events`).
+
+Query semantics: every query token must match; the last token is treated as a prefix so results
+follow the user while typing. When the index is not loaded, `q` falls back to the Postgres ILIKE.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import re
+import unicodedata
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.repositories import DirectorRepository, MovieRepository, StarRepository
+from app.services import catalog_events
+
+logger = logging.getLogger(__name__)
+
+FIELD_WEIGHTS = {"name": 3.0, "star": 1.0, "director": 1.0}
+PERSON_KINDS = ("star", "director")
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PREFIX_EXPANSIONS = 50
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Casefold, strip accents and split on non-word characters.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _TOKEN_RE.findall(stripped)
+
+
+class _TrieNode:
+    __slots__ = ("children", "terminal")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        self.terminal = False
+
+
+class PrefixTrie:
+    """
+    Character trie over indexed terms. Terms are never removed; callers skip terms whose postings
+    became empty (the periodic full reload drops them).
+    """
+
+    def __init__(self) -> None:
+        self.root = _TrieNode()
+
+    def add(self, term: str) -> None:
+        node = self.root
+        for ch in term:
+            node = node.children.setdefault(ch, _TrieNode())
+        node.terminal = True
+
+    def complete(self, prefix: str, limit: int) -> list[str]:
+        node = self.root
+        for ch in prefix:
+            child = node.children.get(ch)
+            if child is None:
+                return []
+            node = child
+
+        found: list[str] = []
+        stack = [(node, prefix)]
+        while stack and len(found) < limit:
+            node, term = stack.pop()
+            if node.terminal:
+                found.append(term)
+            stack.extend((child, term + ch) for ch, child in node.children.items())
+        return found
+
+
+@dataclass(slots=True)
+class _MovieDoc:
+    name: str
+    star_ids: tuple[int, ...] = ()
+    director_ids: tuple[int, ...] = ()
+    terms: Counter[str] = field(default_factory=Counter)
+    length: float = 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class Suggestion:
+    kind: str
+    id: int
+    name: str
+
+
+class SearchIndex:
+    def __init__(self) -> None:
+        self.movies: dict[int, _MovieDoc] = {}
+        self.people: dict[str, dict[int, str]] = {kind: {} for kind in PERSON_KINDS}
+        # person -> movies crediting them, so a rename re-indexes exactly those movies
+        self.credits: dict[str, dict[int, set[int]]] = {kind: {} for kind in PERSON_KINDS}
+
+        self.postings: dict[str, dict[int, float]] = {}
+        self.person_postings: dict[str, set[tuple[str, int]]] = {}
+        self.trie = PrefixTrie()
+        self._total_len = 0.0
+
+    # -------------------------
+    # Writes
+    # -------------------------
+
+    def _index_terms(self, terms: Iterable[str]) -> None:
+        for term in terms:
+            if term not in self.postings and term not in self.person_postings:
+                self.trie.add(term)
+
+    def _movie_terms(self, doc: _MovieDoc) -> Counter[str]:
+        weighted: Counter[str] = Counter()
+        for token in tokenize(doc.name):
+            weighted[token] += FIELD_WEIGHTS["name"]
+        for kind, ids in (("star", doc.star_ids), ("director", doc.director_ids)):
+            for person_id in ids:
+                for token in tokenize(self.people[kind].get(person_id, "")):
+                    weighted[token] += FIELD_WEIGHTS[kind]
+        return weighted
+
+    def upsert_movie(
+        self, movie_id: int, name: str, star_ids: Iterable[int], director_ids: Iterable[int]
+    ) -> None:
+        self.remove_movie(movie_id)
+
+        doc = _MovieDoc(name=name, star_ids=tuple(star_ids), director_ids=tuple(director_ids))
+        doc.terms = self._movie_terms(doc)
+        doc.length = sum(doc.terms.values())
+        self._index_terms(doc.terms)
+        for term, tf in doc.terms.items():
+            self.postings.setdefault(term, {})[movie_id] = tf
+
+        for kind, ids in (("star", doc.star_ids), ("director", doc.director_ids)):
+            for person_id in ids:
+                self.credits[kind].setdefault(person_id, set()).add(movie_id)
+
+        self.movies[movie_id] = doc
+        self._total_len += doc.length
+
+    def remove_movie(self, movie_id: int) -> None:
+        doc = self.movies.pop(movie_id, None)
+        if doc is None:
+            return
+
+        for term in doc.terms:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(movie_id, None)
+                if not posting:
+                    del self.postings[term]
+
+        for kind, ids in (("star", doc.star_ids), ("director", doc.director_ids)):
+            for person_id in ids:
+                self.credits[kind].get(person_id, set()).discard(movie_id)
+
+        self._total_len -= doc.length
+
+    def upsert_person(self, kind: str, person_id: int, name: str) -> None:
+        old = self.people[kind].get(person_id)
+        if old is not None:
+            for term in set(tokenize(old)):
+                entries = self.person_postings.get(term)
+                if entries is not None:
+                    entries.discard((kind, person_id))
+                    if not entries:
+                        del self.person_postings[term]
+
+        self.people[kind][person_id] = name
+        terms = set(tokenize(name))
+        self._index_terms(terms)
+        for term in terms:
+            self.person_postings.setdefault(term, set()).add((kind, person_id))
+
+        if old is not None and old != name:
+            for movie_id in list(self.credits[kind].get(person_id, ())):
+                doc = self.movies[movie_id]
+                self.upsert_movie(movie_id, doc.name, doc.star_ids, doc.director_ids)
+
+    # -------------------------
+    # Reads
+    # -------------------------
+
+    def _expand(self, token: str, prefix: bool) -> list[str]:
+        if not prefix:
+            return [token] if token in self.postings or token in self.person_postings else []
+        # most frequent completions first, bounded so one-letter prefixes stay cheap
+        candidates = self.trie.complete(token, MAX_PREFIX_EXPANSIONS * 20)
+        candidates = [t for t in candidates if t in self.postings or t in self.person_postings]
+        candidates.sort(key=lambda t: -len(self.postings.get(t, ())))
+        return candidates[:MAX_PREFIX_EXPANSIONS]
+
+    def _bm25(self, term: str) -> dict[int, float]:
+        posting = self.postings.get(term)
+        if not posting:
+            return {}
+
+        n = len(self.movies)
+        avg_len = self._total_len / n if n else 1.0
+        idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+
+        scores: dict[int, float] = {}
+        for movie_id, tf in posting.items():
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.movies[movie_id].length / avg_len)
+            scores[movie_id] = idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, q: str) -> dict[int, float]:
+        """
+        Score every movie matching all query tokens (last token as prefix).
+        """
+        tokens = tokenize(q)
+        if not tokens:
+            return {}
+
+        result: dict[int, float] | None = None
+        for position, token in enumerate(tokens):
+            token_scores: dict[int, float] = {}
+            for term in self._expand(token, prefix=position == len(tokens) - 1):
+                for movie_id, score in self._bm25(term).items():
+                    token_scores[movie_id] = token_scores.get(movie_id, 0.0) + score
+
+            if result is None:
+                result = token_scores
+            else:
+                result = {m: s + token_scores[m] for m, s in result.items() if m in token_scores}
+            if not result:
+                return {}
+
+        return result or {}
+
+    def match(self, q: str) -> set[int]:
+        return set(self.search(q))
+
+    def suggest(self, q: str, limit: int) -> dict[str, list[Suggestion]]:
+        """
+        Autocomplete: best-scoring movies plus stars/directors whose names match the query.
+        """
+        ranked = sorted(self.search(q).items(), key=lambda item: (-item[1], item[0]))[:limit]
+        suggestions: dict[str, list[Suggestion]] = {
+            "movie": [Suggestion("movie", m, self.movies[m].name) for m, _ in ranked],
+        }
+
+        tokens = tokenize(q)
+        people: set[tuple[str, int]] | None = None
+        for position, token in enumerate(tokens):
+            matched: set[tuple[str, int]] = set()
+            for term in self._expand(token, prefix=position == len(tokens) - 1):
+                matched |= self.person_postings.get(term, set())
+            people = matched if people is None else people & matched
+            if not people:
+                break
+
+        for kind in PERSON_KINDS:
+            ids = [pid for k, pid in (people or ()) if k == kind]
+            # most credited first
+            ids.sort(key=lambda pid: (-len(self.credits[kind].get(pid, ())), self.people[kind][pid]))
+            suggestions[kind] = [Suggestion(kind, pid, self.people[kind][pid]) for pid in ids[:limit]]
+
+        return suggestions
+
+
+# -------------------------
+# Loading / change signal
+# -------------------------
+
+_index: SearchIndex | None = None
+_reloader: asyncio.Task[None] | None = None
+
+
+def get_index() -> SearchIndex | None:
+    """
+    Current index, or None when search is disabled or not loaded yet (callers use SQL then).
+    """
+    return _index
+
+
+def _credits_by_movie(pairs: dict[str, list[tuple[int, int]]]) -> dict[int, dict[str, list[int]]]:
+    credits: dict[int, dict[str, list[int]]] = {}
+    for kind in PERSON_KINDS:
+        for movie_id, person_id in pairs.get(kind, []):
+            credits.setdefault(movie_id, {}).setdefault(kind, []).append(person_id)
+    return credits
+
+
+async def load_index(db: AsyncSession) -> SearchIndex:
+    index = SearchIndex()
+
+    for star in await StarRepository.list_all(db):
+        index.upsert_person("star", star.id, star.name)
+    for director in await DirectorRepository.list_all(db):
+        index.upsert_person("director", director.id, director.name)
+
+    rows = await MovieRepository.list_snapshot_rows(db)
+    credits = _credits_by_movie(await MovieRepository.list_relation_pairs(db))
+    for row in rows:
+        movie_credits = credits.get(row.id, {})
+        index.upsert_movie(
+            row.id, row.name, movie_credits.get("star", []), movie_credits.get("director", [])
+        )
+
+    return index
+
+
+async def apply_changes(db: AsyncSession, index: SearchIndex, keys: set[str]) -> None:
+    """
+    Re-read changed people and movies and patch them into the index.
+    """
+    repositories = {"star": StarRepository, "director": DirectorRepository}
+    for kind, repository in repositories.items():
+        for person_id in catalog_events.ids_for(kind, keys):
+            person = await repository.get_by_id(db, person_id)
+            if person is not None:
+                index.upsert_person(kind, person.id, person.name)
+
+    movie_ids = catalog_events.ids_for("movie", keys)
+    if not movie_ids:
+        return
+
+    rows = await MovieRepository.list_snapshot_rows(db, movie_ids)
+    credits = _credits_by_movie(await MovieRepository.list_relation_pairs(db, movie_ids))
+    for row in rows:
+        movie_credits = credits.get(row.id, {})
+        index.upsert_movie(
+            row.id, row.name, movie_credits.get("star", []), movie_credits.get("director", [])
+        )
+    for movie_id in movie_ids - {row.id for row in rows}:
+        index.remove_movie(movie_id)
+
+
+async def _on_catalog_changes(keys: set[str]) -> None:
+    if _index is None:
+        return
+    async with AsyncSessionLocal() as db:
+        await apply_changes(db, _index, keys)
+
+
+async def reload_index() -> SearchIndex:
+    global _index
+
+    async with AsyncSessionLocal() as db:
+        _index = await load_index(db)
+    logger.info("Catalog search index loaded: %s movies", len(_index.movies))
+    return _index
+
+
+async def _periodic_reload() -> None:
+    while True:
+        await asyncio.sleep(settings.CATALOG_SEARCH_RELOAD_SECONDS)
+        try:
+            await reload_index()
+        except Exception:
+            logger.exception("Catalog search index reload failed")
+
+
+async def start() -> None:
+    """
+    Load the index and follow catalog changes (called from the app lifespan).
+    """
+    global _reloader
+
+    catalog_events.subscribe(_on_catalog_changes)
+    await reload_index()
+    _reloader = asyncio.create_task(_periodic_reload())
+
+
+async def stop() -> None:
+    global _reloader, _index
+
+    catalog_events.unsubscribe(_on_catalog_changes)
+    if _reloader is not None:
+        _reloader.cancel()
+        try:
+            await _reloader
+        except asyncio.CancelledError:
+            pass
+        _reloader = None
+    _index = None
@@ -0,0 +1,291 @@
+"""
+Shared-memory catalog snapshot (CATALOG_SNAPSHOT_MODE=shared).
+
+A single loader process (`python -m scripts.catalog_loader`) keeps the catalog snapshot up to date
+and publishes it as a *generation*: a directory of `.npy` files under CATALOG_SHM_DIR (tmpfs such as
+/dev/shm by default) plus a `CURRENT` pointer file holding the generation number. API workers map
+the arrays read-only with `np.load(mmap_mode="r")`, so every worker shares the same physical pages
+and per-worker memory stays flat as the worker count grows.
+
+Publishing is atomic: a generation is written to a temp dir, renamed into place, then `CURRENT` is
+swapped with `os.replace`. Workers poll `CURRENT` and swap their snapshot reference when it changes;
+old generations stay readable through existing mappings even after the loader prunes them.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import shutil
+from collections.abc import Iterable
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.enums import MovieSortField
+from app.services import catalog_events, catalog_snapshot
+from app.services.catalog_snapshot import (
+    RELATIONS,
+    CatalogSnapshot,
+    ColumnarCatalog,
+    SnapshotCertification,
+    SnapshotMovie,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+POINTER_FILE = "CURRENT"
+KEEP_GENERATIONS = 3
+
+
+def _generation_dir(directory: Path, generation: int) -> Path:
+    return directory / f"gen-{generation:012d}"
+
+
+def read_current_generation(directory: Path) -> int | None:
+    try:
+        return int((directory / POINTER_FILE).read_text().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _pack_strings(values: Iterable[str]) -> tuple[Any, Any]:
+    encoded = [v.encode() for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+
+def _snapshot_arrays(snapshot: CatalogSnapshot) -> dict[str, Any]:
+    """
+    Compact (dead rows dropped) array representation of a snapshot.
+    """
+    live = [i for i, row in enumerate(snapshot.rows) if row is not None]
+    rows: list[SnapshotMovie] = [snapshot.rows[i] for i in live]  # type: ignore[misc]
+    idx = np.asarray(live, dtype=np.int64)
+
+    arrays: dict[str, Any] = {
+        "ids": snapshot.ids[idx],
+        "year": snapshot.year[idx],
+        "imdb": snapshot.imdb[idx],
+        "votes": snapshot.votes[idx],
+        "price_cents": snapshot.price_cents[idx],
+        "certification_id": snapshot.certification_id[idx],
+        "time": np.fromiter((r.time for r in rows), dtype=np.int32, count=len(rows)),
+        "uuids": np.frombuffer(b"".join(r.uuid.bytes for r in rows), dtype=np.uint8).reshape(-1, 16),
+    }
+    arrays["name_blob"], arrays["name_offsets"] = _pack_strings(r.name for r in rows)
+
+    certifications = dict(sorted({r.certification.id: r.certification.name for r in rows}.items()))
+    arrays["cert_ids"] = np.fromiter(certifications, dtype=np.int32, count=len(certifications))
+    arrays["cert_name_blob"], arrays["cert_name_offsets"] = _pack_strings(certifications.values())
+
+    # Relations as CSR: sorted entity ids, offsets into a flat array of row positions.
+    for relation in RELATIONS:
+        per_entity: dict[int, list[int]] = {}
+        for position, old_idx in enumerate(live):
+            for entity_id in snapshot.links[relation][old_idx]:
+                per_entity.setdefault(entity_id, []).append(position)
+
+        entities = sorted(per_entity)
+        offsets = np.zeros(len(entities) + 1, dtype=np.int64)
+        if entities:
+            offsets[1:] = np.cumsum([len(per_entity[e]) for e in entities])
+        positions = [p for e in entities for p in per_entity[e]]
+
+        arrays[f"{relation}_entities"] = np.asarray(entities, dtype=np.int64)
+        arrays[f"{relation}_offsets"] = offsets
+        arrays[f"{relation}_positions"] = np.asarray(positions, dtype=np.int64)
+
+    sort_keys = {
+        MovieSortField.price: arrays["price_cents"],
+        MovieSortField.year: arrays["year"],
+        MovieSortField.imdb: arrays["imdb"],
+        MovieSortField.votes: arrays["votes"],
+    }
+    for field, key in sort_keys.items():
+        arrays[f"order_{field.value}"] = np.lexsort((arrays["ids"], key))
+
+    return arrays
+
+
+class SharedCatalogSnapshot(ColumnarCatalog):
+    """
+    Read-only snapshot backed by memory-mapped arrays of one published generation.
+    """
+
+    def __init__(self, path: Path, generation: int) -> None:
+        self.path = path
+        self.generation = generation
+        self.arrays: dict[str, Any] = {
+            f.stem: np.load(f, mmap_mode="r") for f in path.glob("*.npy")
+        }
+
+        self.ids = self.arrays["ids"]
+        self.year = self.arrays["year"]
+        self.imdb = self.arrays["imdb"]
+        self.votes = self.arrays["votes"]
+        self.price_cents = self.arrays["price_cents"]
+        self.certification_id = self.arrays["certification_id"]
+        # the generation is compacted, so every row is alive
+        self.alive = np.ones(self.ids.size, dtype=bool)
+
+        blob, offsets = self.arrays["cert_name_blob"], self.arrays["cert_name_offsets"]
+        self.certifications = {
+            int(cert_id): SnapshotCertification(
+                id=int(cert_id), name=bytes(blob[offsets[k] : offsets[k + 1]]).decode()
+            )
+            for k, cert_id in enumerate(self.arrays["cert_ids"])
+        }
+
+    @classmethod
+    def open(cls, directory: Path, generation: int) -> SharedCatalogSnapshot:
+        return cls(_generation_dir(directory, generation), generation)
+
+    def __len__(self) -> int:
+        return int(self.ids.size)
+
+    def _membership(self, relation: str, entity_id: int) -> Any:
+        mask = np.zeros(self.ids.size, dtype=bool)
+        entities = self.arrays[f"{relation}_entities"]
+        k = int(np.searchsorted(entities, entity_id))
+        if k < entities.size and entities[k] == entity_id:
+            offsets = self.arrays[f"{relation}_offsets"]
+            mask[self.arrays[f"{relation}_positions"][offsets[k] : offsets[k + 1]]] = True
+        return mask
+
+    def _sort_order(self, sort_by: MovieSortField) -> Any:
+        return self.arrays[f"order_{sort_by.value}"]
+
+    def _row(self, idx: int) -> SnapshotMovie:
+        names, offsets = self.arrays["name_blob"], self.arrays["name_offsets"]
+        return SnapshotMovie(
+            id=int(self.ids[idx]),
+            uuid=UUID(bytes=bytes(self.arrays["uuids"][idx])),
+            name=bytes(names[offsets[idx] : offsets[idx + 1]]).decode(),
+            year=int(self.year[idx]),
+            time=int(self.arrays["time"][idx]),
+            imdb=float(self.imdb[idx]),
+            votes=int(self.votes[idx]),
+            price=Decimal(int(self.price_cents[idx])).scaleb(-2),
+            certification=self.certifications[int(self.certification_id[idx])],
+        )
+
+
+# -------------------------
+# Loader side
+# -------------------------
+
+
+class GenerationWriter:
+    """
+    Publishes snapshots as numbered generations; used as the `on_refresh` hook of the loader.
+    """
+
+    def __init__(self, directory: Path, keep: int = KEEP_GENERATIONS) -> None:
+        self.directory = directory
+        self.keep = keep
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.generation = read_current_generation(directory) or 0
+
+    def publish(self, snapshot: CatalogSnapshot) -> int:
+        generation = self.generation + 1
+        final = _generation_dir(self.directory, generation)
+        tmp = final.with_name(final.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+
+        for name, array in _snapshot_arrays(snapshot).items():
+            np.save(tmp / f"{name}.npy", np.ascontiguousarray(array))
+        os.rename(tmp, final)
+
+        pointer_tmp = self.directory / f"{POINTER_FILE}.tmp"
+        pointer_tmp.write_text(str(generation))
+        os.replace(pointer_tmp, self.directory / POINTER_FILE)
+
+        self.generation = generation
+        self._prune()
+        logger.info("Published catalog generation %s (%s movies)", generation, len(snapshot))
+        return generation
+
+    def _prune(self) -> None:
+        # Workers still holding an old generation keep their mappings after unlink.
+        for path in sorted(self.directory.glob("gen-*")):
+            if path.suffix == ".tmp":
+                continue
+            if int(path.name.removeprefix("gen-")) <= self.generation - self.keep:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+async def run_loader() -> None:
+    writer = GenerationWriter(Path(settings.CATALOG_SHM_DIR))
+    catalog_events.start()
+    await catalog_snapshot.start(on_refresh=writer.publish)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await catalog_snapshot.stop()
+        await catalog_events.stop()
+
+
+# -------------------------
+# Worker side
+# -------------------------
+
+_follower: asyncio.Task[None] | None = None
+
+
+def _swap_to_current(directory: Path, current: int | None) -> int | None:
+    generation = read_current_generation(directory)
+    if generation is None or generation == current:
+        return current
+
+    try:
+        snapshot = SharedCatalogSnapshot.open(directory, generation)
+    except (FileNotFoundError, KeyError):
+        # pruned or half-visible generation: retry on the next poll
+        return current
+
+    catalog_snapshot.set_snapshot(snapshot)
+    return generation
+
+
+async def _follow_generations(directory: Path, current: int | None) -> None:
+    while True:
+        await asyncio.sleep(settings.CATALOG_SHM_POLL_SECONDS)
+        current = _swap_to_current(directory, current)
+
+
+async def start_reader() -> None:
+    """
+    Map the current generation (if any) and follow new ones (called from the app lifespan).
+    """
+    global _follower
+
+    directory = Path(settings.CATALOG_SHM_DIR)
+    current = _swap_to_current(directory, None)
+    if current is None:
+        logger.warning("No catalog generation in %s yet; serving GET /movies from SQL", directory)
+    _follower = asyncio.create_task(_follow_generations(directory, current))
+
+
+async def stop_reader() -> None:
+    global _follower
+
+    if _follower is not None:
+        _follower.cancel()
+        try:
+            await _follower
+        except asyncio.CancelledError:
+            pass
+        _follower = None
+    catalog_snapshot.set_snapshot(None)
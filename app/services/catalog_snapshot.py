@@ -0,0 +1,451 @@
+"""
+In-memory columnar catalog snapshot.
+
+Optional engine that keeps a compact copy of the movie catalog in every API worker and answers
+`list_movies` filters/sorts without touching Postgres. Filter semantics mirror
+`app.services.movies._apply_filters`; free-text `q` is always served by SQL.
+
+The snapshot is refreshed incrementally from the catalog change signal (`app.services.catalog_events`):
+only the changed movies are re-read. A periodic full reload is kept as a safety net for missed
+notifications.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Collection, Iterable, Sequence
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.enums import MovieSortField, SortOrder
+from app.db.session import AsyncSessionLocal
+from app.repositories import MovieRepository
+from app.services import catalog_events
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+RELATIONS = ("genre", "director", "star")
+
+
+@dataclass(frozen=True, slots=True)
+class SnapshotCertification:
+    id: int
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class SnapshotMovie:
+    """
+    Read-only movie row with the same attributes the list endpoint reads from `Movie`.
+    """
+
+    id: int
+    uuid: UUID
+    name: str
+    year: int
+    time: int
+    imdb: float
+    votes: int
+    price: Decimal
+    certification: SnapshotCertification
+
+
+def _to_cents(price: Decimal) -> int:
+    return int((Decimal(str(price)) * 100).to_integral_value())
+
+
+def _row_to_movie(row: Any) -> SnapshotMovie:
+    return SnapshotMovie(
+        id=row.id,
+        uuid=row.uuid,
+        name=row.name,
+        year=row.year,
+        time=row.time,
+        imdb=row.imdb,
+        votes=row.votes,
+        price=row.price,
+        certification=SnapshotCertification(id=row.certification_id, name=row.certification_name),
+    )
+
+
+class ColumnarCatalog(ABC):
+    """
+    Filter/sort logic shared by every columnar catalog layout.
+
+    Subclasses provide the column arrays (`ids`, `alive`, `year`, `imdb`, `certification_id`, ...),
+    relation membership masks, cached sort permutations and row materialization.
+    """
+
+    ids: Any
+    alive: Any
+    year: Any
+    imdb: Any
+    certification_id: Any
+
+    @abstractmethod
+    def _membership(self, relation: str, entity_id: int) -> Any: ...
+
+    @abstractmethod
+    def _sort_order(self, sort_by: MovieSortField) -> Any: ...
+
+    @abstractmethod
+    def _row(self, idx: int) -> SnapshotMovie: ...
+
+    def query(
+        self,
+        *,
+        page: int,
+        page_size: int,
+        year: int | None = None,
+        imdb_min: float | None = None,
+        imdb_max: float | None = None,
+        certification_id: int | None = None,
+        genre_id: int | None = None,
+        director_id: int | None = None,
+        star_id: int | None = None,
+        sort_by: MovieSortField = MovieSortField.year,
+        order: SortOrder = SortOrder.desc,
+        movie_ids: Collection[int] | None = None,
+    ) -> tuple[int, list[SnapshotMovie]]:
+        mask = self.alive.copy()
+
+        if movie_ids is not None:
+            mask &= np.isin(self.ids, np.fromiter(movie_ids, dtype=np.int64, count=len(movie_ids)))
+
+        if year is not None:
+            mask &= self.year == year
+
+        if imdb_min is not None:
+            mask &= self.imdb >= imdb_min
+
+        if imdb_max is not None:
+            mask &= self.imdb <= imdb_max
+
+        if certification_id is not None:
+            mask &= self.certification_id == certification_id
+
+        if genre_id is not None:
+            mask &= self._membership("genre", genre_id)
+
+        if director_id is not None:
+            mask &= self._membership("director", director_id)
+
+        if star_id is not None:
+            mask &= self._membership("star", star_id)
+
+        # Filtering a pre-sorted permutation keeps this O(n) without a per-request sort.
+        ordered = self._sort_order(sort_by)
+        if order == SortOrder.desc:
+            ordered = ordered[::-1]
+        matched = ordered[mask[ordered]]
+
+        offset = (page - 1) * page_size
+        page_rows = matched[offset : offset + page_size]
+        return int(matched.size), [self._row(int(i)) for i in page_rows]
+
+
+class CatalogSnapshot(ColumnarCatalog):
+    """
+    Columnar view of the catalog.
+
+    Scalar columns live in NumPy arrays indexed by row position; genre/director/star membership is
+    stored as one packed bitset per entity id. Deleted movies leave a dead row behind (cleared in
+    the `alive` mask) so positions stay stable until the next full reload.
+    """
+
+    def __init__(self) -> None:
+        if np is None:
+            raise RuntimeError("numpy is required for the catalog snapshot (install the 'catalog' extra)")
+
+        self.rows: list[SnapshotMovie | None] = []
+        self.index_by_id: dict[int, int] = {}
+
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.alive = np.zeros(0, dtype=bool)
+        self.year = np.zeros(0, dtype=np.int32)
+        self.imdb = np.zeros(0, dtype=np.float64)
+        self.votes = np.zeros(0, dtype=np.int64)
+        self.price_cents = np.zeros(0, dtype=np.int64)
+        self.certification_id = np.zeros(0, dtype=np.int32)
+
+        self.bitsets: dict[str, dict[int, Any]] = {r: {} for r in RELATIONS}
+        # reverse links, needed to clear bits when a movie's relations change
+        self.links: dict[str, list[tuple[int, ...]]] = {r: [] for r in RELATIONS}
+
+        self._sort_orders: dict[MovieSortField, Any] = {}
+
+    # -------------------------
+    # Building / incremental updates
+    # -------------------------
+
+    @classmethod
+    def build(
+        cls,
+        rows: Sequence[Any],
+        relation_pairs: dict[str, list[tuple[int, int]]],
+    ) -> CatalogSnapshot:
+        snapshot = cls()
+        n = len(rows)
+
+        snapshot.rows = [_row_to_movie(r) for r in rows]
+        snapshot.index_by_id = {m.id: i for i, m in enumerate(snapshot.rows) if m is not None}
+
+        snapshot.ids = np.fromiter((r.id for r in rows), dtype=np.int64, count=n)
+        snapshot.alive = np.ones(n, dtype=bool)
+        snapshot.year = np.fromiter((r.year for r in rows), dtype=np.int32, count=n)
+        snapshot.imdb = np.fromiter((r.imdb for r in rows), dtype=np.float64, count=n)
+        snapshot.votes = np.fromiter((r.votes for r in rows), dtype=np.int64, count=n)
+        snapshot.price_cents = np.fromiter((_to_cents(r.price) for r in rows), dtype=np.int64, count=n)
+        snapshot.certification_id = np.fromiter(
+            (r.certification_id for r in rows), dtype=np.int32, count=n
+        )
+
+        for relation in RELATIONS:
+            per_row: list[list[int]] = [[] for _ in range(n)]
+            per_entity: dict[int, list[int]] = {}
+            for movie_id, entity_id in relation_pairs.get(relation, []):
+                idx = snapshot.index_by_id.get(movie_id)
+                if idx is None:
+                    continue
+                per_row[idx].append(entity_id)
+                per_entity.setdefault(entity_id, []).append(idx)
+
+            snapshot.links[relation] = [tuple(ids) for ids in per_row]
+            for entity_id, positions in per_entity.items():
+                mask = np.zeros(n, dtype=bool)
+                mask[positions] = True
+                snapshot.bitsets[relation][entity_id] = np.packbits(mask)
+
+        return snapshot
+
+    def upsert(self, row: Any, links: dict[str, Iterable[int]]) -> None:
+        movie = _row_to_movie(row)
+        idx = self.index_by_id.get(movie.id)
+
+        if idx is None:
+            idx = len(self.rows)
+            self.rows.append(movie)
+            self.index_by_id[movie.id] = idx
+            self.ids = np.append(self.ids, movie.id)
+            self.alive = np.append(self.alive, True)
+            self.year = np.append(self.year, np.int32(movie.year))
+            self.imdb = np.append(self.imdb, movie.imdb)
+            self.votes = np.append(self.votes, movie.votes)
+            self.price_cents = np.append(self.price_cents, _to_cents(movie.price))
+            self.certification_id = np.append(self.certification_id, np.int32(row.certification_id))
+            for relation in RELATIONS:
+                self.links[relation].append(())
+        else:
+            self.rows[idx] = movie
+            self.alive[idx] = True
+            self.year[idx] = movie.year
+            self.imdb[idx] = movie.imdb
+            self.votes[idx] = movie.votes
+            self.price_cents[idx] = _to_cents(movie.price)
+            self.certification_id[idx] = row.certification_id
+
+        for relation in RELATIONS:
+            self._set_links(relation, idx, tuple(links.get(relation, ())))
+
+        self._sort_orders.clear()
+
+    def remove(self, movie_id: int) -> None:
+        idx = self.index_by_id.pop(movie_id, None)
+        if idx is None:
+            return
+
+        self.rows[idx] = None
+        self.alive[idx] = False
+        for relation in RELATIONS:
+            self._set_links(relation, idx, ())
+
+        self._sort_orders.clear()
+
+    def _set_links(self, relation: str, idx: int, entity_ids: tuple[int, ...]) -> None:
+        bitsets = self.bitsets[relation]
+        byte, bit = idx >> 3, np.uint8(0x80 >> (idx & 7))
+
+        for entity_id in self.links[relation][idx]:
+            bits = bitsets.get(entity_id)
+            if bits is not None and byte < bits.size:
+                bits[byte] &= ~bit
+
+        for entity_id in entity_ids:
+            bits = bitsets.get(entity_id)
+            if bits is None or byte >= bits.size:
+                grown = np.zeros(byte + 1, dtype=np.uint8)
+                if bits is not None:
+                    grown[: bits.size] = bits
+                bits = grown
+                bitsets[entity_id] = bits
+            bits[byte] |= bit
+
+        self.links[relation][idx] = entity_ids
+
+    # -------------------------
+    # Querying
+    # -------------------------
+
+    def __len__(self) -> int:
+        return len(self.index_by_id)
+
+    def _membership(self, relation: str, entity_id: int) -> Any:
+        bits = self.bitsets[relation].get(entity_id)
+        n = len(self.rows)
+        if bits is None:
+            return np.zeros(n, dtype=bool)
+        # unpackbits pads with zeros when the bitset is shorter than the column
+        return np.unpackbits(bits, count=n).view(bool)
+
+    def _row(self, idx: int) -> SnapshotMovie:
+        return self.rows[idx]  # type: ignore[return-value]
+
+    def _sort_order(self, sort_by: MovieSortField) -> Any:
+        """
+        Ascending row permutation for a sort field (ties broken by id), cached until the next write.
+        """
+        order = self._sort_orders.get(sort_by)
+        if order is None:
+            key = {
+                MovieSortField.price: self.price_cents,
+                MovieSortField.year: self.year,
+                MovieSortField.imdb: self.imdb,
+                MovieSortField.votes: self.votes,
+            }[sort_by]
+            order = np.lexsort((self.ids, key))
+            self._sort_orders[sort_by] = order
+        return order
+
+
+# -------------------------
+# Loading / change signal
+# -------------------------
+
+_snapshot: ColumnarCatalog | None = None
+
+
+def get_snapshot() -> ColumnarCatalog | None:
+    """
+    Current snapshot, or None when the engine is disabled or not loaded yet (callers use SQL then).
+    """
+    return _snapshot
+
+
+def set_snapshot(snapshot: ColumnarCatalog | None) -> None:
+    """
+    Swap the active snapshot. Rebinding a module global is atomic for readers on the event loop.
+    """
+    global _snapshot
+
+    _snapshot = snapshot
+
+
+async def load_snapshot(db: AsyncSession) -> CatalogSnapshot:
+    rows = await MovieRepository.list_snapshot_rows(db)
+    pairs = await MovieRepository.list_relation_pairs(db)
+    return CatalogSnapshot.build(rows, pairs)
+
+
+async def refresh_movies(db: AsyncSession, snapshot: CatalogSnapshot, movie_ids: set[int]) -> None:
+    """
+    Re-read only the given movies and patch them into the snapshot (missing rows are removed).
+    """
+    if not movie_ids:
+        return
+
+    rows = await MovieRepository.list_snapshot_rows(db, movie_ids)
+    pairs = await MovieRepository.list_relation_pairs(db, movie_ids)
+
+    links: dict[int, dict[str, list[int]]] = {}
+    for relation, relation_pairs in pairs.items():
+        for movie_id, entity_id in relation_pairs:
+            links.setdefault(movie_id, {}).setdefault(relation, []).append(entity_id)
+
+    found: set[int] = set()
+    for row in rows:
+        found.add(row.id)
+        snapshot.upsert(row, links.get(row.id, {}))
+
+    for movie_id in movie_ids - found:
+        snapshot.remove(movie_id)
+
+
+async def reload_snapshot() -> CatalogSnapshot:
+    async with AsyncSessionLocal() as db:
+        snapshot = await load_snapshot(db)
+    set_snapshot(snapshot)
+    logger.info("Catalog snapshot loaded: %s movies", len(snapshot))
+    return snapshot
+
+
+OnRefresh = Callable[[CatalogSnapshot], None]
+
+_refresher: asyncio.Task[None] | None = None
+_on_refresh: OnRefresh | None = None
+
+
+async def _on_catalog_changes(keys: set[str]) -> None:
+    snapshot = _snapshot
+    movie_ids = catalog_events.ids_for("movie", keys)
+    if not isinstance(snapshot, CatalogSnapshot) or not movie_ids:
+        return
+
+    async with AsyncSessionLocal() as db:
+        await refresh_movies(db, snapshot, movie_ids)
+    if _on_refresh is not None:
+        _on_refresh(snapshot)
+
+
+async def _periodic_reload() -> None:
+    while True:
+        await asyncio.sleep(settings.CATALOG_SNAPSHOT_RELOAD_SECONDS)
+        try:
+            snapshot = await reload_snapshot()
+        except Exception:
+            logger.exception("Catalog snapshot reload failed")
+            continue
+        if _on_refresh is not None:
+            _on_refresh(snapshot)
+
+
+async def start(on_refresh: OnRefresh | None = None) -> None:
+    """
+    Load the snapshot and follow catalog changes (called from the app lifespan).
+
+    `on_refresh` runs after every full reload or incremental patch (used by the shared-memory loader).
+    Expects `catalog_events` to be started by the caller.
+    """
+    global _refresher, _on_refresh
+
+    _on_refresh = on_refresh
+    catalog_events.subscribe(_on_catalog_changes)
+    snapshot = await reload_snapshot()
+    if on_refresh is not None:
+        on_refresh(snapshot)
+    _refresher = asyncio.create_task(_periodic_reload())
+
+
+async def stop() -> None:
+    global _refresher, _on_refresh
+
+    catalog_events.unsubscribe(_on_catalog_changes)
+    if _refresher is not None:
+        _refresher.cancel()
+        try:
+            await _refresher
+        except asyncio.CancelledError:
+            pass
+        _refresher = None
+    _on_refresh = None
+    set_snapshot(None)
@@ -0,0 +1,110 @@
+"""
+Idempotency-Key handling for non-idempotent POSTs (order creation, checkout sessions).
+
+The first request with a key claims it in `idempotency_keys` (committed right away, so others
+see it), runs, and stores its status code and JSON body on the row. A retry with the same key and
+the same body gets the stored response replayed for IDEMPOTENCY_TTL_SECONDS; a duplicate that
+arrives while the first request is still running polls the row for up to
+IDEMPOTENCY_WAIT_SECONDS. Reusing a key for a different body is rejected.
+
+Only final answers are stored - successes and business errors. When the request fails
+unexpectedly, the claim is dropped so that a retry runs it again; a claim left behind by a
+crashed worker is taken over after IDEMPOTENCY_STALE_CLAIM_SECONDS.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.repositories import IdempotencyKeyRepository
+
+_POLL_INITIAL_SECONDS = 0.05
+_POLL_MAX_SECONDS = 0.5
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    status_code: int
+    body: dict[str, Any]
+
+
+def _utcnow_naive() -> datetime:
+    return datetime.utcnow()
+
+
+def fingerprint(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+async def _claim(
+    db: AsyncSession, user_id: int, scope: str, key: str, request_fingerprint: str
+) -> int | None:
+    now = _utcnow_naive()
+    claimed = await IdempotencyKeyRepository.claim(
+        db,
+        user_id=user_id,
+        scope=scope,
+        key=key,
+        fingerprint=request_fingerprint,
+        now=now,
+        stale_before=now - timedelta(seconds=settings.IDEMPOTENCY_STALE_CLAIM_SECONDS),
+        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+    )
+    await db.commit()
+    return claimed
+
+
+async def run_once(
+    db: AsyncSession,
+    *,
+    user_id: int,
+    scope: str,
+    key: str,
+    request_fingerprint: str,
+    handler: Callable[[], Awaitable[StoredResponse]],
+) -> tuple[StoredResponse, bool]:
+    """
+    Run `handler` at most once per (user, scope, key); returns (response, replayed).
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    delay = _POLL_INITIAL_SECONDS
+    while True:
+        claimed = await _claim(db, user_id, scope, key, request_fingerprint)
+        if claimed is not None:
+            break
+
+        row = await IdempotencyKeyRepository.get_for_user(db, user_id, scope, key)
+        await db.commit()
+        if row is None:
+            continue  # the first request failed and let go of the key: take it
+        if row.fingerprint != request_fingerprint:
+            raise ValueError("Idempotency-Key was already used for a different request")
+        if row.status_code is not None:
+            return StoredResponse(row.status_code, row.response or {}), True
+        if time.monotonic() >= deadline:
+            raise ValueError("A request with this Idempotency-Key is still in progress")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, _POLL_MAX_SECONDS)
+
+    try:
+        response = await handler()
+    except Exception:
+        await db.rollback()
+        await IdempotencyKeyRepository.release(db, claimed)
+        await db.commit()
+        raise
+
+    if response.status_code >= 400:
+        # an error answer is replayed, but nothing the handler left uncommitted is kept
+        await db.rollback()
+    await IdempotencyKeyRepository.complete(db, claimed, response.status_code, response.body)
+    await db.commit()
+    return response, False
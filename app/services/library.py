@@ -0,0 +1,43 @@
+"""
+Owned movies (`user_library`).
+
+Rows are added in the transaction that marks an order paid; `backfill` fills them in for orders
+paid before the table existed. Reads are primary-key lookups on (user_id, movie_id).
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.repositories import UserLibraryRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def list_library(db: AsyncSession, user_id: int) -> list[Row[Any]]:
+    return await UserLibraryRepository.list_for_user(db, user_id)
+
+
+async def backfill(
+    session_factory: async_sessionmaker[AsyncSession], *, batch_size: int = 1000
+) -> int:
+    """
+    Add the movies of every paid order, one short transaction per batch of orders. Safe to
+    re-run and to run while payments are processed.
+    """
+    after_order_id, total = 0, 0
+    async with session_factory() as session:
+        while True:
+            last_order_id, inserted = await UserLibraryRepository.backfill_batch(
+                session, after_order_id=after_order_id, limit=batch_size
+            )
+            await session.commit()
+            if last_order_id is None:
+                break
+            total += inserted
+            after_order_id = last_order_id
+            logger.info("Library backfill: up to order %s, %s rows added", after_order_id, total)
+    return total
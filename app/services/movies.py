@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import random
+from collections.abc import Collection
 from uuid import UUID
 
-from sqlalchemy import Select
+from sqlalchemy import ColumnElement, Integer, Select, any_, cast, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.enums import MovieSortField, SortOrder
@@ -14,6 +17,8 @@ from app.repositories import (
     MovieRepository,
     StarRepository,
 )
+from app.services import catalog_events, catalog_search, catalog_snapshot
+from app.services.catalog_snapshot import SnapshotMovie
 
 
 async def create_genre(db: AsyncSession, name: str) -> Genre:
@@ -21,11 +26,15 @@ async def create_genre(db: AsyncSession, name: str) -> Genre:
 
 
 async def create_star(db: AsyncSession, name: str) -> Star:
-    return await StarRepository.create(db, name=name)
+    star = await StarRepository.create(db, name=name)
+    await catalog_events.publish_person_change(db, "star", star.id)
+    return star
 
 
 async def create_director(db: AsyncSession, name: str) -> Director:
-    return await DirectorRepository.create(db, name=name)
+    director = await DirectorRepository.create(db, name=name)
+    await catalog_events.publish_person_change(db, "director", director.id)
+    return director
 
 
 async def create_certification(db: AsyncSession, name: str) -> Certification:
@@ -36,6 +45,11 @@ async def get_movie_by_uuid(db: AsyncSession, movie_uuid: UUID) -> Movie | None:
     return await MovieRepository.get_by_uuid(db, movie_uuid)
 
 
+def _id_in(movie_ids: Collection[int]) -> ColumnElement[bool]:
+    # one array parameter, not one per id: a search hit set can exceed asyncpg's 32767 arguments
+    return Movie.id == any_(cast(list(movie_ids), ARRAY(Integer)))
+
+
 def _apply_filters(
     stmt: Select,
     *,
@@ -47,7 +61,11 @@ def _apply_filters(
     genre_id: int | None,
     director_id: int | None,
     star_id: int | None,
+    movie_ids: Collection[int] | None = None,
 ) -> Select:
+    if movie_ids is not None:
+        stmt = stmt.where(_id_in(movie_ids))
+
     if q:
         stmt = stmt.where(Movie.name.ilike(f"%{q}%"))  # type: ignore[attr-defined]
 
@@ -91,6 +109,66 @@ async def list_movies(
     star_id: int | None,
     sort_by: MovieSortField,
     order: SortOrder,
+) -> tuple[int, list[Movie] | list[SnapshotMovie]]:
+    # Free-text search uses the in-process index when loaded, otherwise it goes to Postgres;
+    # everything else can be served from the snapshot.
+    movie_ids: set[int] | None = None
+    index = catalog_search.get_index()
+    if q and index is not None:
+        movie_ids = index.match(q)
+        q = None
+
+    snapshot = catalog_snapshot.get_snapshot()
+    if snapshot is not None and not q:
+        return snapshot.query(
+            page=page,
+            page_size=page_size,
+            year=year,
+            imdb_min=imdb_min,
+            imdb_max=imdb_max,
+            certification_id=certification_id,
+            genre_id=genre_id,
+            director_id=director_id,
+            star_id=star_id,
+            sort_by=sort_by,
+            order=order,
+            movie_ids=movie_ids,
+        )
+
+    return await _list_movies_sql(
+        db,
+        page=page,
+        page_size=page_size,
+        q=q,
+        year=year,
+        imdb_min=imdb_min,
+        imdb_max=imdb_max,
+        certification_id=certification_id,
+        genre_id=genre_id,
+        director_id=director_id,
+        star_id=star_id,
+        sort_by=sort_by,
+        order=order,
+        movie_ids=movie_ids,
+    )
+
+
+async def _list_movies_sql(
+    db: AsyncSession,
+    *,
+    page: int,
+    page_size: int,
+    q: str | None,
+    year: int | None,
+    imdb_min: float | None,
+    imdb_max: float | None,
+    certification_id: int | None,
+    genre_id: int | None,
+    director_id: int | None,
+    star_id: int | None,
+    sort_by: MovieSortField,
+    order: SortOrder,
+    movie_ids: Collection[int] | None = None,
 ) -> tuple[int, list[Movie]]:
     stmt = MovieRepository._base_list_stmt()
     stmt = _apply_filters(
@@ -103,6 +181,7 @@ async def list_movies(
         genre_id=genre_id,
         director_id=director_id,
         star_id=star_id,
+        movie_ids=movie_ids,
     )
 
     sort_col = getattr(Movie, sort_by.value)
@@ -115,6 +194,111 @@ async def list_movies(
     return total, items
 
 
+DISCOVER_PROBE_ROUNDS = 3
+
+
+async def discover_movies(
+    db: AsyncSession,
+    *,
+    n: int,
+    q: str | None,
+    year: int | None,
+    imdb_min: float | None,
+    imdb_max: float | None,
+    certification_id: int | None,
+    genre_id: int | None,
+    director_id: int | None,
+    star_id: int | None,
+) -> list[Movie]:
+    """
+    Up to `n` random movies matching the filters, without ORDER BY random() or a count.
+
+    Random ids are drawn from [min(id), max(id)] and each probe takes the first matching movie at or
+    after it. Movies right after gaps in the id sequence are slightly more likely to be picked,
+    which is fine for a "surprise me" rail. With broad filters a probe walks a few index entries,
+    so cost does not depend on catalog size; a selective filter makes each walk as long as the
+    gap between matches, i.e. it grows with the share of the catalog that does not match.
+
+    When the probes come up short, the rest is filled with the matches from a random id onwards
+    (wrapping around to the start), shuffled: still a varying pick, never just the lowest ids.
+    """
+    id_range = await MovieRepository.get_id_range(db)
+    if id_range is None:
+        return []
+    low, high = id_range
+
+    movie_ids: set[int] | None = None
+    index = catalog_search.get_index()
+    if q and index is not None:
+        movie_ids = index.match(q)
+        q = None
+        if not movie_ids:
+            return []
+
+    candidates = _apply_filters(
+        select(Movie.id),
+        q=q,
+        year=year,
+        imdb_min=imdb_min,
+        imdb_max=imdb_max,
+        certification_id=certification_id,
+        genre_id=genre_id,
+        director_id=director_id,
+        star_id=star_id,
+        movie_ids=movie_ids,
+    )
+
+    picked: dict[int, None] = {}  # insertion-ordered set
+    for _ in range(DISCOVER_PROBE_ROUNDS):
+        missing = n - len(picked)
+        if missing <= 0:
+            break
+        # oversample: probes landing in the same run of ids collapse into one movie
+        probes = [random.randint(low, high) for _ in range(missing * 2)]
+        for movie_id in await MovieRepository.probe_ids(db, candidates, probes):
+            if len(picked) < n:
+                picked.setdefault(movie_id)
+
+    if len(picked) < n:
+        # few matches overall: take a run of them from a random offset, wrapping around once
+        rest = candidates.where(Movie.id.not_in(list(picked))) if picked else candidates
+        offset = random.randint(low, high)
+        tail: list[int] = []
+        for part in (rest.where(Movie.id >= offset), rest.where(Movie.id < offset)):
+            stmt = part.order_by(Movie.id.asc()).limit(n - len(picked) - len(tail))
+            tail.extend((await db.execute(stmt)).scalars().all())
+            if len(picked) + len(tail) >= n:
+                break
+        random.shuffle(tail)
+        for movie_id in tail:
+            picked.setdefault(movie_id)
+
+    if not picked:
+        return []
+
+    stmt = MovieRepository._base_list_stmt().where(_id_in(picked))
+    by_id = {m.id: m for m in await MovieRepository.list_movies(db, stmt)}
+    return [by_id[movie_id] for movie_id in picked if movie_id in by_id]
+
+
+async def autocomplete(
+    db: AsyncSession, q: str, limit: int
+) -> dict[str, list[catalog_search.Suggestion]]:
+    """
+    Suggestions grouped by kind ("movie", "star", "director"); Postgres ILIKE when the index is not loaded.
+    """
+    index = catalog_search.get_index()
+    if index is not None:
+        return index.suggest(q, limit)
+
+    repositories = {"movie": MovieRepository, "star": StarRepository, "director": DirectorRepository}
+    suggestions: dict[str, list[catalog_search.Suggestion]] = {}
+    for kind, repository in repositories.items():
+        entities = await repository.list_name_matches(db, q, limit)
+        suggestions[kind] = [catalog_search.Suggestion(kind, e.id, e.name) for e in entities]
+    return suggestions
+
+
 async def create_movie(db: AsyncSession, payload) -> Movie:
     data = payload.dict() if hasattr(payload, "dict") else dict(payload)
 
@@ -159,13 +343,13 @@ async def create_movie(db: AsyncSession, payload) -> Movie:
         description=data["description"],
         price=data["price"],
         certification_id=data["certification_id"],
+        # set on the new object: assigning them after the insert would lazy-load the old lists
+        genres=genres,
+        directors=directors,
+        stars=stars,
     )
 
-    movie.genres = genres
-    movie.directors = directors
-    movie.stars = stars
-
-    await db.flush()
+    await catalog_events.publish_movie_change(db, movie.id)
     return movie
 
 
@@ -214,6 +398,7 @@ async def update_movie(db: AsyncSession, movie_id: int, payload) -> Movie:
         movie.stars = stars
 
     await db.flush()
+    await catalog_events.publish_movie_change(db, movie.id)
     return movie
 
 
@@ -224,3 +409,4 @@ async def delete_movie(db: AsyncSession, movie_id: int) -> None:
 
     await db.delete(movie)
     await db.flush()
+    await catalog_events.publish_movie_change(db, movie_id)
@@ -1,64 +1,126 @@
 from __future__ import annotations
 
+import base64
+from dataclasses import dataclass
+from datetime import datetime
 from decimal import Decimal
+from itertools import groupby
+from typing import Any
 
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.orders import OrderStatusEnum
-from app.repositories import (
-    CartItemRepository,
-    CartRepository,
-    MovieRepository,
-    OrderItemRepository,
-    OrderRepository,
-)
+from app.repositories import CartItemRepository, OrderRepository
+from app.services import cart as cart_service
+from app.services.user_locks import CART, ORDERS, user_lock
 
 
-async def create_order_from_cart(db: AsyncSession, user_id: int):
-    cart = await CartRepository.get_by_user_id(db, user_id)
-    if cart is None or not cart.items:
-        raise ValueError("Cart is empty")
-
-    movie_ids = [i.movie_id for i in cart.items]
-    movies = []
-    for mid in movie_ids:
-        m = await MovieRepository.get_by_id(db, mid)
-        if m is None:
-            # exclude deleted/unavailable movies
-            continue
-        movies.append(m)
-
-    if not movies:
-        raise ValueError("No available movies to order")
-
-    total = Decimal("0.00")
-    for m in movies:
-        total += Decimal(str(m.price))
-
-    order = await OrderRepository.create(
-        db,
-        user_id=user_id,
-        status=OrderStatusEnum.pending,
-        total_amount=total,
-    )
-
-    for m in movies:
-        await OrderItemRepository.create(
-            db,
-            order_id=order.id,
-            movie_id=m.id,
-            price_at_order=m.price,
-        )
+def _utcnow_naive() -> datetime:
+    return datetime.utcnow()
+
 
-    # clear cart
-    await CartItemRepository.delete_for_cart(db, cart.id)
-    await db.flush()
+async def create_order_from_cart(db: AsyncSession, user_id: int):
+    """
+    Pending order for everything orderable in the user's cart, created set-based: the statement
+    count does not depend on the number of items.
+    """
+    # a second concurrent request waits here and then finds the cart empty
+    async with user_lock(db, user_id, CART):
+        # carts kept outside Postgres (CART_BACKEND="redis") are written through first
+        await cart_service.flush_cart(db, user_id)
+        created = await OrderRepository.create_from_cart(db, user_id, _utcnow_naive())
+        if created is None:
+            # error path only: tell an empty cart from one holding nothing orderable
+            if not await CartItemRepository.list_items_for_user(db, user_id):
+                raise ValueError("Cart is empty")
+            raise ValueError("No available movies to order")
+
+        order, cleared_ids = created
+        await db.commit()
+    await cart_service.discard_items(user_id, cleared_ids)
 
     return order
 
 
-async def list_orders(db: AsyncSession, user_id: int):
-    return await OrderRepository.list_for_user(db, user_id)
+@dataclass(frozen=True)
+class OrderHistoryEntry:
+    id: int
+    status: OrderStatusEnum
+    created_at: datetime
+    total_amount: Decimal
+    item_count: int
+    items: list[Row[Any]] | None  # (movie_id, price_at_order, movie_uuid, title); None in summary
+
+
+def encode_cursor(created_at: datetime, order_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{order_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, order_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(order_id)
+    except ValueError:  # binascii.Error and UnicodeDecodeError included
+        raise ValueError("Invalid cursor")
+
+
+async def list_orders(
+    db: AsyncSession,
+    user_id: int,
+    *,
+    limit: int,
+    cursor: str | None = None,
+    status: OrderStatusEnum | None = None,
+    summary: bool = False,
+) -> tuple[list[OrderHistoryEntry], str | None]:
+    """
+    One page of the user's order history, newest first, and the cursor of the next page (None on
+    the last one). One statement either way: items and movie titles are joined in, not fetched
+    per order; `summary` leaves them out.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    # one extra row tells whether there is a next page
+    if summary:
+        rows = await OrderRepository.list_page_for_user(
+            db, user_id, limit=limit + 1, after=after, status=status
+        )
+        entries = [
+            OrderHistoryEntry(
+                id=r.id,
+                status=r.status,
+                created_at=r.created_at,
+                total_amount=r.total_amount,
+                item_count=r.item_count,
+                items=None,
+            )
+            for r in rows
+        ]
+    else:
+        rows = await OrderRepository.list_page_with_items_for_user(
+            db, user_id, limit=limit + 1, after=after, status=status
+        )
+        entries = []
+        for order_id, group in groupby(rows, key=lambda r: r.id):
+            group = list(group)
+            first = group[0]
+            entries.append(
+                OrderHistoryEntry(
+                    id=order_id,
+                    status=first.status,
+                    created_at=first.created_at,
+                    total_amount=first.total_amount,
+                    item_count=first.item_count,
+                    items=[r for r in group if r.movie_id is not None],
+                )
+            )
+
+    if len(entries) <= limit:
+        return entries, None
+    entries = entries[:limit]
+    return entries, encode_cursor(entries[-1].created_at, entries[-1].id)
 
 
 async def get_order(db: AsyncSession, user_id: int, order_id: int):
@@ -66,12 +128,14 @@ async def get_order(db: AsyncSession, user_id: int, order_id: int):
 
 
 async def cancel_order(db: AsyncSession, user_id: int, order_id: int) -> None:
-    order = await OrderRepository.get_for_user(db, user_id, order_id)
-    if order is None:
-        raise ValueError("Order not found")
+    # serialized with payment of the user's orders: the status is read and changed under the lock
+    async with user_lock(db, user_id, ORDERS):
+        order = await OrderRepository.get_for_user(db, user_id, order_id)
+        if order is None:
+            raise ValueError("Order not found")
 
-    if order.status != OrderStatusEnum.pending:
-        raise ValueError("Only pending orders can be canceled")
+        if order.status != OrderStatusEnum.pending:
+            raise ValueError("Only pending orders can be canceled")
 
-    order.status = OrderStatusEnum.canceled
-    await db.flush()
+        order.status = OrderStatusEnum.canceled
+        await db.commit()
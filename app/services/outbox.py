@@ -0,0 +1,161 @@
+"""
+Transactional outbox.
+
+Services record side effects with `enqueue(db, topic, payload)` before committing their change,
+so the event exists if and only if the change does. A relay drains `outbox_events` in batches:
+each batch locks due rows with FOR UPDATE SKIP LOCKED, hands each topic's payloads to its handler
+in one call (all emails of a batch become one Celery task) and deletes them in the same
+transaction. Any number of relays (Celery beat task, or
+`python -m scripts.outbox_relay` replicas) can run at once without handing out a row twice.
+
+Delivery is at-least-once: a relay that crashes after dispatching but before committing leaves the
+rows to be dispatched again, so handlers must tolerate duplicates. When a handler fails, all rows
+it was given are pushed back with exponential backoff and keep the error.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core import emails
+from app.core.config import settings
+from app.db.models.outbox import OutboxEvent
+from app.repositories import OutboxRepository
+
+logger = logging.getLogger(__name__)
+
+TOPIC_EMAIL = "email"
+
+# a handler gets all claimed payloads of its topic at once, in claim order
+Handler = Callable[[list[dict[str, Any]]], None]
+
+_handlers: dict[str, Handler] = {}
+
+
+def register_handler(topic: str) -> Callable[[Handler], Handler]:
+    def _register(handler: Handler) -> Handler:
+        _handlers[topic] = handler
+        return handler
+
+    return _register
+
+
+def _utcnow_naive() -> datetime:
+    return datetime.utcnow()
+
+
+def enqueue(db: AsyncSession, topic: str, payload: dict[str, Any]) -> None:
+    """
+    Record a side effect in the caller's transaction (written on commit, dropped on rollback).
+    """
+    # stamped here, not by the server: the relay compares with the same naive UTC clock
+    OutboxRepository.add(db, topic, payload, _utcnow_naive())
+
+
+def enqueue_email(db: AsyncSession, message: emails.RenderedEmail) -> None:
+    to_email, subject, body = message
+    enqueue(db, TOPIC_EMAIL, {"to": to_email, "subject": subject, "body": body})
+
+
+@register_handler(TOPIC_EMAIL)
+def _handle_email(payloads: list[dict[str, Any]]) -> None:
+    # hand over to the email workers as one batch; SMTP retries happen there
+    emails.deliver_later([(p["to"], p["subject"], p["body"]) for p in payloads])
+
+
+def _retry_at(now: datetime, attempts: int) -> datetime:
+    delay = min(
+        settings.OUTBOX_RETRY_BACKOFF_MAX_SECONDS,
+        settings.OUTBOX_RETRY_BACKOFF_SECONDS * 2**attempts,
+    )
+    return now + timedelta(seconds=delay)
+
+
+@dataclass(slots=True)
+class RelayStats:
+    delivered: int = 0
+    failed: int = 0
+
+    @property
+    def claimed(self) -> int:
+        return self.delivered + self.failed
+
+
+async def relay_batch(db: AsyncSession, batch_size: int | None = None) -> RelayStats:
+    """
+    Claim, dispatch and settle one batch in a single transaction.
+    """
+    now = _utcnow_naive()
+    stats = RelayStats()
+    events = await OutboxRepository.claim_batch(
+        db, batch_size or settings.OUTBOX_RELAY_BATCH_SIZE, now
+    )
+
+    by_topic: dict[str, list[OutboxEvent]] = {}
+    for event in events:
+        by_topic.setdefault(event.topic, []).append(event)
+
+    delivered: list[int] = []
+    for topic, group in by_topic.items():
+        handler = _handlers.get(topic)
+        try:
+            if handler is None:
+                raise LookupError(f"No outbox handler for topic {topic!r}")
+            handler([event.payload for event in group])
+        except Exception as exc:
+            logger.warning("Outbox batch of %s %s events failed: %s", len(group), topic, exc)
+            for event in group:
+                await OutboxRepository.reschedule(
+                    db, event.id, _retry_at(now, event.attempts), repr(exc)
+                )
+            stats.failed += len(group)
+        else:
+            delivered.extend(event.id for event in group)
+
+    await OutboxRepository.delete_ids(db, delivered)
+    await db.commit()
+    stats.delivered = len(delivered)
+    return stats
+
+
+async def drain(
+    session_factory: async_sessionmaker[AsyncSession],
+    *,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+) -> RelayStats:
+    """
+    Relay batches until nothing is due (or `max_batches` is reached).
+    """
+    batch_size = batch_size or settings.OUTBOX_RELAY_BATCH_SIZE
+    total = RelayStats()
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        async with session_factory() as session:
+            stats = await relay_batch(session, batch_size)
+        total.delivered += stats.delivered
+        total.failed += stats.failed
+        batches += 1
+        if stats.claimed < batch_size:
+            break
+    return total
+
+
+async def run_relay(session_factory: async_sessionmaker[AsyncSession]) -> None:
+    """
+    Long-running relay loop; polls every OUTBOX_RELAY_INTERVAL_SECONDS when idle.
+    """
+    while True:
+        try:
+            stats = await drain(session_factory)
+            if stats.claimed:
+                logger.info("Outbox relay: %s delivered, %s failed", stats.delivered, stats.failed)
+        except Exception:
+            logger.exception("Outbox relay batch failed")
+        await asyncio.sleep(settings.OUTBOX_RELAY_INTERVAL_SECONDS)
@@ -1,35 +1,86 @@
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+from datetime import datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
 
+import stripe
+from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.repositories import OrderRepository, PaymentRepository
+from app.core.config import settings
+from app.core.emails import payment_confirmation_email
+from app.db.models.orders import Order, OrderStatusEnum
+from app.db.models.payments import Payment, PaymentItem, PaymentStatusEnum
+from app.repositories import (
+    OrderRepository,
+    UserLibraryRepository,
+    UserRepository,
+)
+from app.services import outbox
+from app.services.user_locks import ORDERS, user_lock
 
 
-async def create_stripe_checkout_session(db: AsyncSession, user_id: int, order_id: int) -> str:
-    """
-    Repository-driven check that order exists and belongs to user.
-    Stripe integration is implemented elsewhere; here we keep it minimal.
-    """
+def _utcnow_naive() -> datetime:
+    return datetime.utcnow()
+
+
+def _money_to_cents(value: Decimal) -> int:
+    # Stripe takes amounts in the currency's smallest unit
+    return int((value * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+async def _pending_order(db: AsyncSession, user_id: int, order_id: int) -> Order:
     order = await OrderRepository.get_for_user(db, user_id, order_id)
     if order is None:
         raise ValueError("Order not found")
-
-    if str(order.status.value) != "pending":
+    if order.status != OrderStatusEnum.pending:
         raise ValueError("Only pending orders can be paid")
+    return order
 
-    # Revalidate totals before payment
-    total = Decimal("0.00")
-    for item in order.items:
-        total += Decimal(str(item.price_at_order))
 
-    order.total_amount = total
-    await session.commit()
+def _reusable_checkout_url(order: Order) -> str | None:
+    reuse_until = _utcnow_naive() + timedelta(
+        seconds=settings.STRIPE_CHECKOUT_REUSE_MARGIN_SECONDS
+    )
+    if (
+        order.checkout_url
+        and order.checkout_expires_at is not None
+        and order.checkout_expires_at > reuse_until
+    ):
+        return order.checkout_url
+    return None
 
-    stripe.api_key = settings.STRIPE_SECRET_KEY
 
-    checkout = stripe.checkout.Session.create(
+async def create_stripe_checkout_session(db: AsyncSession, user_id: int, order_id: int) -> str:
+    """
+    Open a Stripe Checkout session for a pending order of the user (or reuse the open one).
+
+    The order is checked, and the session stored, under the user's ORDERS lock; the Stripe round
+    trip runs between the two, outside the lock and off the event loop.
+    """
+    async with user_lock(db, user_id, ORDERS):
+        try:
+            order = await _pending_order(db, user_id, order_id)
+        except ValueError:
+            await db.rollback()
+            raise
+        # a retry or a second tab gets the session already opened for this order
+        if (checkout_url := _reusable_checkout_url(order)) is not None:
+            await db.commit()
+            return checkout_url
+
+        # Revalidate totals before payment
+        total = Decimal("0.00")
+        for item in order.items:
+            total += Decimal(str(item.price_at_order))
+        order.total_amount = total
+        await db.commit()
+
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    checkout = await asyncio.to_thread(
+        stripe.checkout.Session.create,
         mode="payment",
         success_url=settings.STRIPE_SUCCESS_URL,
         cancel_url=settings.STRIPE_CANCEL_URL,
@@ -38,17 +89,34 @@ async def create_stripe_checkout_session(db: AsyncSession, user_id: int, order_i
                 "price_data": {
                     "currency": settings.STRIPE_CURRENCY,
                     "unit_amount": _money_to_cents(total),
-                    "product_data": {"name": f"Order #{order.id}"},
+                    "product_data": {"name": f"Order #{order_id}"},
                 },
                 "quantity": 1,
             }
         ],
         metadata={
-            "order_id": str(order.id),
+            "order_id": str(order_id),
             "user_id": str(user_id),
         },
     )
 
+    async with user_lock(db, user_id, ORDERS):
+        try:
+            # canceled (or paid) while Stripe was answering
+            order = await _pending_order(db, user_id, order_id)
+        except ValueError:
+            await db.rollback()
+            raise
+        # a concurrent request stored its session first: hand out that one
+        if (checkout_url := _reusable_checkout_url(order)) is not None:
+            await db.commit()
+            return checkout_url
+
+        order.checkout_session_id = checkout.id
+        order.checkout_url = checkout.url
+        order.checkout_expires_at = datetime.utcfromtimestamp(checkout.expires_at)
+        await db.commit()
+
     return checkout.url  # type: ignore[return-value]
 
 
@@ -59,8 +127,30 @@ async def _mark_order_paid_and_create_payment(
     user_id: int,
     external_payment_id: str | None,
     amount: Decimal,
-) -> None:
+) -> bool:
+    """
+    Returns True when this call moved the order to paid (False for unknown / already handled).
+    """
+    # a cancellation racing the webhook either lands first (and the order is not pending) or
+    # waits for the payment to commit
+    async with user_lock(session, user_id, ORDERS):
+        return await _mark_order_paid_locked(
+            session,
+            order_id=order_id,
+            user_id=user_id,
+            external_payment_id=external_payment_id,
+            amount=amount,
+        )
 
+
+async def _mark_order_paid_locked(
+    session: AsyncSession,
+    *,
+    order_id: int,
+    user_id: int,
+    external_payment_id: str | None,
+    amount: Decimal,
+) -> bool:
     stmt = (
         select(Order)
         .where(and_(Order.id == order_id, Order.user_id == user_id))
@@ -69,13 +159,13 @@ async def _mark_order_paid_and_create_payment(
     res = await session.execute(stmt)
     order = res.scalar_one_or_none()
     if order is None:
-        return
+        return False
 
     if order.status == OrderStatusEnum.paid:
-        return
+        return False
 
     if order.status != OrderStatusEnum.pending:
-        return
+        return False
 
     payment = Payment(
         user_id=user_id,
@@ -97,7 +187,18 @@ async def _mark_order_paid_and_create_payment(
         )
 
     order.status = OrderStatusEnum.paid
+    # the library makes "already purchased" a primary-key lookup for cart and orders
+    await UserLibraryRepository.add_from_order(session, order_id, _utcnow_naive())
+
+    # recorded with the payment: the confirmation exists only if the payment commits
+    user = await UserRepository.get_by_id(session, user_id)
+    if user is not None:
+        outbox.enqueue_email(
+            session, payment_confirmation_email(user.email, order_id, str(amount))
+        )
+
     await session.commit()
+    return True
 
 
 async def process_stripe_webhook(
@@ -0,0 +1,98 @@
+"""
+Roles and permissions.
+
+`user_groups` is tiny and effectively static, so it is loaded once per process into an immutable
+id -> role map; authorization then compares integers and never touches the ORM relationship
+(`User.group` would lazy-load in async context). Roles form a hierarchy: each role holds the
+permissions of the roles below it.
+"""
+from __future__ import annotations
+
+import enum
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.accounts import UserGroup, UserGroupEnum
+
+
+class Permission(enum.IntFlag):
+    BROWSE_CATALOG = enum.auto()
+    PURCHASE = enum.auto()
+    MANAGE_CATALOG = enum.auto()
+    VIEW_ANY_CART = enum.auto()
+    VIEW_ALL_PAYMENTS = enum.auto()
+
+
+_USER_PERMISSIONS = Permission.BROWSE_CATALOG | Permission.PURCHASE
+_MODERATOR_PERMISSIONS = _USER_PERMISSIONS | Permission.MANAGE_CATALOG
+_ADMIN_PERMISSIONS = (
+    _MODERATOR_PERMISSIONS | Permission.VIEW_ANY_CART | Permission.VIEW_ALL_PAYMENTS
+)
+
+ROLE_PERMISSIONS: Mapping[UserGroupEnum, Permission] = MappingProxyType(
+    {
+        UserGroupEnum.USER: _USER_PERMISSIONS,
+        UserGroupEnum.MODERATOR: _MODERATOR_PERMISSIONS,
+        UserGroupEnum.ADMIN: _ADMIN_PERMISSIONS,
+    }
+)
+
+
+def has_permission(role: UserGroupEnum, permission: Permission) -> bool:
+    return ROLE_PERMISSIONS[role] & permission == permission
+
+
+@dataclass(frozen=True, slots=True)
+class GroupMap:
+    by_id: Mapping[int, UserGroupEnum]
+    by_role: Mapping[UserGroupEnum, int]
+
+
+_groups: GroupMap | None = None
+
+
+async def _load_groups(db: AsyncSession) -> GroupMap:
+    res = await db.execute(select(UserGroup.id, UserGroup.name))
+    by_id = {int(group_id): UserGroupEnum(name) for group_id, name in res.all()}
+    return GroupMap(
+        by_id=MappingProxyType(by_id),
+        by_role=MappingProxyType({role: group_id for group_id, role in by_id.items()}),
+    )
+
+
+async def get_group_map(db: AsyncSession, *, refresh: bool = False) -> GroupMap:
+    """
+    Process-wide map, loaded on first use; concurrent first loads are harmless (same result).
+    """
+    global _groups
+
+    if _groups is None or refresh:
+        _groups = await _load_groups(db)
+    return _groups
+
+
+async def role_for_group(db: AsyncSession, group_id: int) -> UserGroupEnum:
+    groups = await get_group_map(db)
+    if group_id not in groups.by_id:
+        # a group created after the map was loaded
+        groups = await get_group_map(db, refresh=True)
+    return groups.by_id[group_id]
+
+
+async def group_id_for(db: AsyncSession, role: UserGroupEnum) -> int:
+    groups = await get_group_map(db)
+    if role not in groups.by_role:
+        groups = await get_group_map(db, refresh=True)
+    if role not in groups.by_role:
+        raise RuntimeError(f"User group {role.value} is missing; run scripts/init_db.py")
+    return groups.by_role[role]
+
+
+def reset() -> None:
+    global _groups
+
+    _groups = None
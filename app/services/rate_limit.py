@@ -0,0 +1,217 @@
+"""
+Rate limiting for the unauthenticated account endpoints (login, register, password reset).
+
+Sliding-window counters: a hit is allowed while
+
+    previous_window_count * (1 - elapsed_fraction) + current_window_count + 1 <= limit
+
+which approximates a true sliding window with two integers per key. Only allowed hits are counted,
+so a client that keeps hammering still gets `limit` attempts per window, never a permanent lock.
+
+Backends: "memory" (per process, default) and "redis" (shared across workers; one Lua call per
+hit). The checks run at the top of the endpoint, before any DB query or password hash.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+from app.core.config import settings
+from app.core.exceptions import RateLimitExceededError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimit:
+    limit: int
+    window_seconds: int
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimitResult:
+    allowed: bool
+    retry_after: int = 0
+
+
+def _decide(rule: RateLimit, now: float, current: int, previous: int) -> RateLimitResult:
+    window = rule.window_seconds
+    elapsed = (now % window) / window
+    estimate = previous * (1 - elapsed) + current
+    if estimate + 1 <= rule.limit:
+        return RateLimitResult(allowed=True)
+
+    if current + 1 > rule.limit:
+        # the current window alone is full: wait for it to become the previous one and decay
+        retry_after = window * (1 - elapsed)
+    else:
+        # wait until the previous window's weight has decayed enough for one more hit
+        needed_elapsed = 1 - (rule.limit - current - 1) / previous
+        retry_after = (needed_elapsed - elapsed) * window
+    return RateLimitResult(allowed=False, retry_after=max(1, math.ceil(retry_after)))
+
+
+class RateLimiter(Protocol):
+    async def hit(self, key: str, rule: RateLimit) -> RateLimitResult: ...
+
+
+class InMemoryRateLimiter:
+    """
+    Per-process counters; enough for a single worker or as a fallback. Entries for windows that
+    no longer matter are pruned once the table grows past `max_keys`.
+    """
+
+    def __init__(self, max_keys: int = 100_000, clock: Any = time.time) -> None:
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> [window index, current count, previous count, window seconds]
+        self._counters: dict[str, list[int]] = {}
+
+    def _prune(self, now: float) -> None:
+        # counters older than the previous window no longer affect any decision
+        stale = [
+            key
+            for key, (window_index, _, _, window) in self._counters.items()
+            if window_index < now // window - 1
+        ]
+        for key in stale:
+            del self._counters[key]
+
+    async def hit(self, key: str, rule: RateLimit) -> RateLimitResult:
+        now = self.clock()
+        window_index = int(now // rule.window_seconds)
+
+        counter = self._counters.get(key)
+        if counter is None:
+            if len(self._counters) >= self.max_keys:
+                self._prune(now)
+            counter = self._counters[key] = [window_index, 0, 0, rule.window_seconds]
+        elif counter[0] != window_index:
+            previous = counter[1] if counter[0] == window_index - 1 else 0
+            counter[:] = [window_index, 0, previous, rule.window_seconds]
+
+        result = _decide(rule, now, counter[1], counter[2])
+        if result.allowed:
+            counter[1] += 1
+        return result
+
+    def clear(self) -> None:
+        self._counters.clear()
+
+
+# KEYS: current window key, previous window key | ARGV: limit, previous window weight, ttl
+_HIT_LUA = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * tonumber(ARGV[2]) + current + 1 > tonumber(ARGV[1]) then
+    return {0, current, previous}
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {1, current, previous}
+"""
+
+
+class RedisRateLimiter:
+    """
+    Counters shared by all workers. If Redis is unreachable the limiter fails open: throttling
+    is a protection, not a reason to refuse logins.
+    """
+
+    PREFIX = "ratelimit:"
+
+    def __init__(self, client: Any, clock: Any = time.time) -> None:
+        self.client = client
+        self.clock = clock
+        self._hit = client.register_script(_HIT_LUA)
+
+    @classmethod
+    def from_url(cls, url: str) -> RedisRateLimiter:
+        from redis.asyncio import Redis
+
+        return cls(Redis.from_url(url, decode_responses=True))
+
+    async def hit(self, key: str, rule: RateLimit) -> RateLimitResult:
+        now = self.clock()
+        window = rule.window_seconds
+        window_index = int(now // window)
+        elapsed = (now % window) / window
+        try:
+            allowed, current, previous = await self._hit(
+                keys=[
+                    f"{self.PREFIX}{key}:{window_index}",
+                    f"{self.PREFIX}{key}:{window_index - 1}",
+                ],
+                args=[rule.limit, 1 - elapsed, 2 * window],
+            )
+        except Exception as exc:
+            logger.warning("Rate limiter unavailable, allowing request: %s", exc)
+            return RateLimitResult(allowed=True)
+
+        if allowed:
+            return RateLimitResult(allowed=True)
+        return _decide(rule, now, int(current), int(previous))
+
+
+_limiter: RateLimiter | None = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+
+    if _limiter is None:
+        if settings.RATE_LIMIT_BACKEND == "redis":
+            _limiter = RedisRateLimiter.from_url(settings.REDIS_URL)
+        else:
+            _limiter = InMemoryRateLimiter(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    return _limiter
+
+
+def set_rate_limiter(limiter: RateLimiter | None) -> None:
+    global _limiter
+
+    _limiter = limiter
+
+
+# -------------------------
+# Account endpoint rules
+# -------------------------
+
+
+def _rules(scope: str) -> tuple[RateLimit, RateLimit | None]:
+    window = settings.RATE_LIMIT_WINDOW_SECONDS
+    per_ip = {
+        "login": settings.RATE_LIMIT_LOGIN_PER_IP,
+        "register": settings.RATE_LIMIT_REGISTER_PER_IP,
+        "password_reset": settings.RATE_LIMIT_PASSWORD_RESET_PER_IP,
+    }[scope]
+    per_email = {
+        "login": settings.RATE_LIMIT_LOGIN_PER_EMAIL,
+        "register": None,
+        "password_reset": settings.RATE_LIMIT_PASSWORD_RESET_PER_EMAIL,
+    }[scope]
+    return (
+        RateLimit(per_ip, window),
+        RateLimit(per_email, window) if per_email is not None else None,
+    )
+
+
+async def enforce(scope: str, client_ip: str, email: str | None = None) -> None:
+    """
+    Count one attempt for the client IP (and the target email); raises RateLimitExceededError.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    limiter = get_rate_limiter()
+    ip_rule, email_rule = _rules(scope)
+
+    result = await limiter.hit(f"{scope}:ip:{client_ip}", ip_rule)
+    if result.allowed and email_rule is not None and email:
+        result = await limiter.hit(f"{scope}:email:{email.strip().lower()}", email_rule)
+
+    if not result.allowed:
+        raise RateLimitExceededError("Too many attempts, try again later", result.retry_after)
@@ -0,0 +1,196 @@
+"""
+Refresh token storage.
+
+Only a SHA-256 digest of each token is kept. Two backends:
+
+- "db" (default): `refresh_tokens` rows; rotation is one UPDATE ... RETURNING, expired rows are
+  pruned by the cleanup task.
+- "redis": one key per token with a native TTL plus a per-user index set; rotation, revocation
+  and "revoke all" are single Lua scripts, so nothing accumulates and nothing needs pruning.
+  Redis writes are not part of the SQL transaction of the caller.
+"""
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+from typing import Any, Protocol
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.accounts import RefreshToken
+from app.repositories import RefreshTokenRepository
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def _utcnow_naive() -> datetime:
+    return datetime.utcnow()
+
+
+class RefreshTokenStore(Protocol):
+    async def add(
+        self, db: AsyncSession, user_id: int, token: str, expires_at: datetime
+    ) -> None: ...
+
+    async def rotate(
+        self,
+        db: AsyncSession,
+        old_token: str,
+        new_token: str,
+        user_id: int,
+        expires_at: datetime,
+    ) -> bool: ...
+
+    async def revoke(self, db: AsyncSession, token: str) -> None: ...
+
+    async def revoke_all(self, db: AsyncSession, user_id: int) -> None: ...
+
+
+class SqlRefreshTokenStore:
+    async def add(self, db: AsyncSession, user_id: int, token: str, expires_at: datetime) -> None:
+        db.add(RefreshToken(user_id=user_id, token_hash=token_digest(token), expires_at=expires_at))
+        await db.flush()
+
+    async def rotate(
+        self,
+        db: AsyncSession,
+        old_token: str,
+        new_token: str,
+        user_id: int,
+        expires_at: datetime,
+    ) -> bool:
+        return await RefreshTokenRepository.rotate(
+            db,
+            token_digest(old_token),
+            token_digest(new_token),
+            user_id,
+            expires_at,
+            _utcnow_naive(),
+        )
+
+    async def revoke(self, db: AsyncSession, token: str) -> None:
+        await RefreshTokenRepository.delete_by_hash(db, token_digest(token))
+
+    async def revoke_all(self, db: AsyncSession, user_id: int) -> None:
+        await RefreshTokenRepository.delete_for_user(db, user_id)
+
+
+# KEYS: old token key, new token key, user index | ARGV: user id, ttl, old digest, new digest
+_ROTATE_LUA = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('SET', KEYS[2], ARGV[1], 'EX', ARGV[2])
+redis.call('SREM', KEYS[3], ARGV[3])
+redis.call('SADD', KEYS[3], ARGV[4])
+redis.call('EXPIRE', KEYS[3], ARGV[2])
+return 1
+"""
+
+# KEYS: token key | ARGV: digest, user index prefix
+_REVOKE_LUA = """
+local user_id = redis.call('GET', KEYS[1])
+if not user_id then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('SREM', ARGV[2] .. user_id, ARGV[1])
+return 1
+"""
+
+# KEYS: user index | ARGV: token key prefix
+_REVOKE_ALL_LUA = """
+local digests = redis.call('SMEMBERS', KEYS[1])
+for _, digest in ipairs(digests) do
+    redis.call('DEL', ARGV[1] .. digest)
+end
+redis.call('DEL', KEYS[1])
+return #digests
+"""
+
+
+class RedisRefreshTokenStore:
+    TOKEN_PREFIX = "refresh:token:"
+    USER_PREFIX = "refresh:user:"
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+        self._rotate = client.register_script(_ROTATE_LUA)
+        self._revoke = client.register_script(_REVOKE_LUA)
+        self._revoke_all = client.register_script(_REVOKE_ALL_LUA)
+
+    @classmethod
+    def from_url(cls, url: str) -> RedisRefreshTokenStore:
+        from redis.asyncio import Redis
+
+        return cls(Redis.from_url(url, decode_responses=True))
+
+    def _token_key(self, token: str) -> str:
+        return self.TOKEN_PREFIX + token_digest(token).hex()
+
+    def _user_key(self, user_id: int) -> str:
+        return f"{self.USER_PREFIX}{user_id}"
+
+    @staticmethod
+    def _ttl(expires_at: datetime) -> int:
+        return max(1, int((expires_at - _utcnow_naive()).total_seconds()))
+
+    async def add(self, db: AsyncSession, user_id: int, token: str, expires_at: datetime) -> None:
+        ttl = self._ttl(expires_at)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self._token_key(token), str(user_id), ex=ttl)
+            pipe.sadd(self._user_key(user_id), token_digest(token).hex())
+            pipe.expire(self._user_key(user_id), ttl)
+            await pipe.execute()
+
+    async def rotate(
+        self,
+        db: AsyncSession,
+        old_token: str,
+        new_token: str,
+        user_id: int,
+        expires_at: datetime,
+    ) -> bool:
+        rotated = await self._rotate(
+            keys=[self._token_key(old_token), self._token_key(new_token), self._user_key(user_id)],
+            args=[
+                str(user_id),
+                self._ttl(expires_at),
+                token_digest(old_token).hex(),
+                token_digest(new_token).hex(),
+            ],
+        )
+        return bool(rotated)
+
+    async def revoke(self, db: AsyncSession, token: str) -> None:
+        await self._revoke(
+            keys=[self._token_key(token)],
+            args=[token_digest(token).hex(), self.USER_PREFIX],
+        )
+
+    async def revoke_all(self, db: AsyncSession, user_id: int) -> None:
+        await self._revoke_all(keys=[self._user_key(user_id)], args=[self.TOKEN_PREFIX])
+
+
+_store: RefreshTokenStore | None = None
+
+
+def get_refresh_token_store() -> RefreshTokenStore:
+    global _store
+
+    if _store is None:
+        if settings.REFRESH_TOKEN_BACKEND == "redis":
+            _store = RedisRefreshTokenStore.from_url(settings.REDIS_URL)
+        else:
+            _store = SqlRefreshTokenStore()
+    return _store
+
+
+def set_refresh_token_store(store: RefreshTokenStore | None) -> None:
+    global _store
+
+    _store = store
@@ -0,0 +1,117 @@
+"""
+Purge of expired token rows (activation, password reset, refresh, revoked access tokens) and of
+expired idempotency keys.
+
+One implementation for every such table: rows are deleted in bounded batches, walking the
+primary key upwards, each batch in its own short transaction with a pause in between. Large
+backlogs therefore never hold long locks or produce one huge WAL burst, and API writes interleave
+with the purge. Per-table row counts and batch latencies are logged and returned.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.repositories import (
+    ActivationTokenRepository,
+    IdempotencyKeyRepository,
+    PasswordResetTokenRepository,
+    RefreshTokenRepository,
+    RevokedAccessTokenRepository,
+)
+from app.repositories.base import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+PURGED_REPOSITORIES: tuple[type[BaseRepository], ...] = (
+    ActivationTokenRepository,
+    PasswordResetTokenRepository,
+    RefreshTokenRepository,
+    RevokedAccessTokenRepository,
+    IdempotencyKeyRepository,
+)
+
+
+@dataclass(slots=True)
+class PurgeStats:
+    table: str
+    deleted: int = 0
+    batches: int = 0
+    total_ms: float = 0.0
+    max_batch_ms: float = 0.0
+
+    @property
+    def avg_batch_ms(self) -> float:
+        return self.total_ms / self.batches if self.batches else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "avg_batch_ms": round(self.avg_batch_ms, 2)}
+
+
+def _utcnow_naive() -> datetime:
+    return datetime.utcnow()
+
+
+async def purge_table(
+    db: AsyncSession,
+    repository: type[BaseRepository],
+    now: datetime,
+    *,
+    batch_size: int,
+    pause_seconds: float,
+) -> PurgeStats:
+    stats = PurgeStats(table=repository.model.__tablename__)
+    after_id = 0
+    while True:
+        started = time.perf_counter()
+        deleted = await repository.delete_expired_batch(
+            db, now, after_id=after_id, limit=batch_size
+        )
+        await db.commit()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        stats.batches += 1
+        stats.deleted += len(deleted)
+        stats.total_ms += elapsed_ms
+        stats.max_batch_ms = max(stats.max_batch_ms, elapsed_ms)
+
+        if len(deleted) < batch_size:
+            return stats
+        after_id = deleted[-1]
+        if pause_seconds:
+            await asyncio.sleep(pause_seconds)
+
+
+async def purge_expired_tokens(
+    session_factory: async_sessionmaker[AsyncSession],
+    *,
+    batch_size: int | None = None,
+    pause_seconds: float | None = None,
+    now: datetime | None = None,
+) -> list[PurgeStats]:
+    batch_size = batch_size or settings.TOKEN_PURGE_BATCH_SIZE
+    pause_seconds = settings.TOKEN_PURGE_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+    now = now or _utcnow_naive()
+
+    report: list[PurgeStats] = []
+    async with session_factory() as session:
+        for repository in PURGED_REPOSITORIES:
+            stats = await purge_table(
+                session, repository, now, batch_size=batch_size, pause_seconds=pause_seconds
+            )
+            logger.info(
+                "Purged %s expired rows from %s in %s batches (avg %.1f ms, max %.1f ms)",
+                stats.deleted,
+                stats.table,
+                stats.batches,
+                stats.avg_batch_ms,
+                stats.max_batch_ms,
+            )
+            report.append(stats)
+    return report
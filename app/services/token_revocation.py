@@ -0,0 +1,137 @@
+"""
+Access-token revocation by `jti`.
+
+Revocations live in `revoked_access_tokens`. Each worker mirrors the unexpired jtis in a Bloom
+filter, so the common case - a token that was never revoked - is answered from memory. Only a
+filter hit (a revoked token or a rare false positive) is confirmed with one indexed lookup.
+
+The filter is synced incrementally (new rows by id) at most every
+AUTH_REVOCATION_SYNC_SECONDS, piggybacking on a request; it is rebuilt from scratch every
+AUTH_REVOCATION_REBUILD_SECONDS to shed expired entries, or when it outgrows its capacity.
+A revocation is visible immediately on the worker that made it and within the sync interval on
+the others.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import time
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.repositories import RevokedAccessTokenRepository
+
+# ids are assigned at insert but become visible at commit, possibly out of order: every
+# incremental sync re-reads this many ids below the watermark so late commits are not skipped
+_SYNC_OVERLAP_IDS = 1000
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> list[int]:
+        # double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class _RevocationFilter:
+    def __init__(self) -> None:
+        self.bloom: BloomFilter | None = None
+        self.last_id = 0
+        self.synced_at = 0.0
+        self.built_at = 0.0
+        self.lock = asyncio.Lock()
+
+    def _needs_rebuild(self, now: float) -> bool:
+        return (
+            self.bloom is None
+            or now - self.built_at >= settings.AUTH_REVOCATION_REBUILD_SECONDS
+            or self.bloom.count > self.bloom.capacity
+        )
+
+    async def _rebuild(self, db: AsyncSession, now: float) -> None:
+        rows = await RevokedAccessTokenRepository.list_after(db, 0, _utcnow_naive())
+        capacity = max(settings.AUTH_REVOCATION_FILTER_CAPACITY, 2 * len(rows))
+        bloom = BloomFilter(capacity, settings.AUTH_REVOCATION_FILTER_ERROR_RATE)
+        for _, jti in rows:
+            bloom.add(jti)
+        self.bloom = bloom
+        self.last_id = rows[-1][0] if rows else 0
+        self.built_at = self.synced_at = now
+
+    async def _sync(self, db: AsyncSession, now: float) -> None:
+        rows = await RevokedAccessTokenRepository.list_after(
+            db, max(0, self.last_id - _SYNC_OVERLAP_IDS), _utcnow_naive()
+        )
+        for row_id, jti in rows:
+            if jti not in self.bloom:  # type: ignore[operator]
+                self.bloom.add(jti)  # type: ignore[union-attr]
+            self.last_id = max(self.last_id, row_id)
+        self.synced_at = now
+
+    async def refresh(self, db: AsyncSession) -> None:
+        now = time.monotonic()
+        if self.bloom is not None and now - self.synced_at < settings.AUTH_REVOCATION_SYNC_SECONDS:
+            return
+        if self.bloom is not None and self.lock.locked():
+            return  # another request is syncing; the current filter is recent enough
+
+        async with self.lock:
+            if self.bloom is not None and now - self.synced_at < settings.AUTH_REVOCATION_SYNC_SECONDS:
+                return
+            if self._needs_rebuild(now):
+                await self._rebuild(db, now)
+            else:
+                await self._sync(db, now)
+
+    def add_local(self, jti: str) -> None:
+        if self.bloom is not None:
+            self.bloom.add(jti)
+
+
+_filter = _RevocationFilter()
+
+
+def _utcnow_naive() -> datetime:
+    return datetime.utcnow()
+
+
+async def revoke(db: AsyncSession, jti: str, expires_at: datetime) -> None:
+    """
+    Revoke an access token until its expiry; part of the caller's transaction.
+    """
+    await RevokedAccessTokenRepository.revoke(db, jti, expires_at)
+    # a false positive at worst if the transaction rolls back: the DB check decides
+    _filter.add_local(jti)
+
+
+async def is_revoked(db: AsyncSession, jti: str) -> bool:
+    await _filter.refresh(db)
+    if jti not in _filter.bloom:  # type: ignore[operator]
+        return False
+    return await RevokedAccessTokenRepository.is_revoked(db, jti)
+
+
+def reset() -> None:
+    global _filter
+
+    _filter = _RevocationFilter()
@@ -0,0 +1,62 @@
+"""
+Per-user, per-resource serialization for checkout flows.
+
+    async with user_lock(db, user_id, ORDERS):
+        ...  # read, check, write, commit
+
+On Postgres this takes `pg_advisory_xact_lock(resource, user_id)` in the caller's transaction:
+concurrent flows of one user on one resource queue up in the database - across workers - instead
+of racing into constraint violations, and the lock goes away when the transaction commits or
+rolls back. Leaving the block does not release it, so callers commit (or fail) inside the block.
+
+Other databases fall back to an in-process asyncio lock held for the duration of the block; that
+only serializes within one process and is meant for tests and single-worker setups.
+"""
+from __future__ import annotations
+
+import asyncio
+import zlib
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+CART = "cart"  # turning the cart into an order
+ORDERS = "orders"  # state changes of the user's orders: payment, cancellation
+
+
+def _resource_key(resource: str) -> int:
+    # stable across processes (unlike hash()), folded into the signed int4 Postgres expects
+    key = zlib.crc32(resource.encode())
+    return key - (1 << 32) if key >= 1 << 31 else key
+
+
+_local_locks: dict[tuple[str, int], tuple[asyncio.Lock, int]] = {}
+
+
+@asynccontextmanager
+async def _local_lock(resource: str, user_id: int) -> AsyncIterator[None]:
+    key = (resource, user_id)
+    lock, users = _local_locks.get(key, (asyncio.Lock(), 0))
+    _local_locks[key] = (lock, users + 1)
+    try:
+        async with lock:
+            yield
+    finally:
+        lock, users = _local_locks[key]
+        if users == 1:
+            del _local_locks[key]
+        else:
+            _local_locks[key] = (lock, users - 1)
+
+
+@asynccontextmanager
+async def user_lock(db: AsyncSession, user_id: int, resource: str) -> AsyncIterator[None]:
+    if db.get_bind().dialect.name != "postgresql":
+        async with _local_lock(resource, user_id):
+            yield
+        return
+
+    await db.execute(select(func.pg_advisory_xact_lock(_resource_key(resource), user_id)))
+    yield
@@ -0,0 +1,71 @@
+"""
+Short-TTL, per-worker cache of the user fields that authorization depends on.
+
+Access tokens carry `ver` (users.token_version); a request is accepted only while it matches the
+cached state, so bumping the version revokes every outstanding access token. The bump is visible
+immediately in the worker that made it (the entry is dropped) and in other workers once their
+entry expires (AUTH_USER_CACHE_TTL_SECONDS).
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.accounts import UserGroupEnum
+from app.repositories import UserRepository
+from app.services import permissions
+
+
+@dataclass(frozen=True, slots=True)
+class UserState:
+    group: UserGroupEnum
+    is_active: bool
+    token_version: int
+
+
+_cache: dict[int, tuple[float, UserState]] = {}
+
+
+def _evict(now: float) -> None:
+    for user_id in [uid for uid, (expires, _) in _cache.items() if expires <= now]:
+        del _cache[user_id]
+    while len(_cache) >= settings.AUTH_USER_CACHE_MAX_ENTRIES:
+        # dicts keep insertion order: drop the oldest entry
+        del _cache[next(iter(_cache))]
+
+
+async def get_user_state(db: AsyncSession, user_id: int) -> UserState | None:
+    now = time.monotonic()
+    cached = _cache.get(user_id)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    row = await UserRepository.get_auth_state(db, user_id)
+    if row is None:
+        _cache.pop(user_id, None)
+        return None
+
+    state = UserState(
+        group=await permissions.role_for_group(db, row.group_id),
+        is_active=bool(row.is_active),
+        token_version=int(row.token_version),
+    )
+    if len(_cache) >= settings.AUTH_USER_CACHE_MAX_ENTRIES:
+        _evict(now)
+    _cache[user_id] = (now + settings.AUTH_USER_CACHE_TTL_SECONDS, state)
+    return state
+
+
+def invalidate(user_id: int) -> None:
+    """
+    Drop a cached entry; call after committing a token_version bump so the new state is re-read.
+    """
+    _cache.pop(user_id, None)
+
+
+def clear() -> None:
+    _cache.clear()
+
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.celery_app import celery
+from app.core.config import settings
+from app.services.cart_store import RedisCartStore
+
+
+async def _flush() -> int:
+    # asyncio.run() gives every task a fresh loop: neither asyncpg nor redis connections can be
+    # shared across loops, so both are created per run
+    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    store = RedisCartStore.from_url(settings.REDIS_URL)
+    try:
+        return await store.flush_dirty(
+            async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False),
+            settings.CART_FLUSH_BATCH_SIZE,
+        )
+    finally:
+        await store.client.aclose()
+        await engine.dispose()
+
+
+@celery.task(name="app.tasks.cart.flush_carts", ignore_result=True)
+def flush_carts() -> int:
+    """
+    Write carts changed in Redis back to Postgres (CART_BACKEND="redis"); safe to overlap, since
+    flushes of one cart serialize on its row lock.
+    """
+    if settings.CART_BACKEND != "redis":
+        return 0
+    return asyncio.run(_flush())
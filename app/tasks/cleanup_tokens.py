@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.celery_app import celery
+from app.core.config import settings
+from app.services.token_cleanup import purge_expired_tokens
+
+
+async def _cleanup() -> dict:
+    # asyncio.run() gives every task a fresh loop: asyncpg connections cannot be shared across loops
+    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    try:
+        report = await purge_expired_tokens(
+            async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        )
+    finally:
+        await engine.dispose()
+    return {stats.table: stats.as_dict() for stats in report}
+
+
+@celery.task(name="app.tasks.cleanup_tokens.cleanup_expired_tokens")
+def cleanup_expired_tokens() -> dict:
+    """
+    Purge expired activation / password reset / refresh / revoked access token rows and expired
+    idempotency keys in batches.
+    """
+    return asyncio.run(_cleanup())
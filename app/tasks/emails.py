@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import logging
+import smtplib
+from collections.abc import Sequence
+
+from celery import Task
+from celery.signals import worker_process_shutdown
+
+from app.core.celery_app import celery
+from app.core.config import settings
+from app.core.emails import build_message, close_smtp_pool, get_smtp_pool
+
+logger = logging.getLogger(__name__)
+
+Message = Sequence[str]  # (to_email, subject, body), JSON-serialized as a list
+
+
+def _is_permanent(exc: smtplib.SMTPException) -> bool:
+    # 5xx replies will not succeed on retry; 4xx, dropped connections and timeouts may
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code >= 500
+    return False
+
+
+def _backoff(retries: int) -> int:
+    return min(
+        settings.EMAIL_RETRY_BACKOFF_MAX_SECONDS,
+        settings.EMAIL_RETRY_BACKOFF_SECONDS * 2**retries,
+    )
+
+
+def _deliver(messages: Sequence[Message]) -> tuple[int, Exception | None]:
+    """
+    Send in order over one pooled connection.
+
+    Returns how many messages were handled (sent or permanently rejected) and the transient error
+    that stopped the batch, if any.
+    """
+    handled = 0
+    try:
+        with get_smtp_pool().connection() as server:
+            for to_email, subject, body in messages:
+                try:
+                    server.send_message(build_message(to_email, subject, body))
+                except smtplib.SMTPException as exc:
+                    if not _is_permanent(exc):
+                        raise
+                    logger.error("Dropping email to %s: %s", to_email, exc)
+                handled += 1
+    except OSError as exc:  # SMTPException included
+        return handled, exc
+    return handled, None
+
+
+@celery.task(
+    bind=True,
+    name="app.tasks.emails.send_email_batch",
+    acks_late=True,
+    max_retries=settings.EMAIL_MAX_RETRIES,
+)
+def send_email_batch(self: Task, messages: list[Message]) -> int:
+    """
+    Deliver a batch over one connection; a transient failure retries only the unsent tail, so
+    messages already accepted by the relay are not sent twice.
+    """
+    handled, error = _deliver(messages)
+    if error is not None:
+        raise self.retry(
+            exc=error,
+            args=(list(messages[handled:]),),
+            countdown=_backoff(self.request.retries),
+        )
+    return handled
+
+
+@worker_process_shutdown.connect
+def _close_pool(**_kwargs) -> None:
+    close_smtp_pool()
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.celery_app import celery
+from app.core.config import settings
+from app.services.outbox import drain
+
+
+async def _relay() -> dict:
+    # asyncio.run() gives every task a fresh loop: asyncpg connections cannot be shared across loops
+    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    try:
+        stats = await drain(
+            async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False),
+            max_batches=settings.OUTBOX_RELAY_MAX_BATCHES_PER_TASK,
+        )
+    finally:
+        await engine.dispose()
+    return {"delivered": stats.delivered, "failed": stats.failed}
+
+
+@celery.task(name="app.tasks.outbox.relay_outbox", ignore_result=True)
+def relay_outbox() -> dict:
+    """
+    Drain due outbox events; safe to run on many workers at once (rows are claimed with
+    SKIP LOCKED).
+    """
+    return asyncio.run(_relay())
@@ -7,11 +7,13 @@ from collections.abc import AsyncGenerator
 import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 
 from app.core.config import settings
 from app.db.session import get_db
 from app.main import app
-from app.tests.utils import truncate_all_tables
+from app.services import cart, cart_store, permissions, rate_limit, token_revocation, user_state
+from app.tests.utils import seed_user_groups, truncate_all_tables
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -27,10 +29,25 @@ def _apply_migrations() -> None:
     subprocess.run(["alembic", "upgrade", "head"], check=True)
 
 
+@pytest.fixture(autouse=True)
+def _reset_process_caches() -> None:
+    # ids restart with every TRUNCATE, so cached auth state must not outlive a test
+    user_state.clear()
+    permissions.reset()
+    token_revocation.reset()
+    cart.clear_summary_cache()
+    cart_store.set_cart_store(None)
+    # every test client shares one IP: start each test with fresh counters
+    rate_limit.set_rate_limiter(None)
+
+
 @pytest.fixture(scope="session")
 def engine():
-    # Uses DATABASE_URL from env / settings (should be test DB)
-    return create_async_engine(os.environ.get("DATABASE_URL", settings.DATABASE_URL), echo=False)
+    # Uses DATABASE_URL from env / settings (should be test DB).
+    # No pooling: every test runs in its own event loop, and asyncpg connections are loop-bound.
+    return create_async_engine(
+        os.environ.get("DATABASE_URL", settings.DATABASE_URL), echo=False, poolclass=NullPool
+    )
 
 
 @pytest.fixture(scope="session")
@@ -45,6 +62,7 @@ async def db_session(
     async with session_factory() as session:
         # Clean DB BEFORE each test for isolation
         await truncate_all_tables(session)
+        await seed_user_groups(session)
         yield session
         # Clean DB AFTER each test too (just in case)
         await truncate_all_tables(session)
@@ -65,3 +83,24 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
         yield ac
 
     app.dependency_overrides.clear()
+
+
+@pytest.fixture()
+async def concurrent_client(
+    db_session: AsyncSession, session_factory: async_sessionmaker[AsyncSession]
+) -> AsyncGenerator[AsyncClient, None]:
+    """
+    Test client with a session per request, as in production: the shared db_session cannot
+    serve concurrent requests.
+    """
+
+    async def _get_request_db() -> AsyncGenerator[AsyncSession, None]:
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = _get_request_db
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        yield ac
+
+    app.dependency_overrides.clear()
@@ -1,26 +1,22 @@
 from __future__ import annotations
 
 import uuid
+from datetime import datetime, timedelta
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models.accounts import ActivationToken
+from app.db.models.accounts import ActivationToken, PasswordResetToken, User
+from app.services import accounts as accounts_service, permissions
+from app.tests.utils import count_statements, create_user
 
 
 @pytest.mark.asyncio
 async def test_accounts_register_activate_login_refresh_logout(
     client,
     db_session: AsyncSession,
-    monkeypatch,
 ):
-    # Prevent real SMTP send
-    monkeypatch.setattr("app.api.v1.accounts.send_activation_email", lambda *args, **kwargs: None)
-    monkeypatch.setattr(
-        "app.api.v1.accounts.send_password_reset_email", lambda *args, **kwargs: None
-    )
-
     email = f"user_{uuid.uuid4().hex}@example.com"
     password = "StrongPass123!"
 
@@ -67,6 +63,8 @@ async def test_accounts_register_activate_login_refresh_logout(
     r = await client.post("/api/v1/accounts/logout", json={"refresh_token": refresh})
     assert r.status_code == 200, r.text
     assert r.json()["message"] == "Logged out"
+    # ... and the access token issued with it; the refreshed pair stays valid
+    access = data2["access_token"]
 
     # Refresh after logout should fail (most likely 400)
     r = await client.post("/api/v1/accounts/refresh", json={"refresh_token": refresh})
@@ -98,3 +96,98 @@ async def test_accounts_register_activate_login_refresh_logout(
         json={"email": email, "password": "NewStrongPass123!"},
     )
     assert r.status_code == 200, r.text
+
+    # Access token issued before the password change is revoked
+    r = await client.get("/api/v1/orders", headers={"Authorization": f"Bearer {access}"})
+    assert r.status_code == 401, r.text
+    assert r.json()["detail"] == "Token revoked"
+
+
+@pytest.mark.asyncio
+async def test_authenticated_reads_use_cached_user_state(
+    client,
+    db_session: AsyncSession,
+    monkeypatch,
+):
+    email = f"user_{uuid.uuid4().hex}@example.com"
+    password = "StrongPass123!"
+
+    r = await client.post("/api/v1/accounts/register", json={"email": email, "password": password})
+    assert r.status_code == 200, r.text
+    res = await db_session.execute(select(ActivationToken))
+    r = await client.get("/api/v1/accounts/activate", params={"token": res.scalars().first().token})
+    assert r.status_code == 200, r.text
+    r = await client.post("/api/v1/accounts/login", json={"email": email, "password": password})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    r = await client.get("/api/v1/orders", headers=headers)
+    assert r.status_code == 200, r.text
+
+    async def _no_db_lookup(*args, **kwargs):
+        raise AssertionError("user state should come from the cache")
+
+    monkeypatch.setattr("app.repositories.UserRepository.get_auth_state", _no_db_lookup)
+
+    r = await client.get("/api/v1/orders", headers=headers)
+    assert r.status_code == 200, r.text
+
+
+@pytest.mark.asyncio
+async def test_account_flows_are_single_statements(db_session: AsyncSession):
+    email = f"user_{uuid.uuid4().hex}@example.com"
+    password = "StrongPass123!"
+    await permissions.get_group_map(db_session)  # per-process, loaded once
+
+    with count_statements(db_session) as statements:
+        token = await accounts_service.register_user(db_session, email, password)
+    # user + activation token, then the outbox row for the activation email
+    assert len(statements) == 2, statements
+
+    with count_statements(db_session) as statements:
+        with pytest.raises(ValueError, match="User already exists"):
+            await accounts_service.register_user(db_session, email, password)
+    assert len(statements) == 1, statements
+    await db_session.rollback()
+
+    with count_statements(db_session) as statements:
+        await accounts_service.activate_user(db_session, token)
+    assert len(statements) == 1, statements
+
+    with count_statements(db_session) as statements:
+        reset_token = await accounts_service.request_password_reset(db_session, email)
+    assert reset_token is not None
+    assert len(statements) == 2, statements  # token upsert + outbox row
+
+    with count_statements(db_session) as statements:
+        await accounts_service.confirm_password_reset(db_session, reset_token, "NewStrongPass123!")
+    # the reset UPDATE plus revoking refresh tokens
+    assert len(statements) == 2, statements
+
+    user = (await db_session.execute(select(User).where(User.email == email))).scalar_one()
+    await db_session.refresh(user)
+    assert user.is_active
+    assert user.token_version == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_tokens_are_deleted_by_both_flows(db_session: AsyncSession):
+    yesterday = datetime.utcnow() - timedelta(days=1)
+
+    email = f"user_{uuid.uuid4().hex}@example.com"
+    token = await accounts_service.register_user(db_session, email, "StrongPass123!")
+    await db_session.execute(update(ActivationToken).values(expires_at=yesterday))
+    await db_session.commit()
+    with pytest.raises(ValueError, match="Token expired"):
+        await accounts_service.activate_user(db_session, token)
+    await db_session.rollback()
+    assert await db_session.scalar(select(ActivationToken)) is None
+    assert not await db_session.scalar(select(User.is_active).where(User.email == email))
+
+    user = await create_user(db_session)
+    reset_token = await accounts_service.request_password_reset(db_session, user.email)
+    await db_session.execute(update(PasswordResetToken).values(expires_at=yesterday))
+    await db_session.commit()
+    with pytest.raises(ValueError, match="Token expired"):
+        await accounts_service.confirm_password_reset(db_session, reset_token, "NewStrongPass123!")
+    await db_session.rollback()
+    assert await db_session.scalar(select(PasswordResetToken)) is None
@@ -7,7 +7,8 @@ import pytest
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.services import movies as movies_service
+from app.services import accounts as accounts_service, movies as movies_service
+from app.tests.utils import auth_headers
 
 # -------------------------
 # Helpers
@@ -17,13 +18,7 @@ from app.services import movies as movies_service
 async def _register_activate_login(
     client,
     db_session: AsyncSession,
-    monkeypatch,
 ) -> tuple[int, str]:
-    monkeypatch.setattr("app.api.v1.accounts.send_activation_email", lambda *args, **kwargs: None)
-    monkeypatch.setattr(
-        "app.api.v1.accounts.send_password_reset_email", lambda *args, **kwargs: None
-    )
-
     email = f"user_{uuid.uuid4().hex}@example.com"
     password = "StrongPass123!"
 
@@ -50,36 +45,20 @@ async def _register_activate_login(
     return user.id, access
 
 
-async def _ensure_admin_group_and_promote(db_session: AsyncSession, user_id: int) -> None:
-    from app.db.models.accounts import User, UserGroup
-
-    try:
-        from app.db.models.accounts import UserGroupEnum  # type: ignore
-
-        admin_name = UserGroupEnum.ADMIN  # enum value
-        admin_name_str = "ADMIN"
-    except Exception:
-        admin_name = "ADMIN"
-        admin_name_str = "ADMIN"
+async def _promote_to_admin(db_session: AsyncSession, user_id: int) -> dict[str, str]:
+    """
+    Move the user to the ADMIN group and return headers with a fresh token: the group change
+    bumps token_version, which revokes the login token.
+    """
+    from app.db.models.accounts import User, UserGroupEnum
 
-    # Find ADMIN group
-    stmt = select(UserGroupModel).where(
-        (UserGroupModel.name == admin_name) | (UserGroupModel.name == admin_name_str)  # type: ignore[operator]
+    await accounts_service.change_user_group(db_session, user_id, UserGroupEnum.ADMIN)
+    res = await db_session.execute(
+        select(User).where(User.id == user_id).execution_options(populate_existing=True)
     )
-    res = await db_session.execute(stmt)
-    admin_group = res.scalars().first()
-    if admin_group is None:
-        admin_group = UserGroup(name="ADMIN")
-        db_session.add(admin_group)
-        await db_session.commit()
-        await db_session.refresh(admin_group)
-
-    res = await db_session.execute(select(User).where(User.id == user_id))
     user = res.scalars().first()
     assert user is not None
-
-    user.group_id = admin_group.id
-    await db_session.commit()
+    return auth_headers(user, UserGroupEnum.ADMIN)
 
 
 async def _create_movie_for_tests(db: AsyncSession):
@@ -119,8 +98,8 @@ async def _create_movie_for_tests(db: AsyncSession):
 
 
 @pytest.mark.asyncio
-async def test_cart_add_duplicate_movie_returns_400(client, db_session: AsyncSession, monkeypatch):
-    _, access = await _register_activate_login(client, db_session, monkeypatch)
+async def test_cart_add_duplicate_movie_returns_400(client, db_session: AsyncSession):
+    _, access = await _register_activate_login(client, db_session)
     headers = {"Authorization": f"Bearer {access}"}
 
     movie = await _create_movie_for_tests(db_session)
@@ -134,8 +113,8 @@ async def test_cart_add_duplicate_movie_returns_400(client, db_session: AsyncSes
 
 
 @pytest.mark.asyncio
-async def test_cart_remove_not_in_cart_returns_404(client, db_session: AsyncSession, monkeypatch):
-    _, access = await _register_activate_login(client, db_session, monkeypatch)
+async def test_cart_remove_not_in_cart_returns_404(client, db_session: AsyncSession):
+    _, access = await _register_activate_login(client, db_session)
     headers = {"Authorization": f"Bearer {access}"}
 
     movie = await _create_movie_for_tests(db_session)
@@ -151,10 +130,8 @@ async def test_cart_remove_not_in_cart_returns_404(client, db_session: AsyncSess
 
 
 @pytest.mark.asyncio
-async def test_create_order_with_empty_cart_returns_400(
-    client, db_session: AsyncSession, monkeypatch
-):
-    _, access = await _register_activate_login(client, db_session, monkeypatch)
+async def test_create_order_with_empty_cart_returns_400(client, db_session: AsyncSession):
+    _, access = await _register_activate_login(client, db_session)
     headers = {"Authorization": f"Bearer {access}"}
 
     r = await client.post("/api/v1/orders", headers=headers)
@@ -163,8 +140,8 @@ async def test_create_order_with_empty_cart_returns_400(
 
 
 @pytest.mark.asyncio
-async def test_cancel_order_not_found_returns_404(client, db_session: AsyncSession, monkeypatch):
-    _, access = await _register_activate_login(client, db_session, monkeypatch)
+async def test_cancel_order_not_found_returns_404(client, db_session: AsyncSession):
+    _, access = await _register_activate_login(client, db_session)
     headers = {"Authorization": f"Bearer {access}"}
 
     r = await client.post("/api/v1/orders/999999/cancel", headers=headers)
@@ -173,8 +150,8 @@ async def test_cancel_order_not_found_returns_404(client, db_session: AsyncSessi
 
 
 @pytest.mark.asyncio
-async def test_create_then_cancel_order_success(client, db_session: AsyncSession, monkeypatch):
-    _, access = await _register_activate_login(client, db_session, monkeypatch)
+async def test_create_then_cancel_order_success(client, db_session: AsyncSession):
+    _, access = await _register_activate_login(client, db_session)
     headers = {"Authorization": f"Bearer {access}"}
 
     movie = await _create_movie_for_tests(db_session)
@@ -197,8 +174,8 @@ async def test_create_then_cancel_order_success(client, db_session: AsyncSession
 
 
 @pytest.mark.asyncio
-async def test_cart_admin_requires_admin(client, db_session: AsyncSession, monkeypatch):
-    target_user_id, target_access = await _register_activate_login(client, db_session, monkeypatch)
+async def test_cart_admin_requires_admin(client, db_session: AsyncSession):
+    target_user_id, target_access = await _register_activate_login(client, db_session)
     target_headers = {"Authorization": f"Bearer {target_access}"}
 
     movie = await _create_movie_for_tests(db_session)
@@ -212,9 +189,9 @@ async def test_cart_admin_requires_admin(client, db_session: AsyncSession, monke
 
 
 @pytest.mark.asyncio
-async def test_cart_admin_can_view_other_user_cart(client, db_session: AsyncSession, monkeypatch):
+async def test_cart_admin_can_view_other_user_cart(client, db_session: AsyncSession):
     # Create target user with cart items
-    target_user_id, target_access = await _register_activate_login(client, db_session, monkeypatch)
+    target_user_id, target_access = await _register_activate_login(client, db_session)
     target_headers = {"Authorization": f"Bearer {target_access}"}
 
     movie = await _create_movie_for_tests(db_session)
@@ -222,9 +199,8 @@ async def test_cart_admin_can_view_other_user_cart(client, db_session: AsyncSess
     assert r.status_code == 200, r.text
 
     # Create admin user and promote
-    admin_user_id, admin_access = await _register_activate_login(client, db_session, monkeypatch)
-    await _ensure_admin_group_and_promote(db_session, admin_user_id)
-    admin_headers = {"Authorization": f"Bearer {admin_access}"}
+    admin_user_id, _ = await _register_activate_login(client, db_session)
+    admin_headers = await _promote_to_admin(db_session, admin_user_id)
 
     r = await client.get(f"/api/v1/cart/admin/{target_user_id}", headers=admin_headers)
     assert r.status_code == 200, r.text
@@ -235,8 +211,8 @@ async def test_cart_admin_can_view_other_user_cart(client, db_session: AsyncSess
 
 
 @pytest.mark.asyncio
-async def test_payments_admin_requires_admin(client, db_session: AsyncSession, monkeypatch):
-    _, access = await _register_activate_login(client, db_session, monkeypatch)
+async def test_payments_admin_requires_admin(client, db_session: AsyncSession):
+    _, access = await _register_activate_login(client, db_session)
     headers = {"Authorization": f"Bearer {access}"}
 
     r = await client.get("/api/v1/payments/admin", headers=headers)
@@ -244,10 +220,9 @@ async def test_payments_admin_requires_admin(client, db_session: AsyncSession, m
 
 
 @pytest.mark.asyncio
-async def test_payments_admin_returns_list_for_admin(client, db_session: AsyncSession, monkeypatch):
-    admin_user_id, admin_access = await _register_activate_login(client, db_session, monkeypatch)
-    await _ensure_admin_group_and_promote(db_session, admin_user_id)
-    headers = {"Authorization": f"Bearer {admin_access}"}
+async def test_payments_admin_returns_list_for_admin(client, db_session: AsyncSession):
+    admin_user_id, _ = await _register_activate_login(client, db_session)
+    headers = await _promote_to_admin(db_session, admin_user_id)
 
     r = await client.get("/api/v1/payments/admin", headers=headers)
     assert r.status_code == 200, r.text
@@ -255,10 +230,9 @@ async def test_payments_admin_returns_list_for_admin(client, db_session: AsyncSe
 
 
 @pytest.mark.asyncio
-async def test_payments_admin_filters_do_not_crash(client, db_session: AsyncSession, monkeypatch):
-    admin_user_id, admin_access = await _register_activate_login(client, db_session, monkeypatch)
-    await _ensure_admin_group_and_promote(db_session, admin_user_id)
-    headers = {"Authorization": f"Bearer {admin_access}"}
+async def test_payments_admin_filters_do_not_crash(client, db_session: AsyncSession):
+    admin_user_id, _ = await _register_activate_login(client, db_session)
+    headers = await _promote_to_admin(db_session, admin_user_id)
 
     date_from = (datetime.now(timezone.utc) - timedelta(days=7)).date().isoformat()
     date_to = datetime.now(timezone.utc).date().isoformat()
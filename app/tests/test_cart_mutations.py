@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.models.cart import Cart, CartItem
+from app.services import cart as cart_service
+from app.tests.utils import auth_headers, count_statements, create_movies, create_user
+
+
+@pytest.mark.asyncio
+async def test_cart_mutations_are_single_statements(db_session: AsyncSession):
+    user = await create_user(db_session)
+    (movie,) = await create_movies(db_session, 1)
+
+    with count_statements(db_session) as statements:
+        await cart_service.add_movie_to_cart(db_session, user.id, movie.id)
+    assert len(statements) == 1, statements
+
+    with count_statements(db_session) as statements:
+        with pytest.raises(ValueError, match="Movie already in cart"):
+            await cart_service.add_movie_to_cart(db_session, user.id, movie.id)
+    assert len(statements) == 1, statements
+
+    with count_statements(db_session) as statements:
+        await cart_service.remove_movie_from_cart(db_session, user.id, movie.id)
+    assert len(statements) == 1, statements
+
+
+@pytest.mark.asyncio
+async def test_cart_mutation_errors(db_session: AsyncSession):
+    user = await create_user(db_session)
+    (movie,) = await create_movies(db_session, 1)
+
+    with pytest.raises(ValueError, match="Movie not found"):
+        await cart_service.add_movie_to_cart(db_session, user.id, movie.id + 1)
+    # an unknown movie does not create an empty cart either
+    assert await db_session.scalar(select(func.count()).select_from(Cart)) == 0
+
+    with pytest.raises(ValueError, match="Cart is empty"):
+        await cart_service.remove_movie_from_cart(db_session, user.id, movie.id)
+
+    await cart_service.add_movie_to_cart(db_session, user.id, movie.id)
+    await cart_service.clear_cart(db_session, user.id)
+    with pytest.raises(ValueError, match="Movie not in cart"):
+        await cart_service.remove_movie_from_cart(db_session, user.id, movie.id)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_adds_create_one_cart(
+    db_session: AsyncSession, session_factory: async_sessionmaker[AsyncSession]
+):
+    user = await create_user(db_session)
+    movies = await create_movies(db_session, 5)
+    # the same movie twice plus four others, all racing for a cart that does not exist yet
+    movie_ids = [movies[0].id, *(m.id for m in movies)]
+
+    async def _add(movie_id: int) -> str | None:
+        async with session_factory() as session:
+            try:
+                await cart_service.add_movie_to_cart(session, user.id, movie_id)
+            except ValueError as exc:
+                return str(exc)
+            return None
+
+    results = await asyncio.gather(*(_add(mid) for mid in movie_ids))
+
+    assert results.count("Movie already in cart") == 1
+    assert results.count(None) == 5
+    assert await db_session.scalar(select(func.count()).select_from(Cart)) == 1
+    assert await db_session.scalar(select(func.count()).select_from(CartItem)) == 5
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_applies_operations_set_based(client, db_session: AsyncSession):
+    user = await create_user(db_session)
+    headers = auth_headers(user)
+    movies = await create_movies(db_session, 52, price=Decimal("2.50"))
+    kept, dropped = movies[0], movies[1]
+    await cart_service.add_movie_to_cart(db_session, user.id, kept.id)
+    await cart_service.add_movie_to_cart(db_session, user.id, dropped.id)
+
+    operations = [
+        {"op": "add", "movie_id": kept.id},
+        {"op": "remove", "movie_id": dropped.id},
+        {"op": "remove", "movie_id": movies[2].id},
+        {"op": "add", "movie_id": 999_999},
+        *({"op": "add", "movie_id": m.id} for m in movies[3:]),
+    ]
+    with count_statements(db_session) as statements:
+        r = await client.post(
+            "/api/v1/cart/items:batch", headers=headers, json={"operations": operations}
+        )
+    assert r.status_code == 200, r.text
+    # remove, add, total - independent of the batch size
+    cart_statements = [s for s in statements if "cart_items" in s]
+    assert len(cart_statements) == 3, cart_statements
+
+    body = r.json()
+    assert [res["status"] for res in body["results"][:4]] == [
+        "already_in_cart",
+        "removed",
+        "not_in_cart",
+        "not_found",
+    ]
+    assert {res["status"] for res in body["results"][4:]} == {"added"}
+    assert Decimal(body["total_amount"]) == Decimal("2.50") * 50  # kept + 49 added
+
+    r = await client.post(
+        "/api/v1/cart/items:batch",
+        headers=headers,
+        json={"operations": [{"op": "add", "movie_id": 1}, {"op": "remove", "movie_id": 1}]},
+    )
+    assert r.status_code == 422, r.text
@@ -14,9 +14,6 @@ async def test_cart_to_order_to_checkout_session_flow(
     db_session: AsyncSession,
     monkeypatch,
 ):
-    # avoid real emails
-    monkeypatch.setattr("app.api.v1.accounts.send_activation_email", lambda *args, **kwargs: None)
-
     email = f"user_{uuid.uuid4().hex}@example.com"
     password = "StrongPass123!"
 
@@ -124,9 +121,7 @@ async def test_stripe_webhook_requires_signature_header(client, monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_list_payments_empty_for_new_user(client, db_session: AsyncSession, monkeypatch):
-    monkeypatch.setattr("app.api.v1.accounts.send_activation_email", lambda *args, **kwargs: None)
-
+async def test_list_payments_empty_for_new_user(client, db_session: AsyncSession):
     email = f"user_{uuid.uuid4().hex}@example.com"
     password = "StrongPass123!"
 
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import cart as cart_service
+from app.tests.utils import auth_headers, count_statements, create_movies, create_user
+
+
+@pytest.mark.asyncio
+async def test_cart_read_is_one_statement_with_sql_total(client, db_session: AsyncSession):
+    user = await create_user(db_session)
+    headers = auth_headers(user)
+    cheap = await create_movies(db_session, 2, price=Decimal("0.10"))
+    dear = await create_movies(db_session, 1, price=Decimal("0.20"))
+    for movie in [*cheap, *dear]:
+        await cart_service.add_movie_to_cart(db_session, user.id, movie.id)
+
+    with count_statements(db_session) as statements:
+        r = await client.get("/api/v1/cart", headers=headers)
+    assert r.status_code == 200, r.text
+    cart_statements = [s for s in statements if "cart_items" in s]
+    assert len(cart_statements) == 1, cart_statements
+
+    body = r.json()
+    assert [i["movie_id"] for i in body["items"]] == [m.id for m in [*cheap, *dear]]
+    assert body["items"][0]["title"] == cheap[0].name
+    # exact decimal arithmetic: 0.1 + 0.1 + 0.2
+    assert Decimal(body["total_amount"]) == Decimal("0.40")
+
+    other = await create_user(db_session)
+    r = await client.get("/api/v1/cart", headers=auth_headers(other))
+    assert r.status_code == 200, r.text
+    assert r.json()["items"] == []
+    assert Decimal(r.json()["total_amount"]) == 0
+
+
+@pytest.mark.asyncio
+async def test_cart_summary_is_cached_and_invalidated(client, db_session: AsyncSession):
+    user = await create_user(db_session)
+    headers = auth_headers(user)
+    first, second = await create_movies(db_session, 2, price=Decimal("3.00"))
+    await cart_service.add_movie_to_cart(db_session, user.id, first.id)
+
+    r = await client.get("/api/v1/cart/summary", headers=headers)
+    assert r.json() == {"item_count": 1, "total_amount": "3.00"}
+
+    with count_statements(db_session) as statements:
+        r = await client.get("/api/v1/cart/summary", headers=headers)
+    assert r.status_code == 200, r.text
+    assert [s for s in statements if "cart_items" in s] == []
+
+    r = await client.post("/api/v1/cart/add", headers=headers, json={"movie_id": second.id})
+    assert r.status_code == 200, r.text
+    r = await client.get("/api/v1/cart/summary", headers=headers)
+    assert r.json() == {"item_count": 2, "total_amount": "6.00"}
+
+    r = await client.post("/api/v1/cart/clear", headers=headers)
+    assert r.status_code == 200, r.text
+    r = await client.get("/api/v1/cart/summary", headers=headers)
+    assert r.json() == {"item_count": 0, "total_amount": "0.00"}
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db.models.cart import CartItem
+from app.services import cart as cart_service, cart_store
+from app.services.cart_store import InMemoryCartStore, RedisCartStore
+from app.tests.utils import auth_headers, create_movies, create_user
+
+
+async def _persisted_movie_ids(db: AsyncSession) -> set[int]:
+    res = await db.execute(select(CartItem.movie_id))
+    return set(res.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_cart_changes_are_written_behind(
+    client, db_session: AsyncSession, session_factory: async_sessionmaker[AsyncSession]
+):
+    user = await create_user(db_session)
+    headers = auth_headers(user)
+    first, second = await create_movies(db_session, 2)
+    # already in Postgres before the store takes over: loaded on first use
+    await cart_service.add_movie_to_cart(db_session, user.id, first.id)
+
+    store = InMemoryCartStore()
+    cart_store.set_cart_store(store)
+
+    r = await client.post("/api/v1/cart/add", headers=headers, json={"movie_id": second.id})
+    assert r.status_code == 200, r.text
+    r = await client.post("/api/v1/cart/add", headers=headers, json={"movie_id": second.id})
+    assert r.status_code == 400, r.text
+    assert r.json()["detail"] == "Movie already in cart"
+
+    r = await client.get("/api/v1/cart", headers=headers)
+    assert [i["movie_id"] for i in r.json()["items"]] == [first.id, second.id]
+    # not written yet
+    assert await _persisted_movie_ids(db_session) == {first.id}
+
+    assert await store.flush_dirty(session_factory, limit=100) == 1
+    assert await _persisted_movie_ids(db_session) == {first.id, second.id}
+    assert await store.flush_dirty(session_factory, limit=100) == 0
+
+    r = await client.post("/api/v1/cart/remove", headers=headers, json={"movie_id": first.id})
+    assert r.status_code == 200, r.text
+    await store.flush_dirty(session_factory, limit=100)
+    assert await _persisted_movie_ids(db_session) == {second.id}
+
+
+@pytest.mark.asyncio
+async def test_order_creation_flushes_the_cart(client, db_session: AsyncSession):
+    user = await create_user(db_session)
+    headers = auth_headers(user)
+    movies = await create_movies(db_session, 3)
+    cart_store.set_cart_store(InMemoryCartStore())
+
+    r = await client.post(
+        "/api/v1/cart/items:batch",
+        headers=headers,
+        json={"operations": [{"op": "add", "movie_id": m.id} for m in movies]},
+    )
+    assert r.status_code == 200, r.text
+
+    r = await client.post("/api/v1/orders", headers=headers)
+    assert r.status_code == 201, r.text
+    r = await client.get(f"/api/v1/orders/{r.json()['order_id']}", headers=headers)
+    assert {i["movie_id"] for i in r.json()["items"]} == {m.id for m in movies}
+
+    r = await client.get("/api/v1/cart", headers=headers)
+    assert r.json()["items"] == []
+    assert await db_session.scalar(select(func.count()).select_from(CartItem)) == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_cart_store_versions_and_dirty_set():
+    redis_asyncio = pytest.importorskip("redis.asyncio")
+    client = redis_asyncio.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        pytest.skip("Redis is not reachable")
+
+    store = RedisCartStore(client, idle_ttl_seconds=60)
+    user_id = uuid.uuid4().int % 1_000_000_000
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    try:
+        assert await store._add(user_id, [1], now) is None  # not loaded yet
+        await store._seed(user_id, [(1, now)])
+        assert await store._add(user_id, [1, 2], now) == [2]
+        assert await store._remove(user_id, [1, 3]) == [1]
+
+        items, version = await store._snapshot(user_id)
+        assert items == [(2, now)]
+        assert user_id in await store._dirty_users(10_000)
+
+        # a change after the snapshot keeps the cart dirty
+        await store._add(user_id, [3], now)
+        await store._mark_clean(user_id, version)
+        assert user_id in await store._dirty_users(10_000)
+
+        _, version = await store._snapshot(user_id)
+        await store._mark_clean(user_id, version)
+        assert user_id not in await store._dirty_users(10_000)
+        assert await client.ttl(f"{RedisCartStore.VERSION_PREFIX}{user_id}") > 0
+    finally:
+        await client.delete(*store._keys(user_id))
+        await client.srem(RedisCartStore.DIRTY_KEY, user_id)
+        await client.aclose()
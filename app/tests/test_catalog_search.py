@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.movies import MovieCreateRequest
+from app.services import movies as movies_service
+from app.services.catalog_search import SearchIndex, apply_changes, load_index
+
+
+def test_search_index_prefix_and_accents():
+    index = SearchIndex()
+    index.upsert_person("star", 1, "Penélope Cruz")
+    index.upsert_person("director", 2, "Pedro Almodóvar")
+    index.upsert_movie(10, "Volver", star_ids=[1], director_ids=[2])
+    index.upsert_movie(11, "Vicky Cristina Barcelona", star_ids=[1], director_ids=[])
+    index.upsert_movie(12, "The Skin I Live In", star_ids=[], director_ids=[2])
+
+    assert index.match("volv") == {10}
+    assert set(index.search("penelope")) == {10, 11}
+    assert index.match("almodovar skin") == {12}
+    assert index.match("nothing") == set()
+
+    suggestions = index.suggest("pe", 5)
+    assert [s.id for s in suggestions["star"]] == [1]
+    assert [s.id for s in suggestions["director"]] == [2]
+
+    index.remove_movie(10)
+    assert index.match("volver") == set()
+
+
+@pytest.mark.asyncio
+async def test_index_tracks_catalog_changes(db_session: AsyncSession):
+    cert = await movies_service.create_certification(db_session, f"PG-{uuid.uuid4().hex[:6]}")
+    tag = uuid.uuid4().hex[:8]
+    star = await movies_service.create_star(db_session, f"Star {tag}")
+    movie = await movies_service.create_movie(
+        db_session,
+        MovieCreateRequest(
+            name=f"Searchable {tag}",
+            year=2020,
+            time=100,
+            imdb=7.0,
+            votes=10,
+            description="Search test movie",
+            price="3.99",
+            certification_id=cert.id,
+            star_ids=[star.id],
+        ),
+    )
+    await db_session.commit()
+
+    index = await load_index(db_session)
+    assert index.match(f"searchable {tag}") == {movie.id}
+    assert movie.id in index.match(f"star {tag[:4]}")
+
+    await movies_service.delete_movie(db_session, movie.id)
+    await db_session.commit()
+    await apply_changes(db_session, index, {f"movie:{movie.id}"})
+
+    assert index.match(f"searchable {tag}") == set()
+    # people stay suggestable without credits
+    assert [s.id for s in index.suggest(tag, 5)["star"]] == [star.id]
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.enums import MovieSortField, SortOrder
+from app.schemas.movies import MovieCreateRequest
+from app.services import movies as movies_service
+from app.services.catalog_shm import (
+    GenerationWriter,
+    SharedCatalogSnapshot,
+    read_current_generation,
+)
+from app.services.catalog_snapshot import load_snapshot, refresh_movies
+
+
+async def _seed_catalog(db: AsyncSession) -> dict:
+    cert_a = await movies_service.create_certification(db, f"PG-{uuid.uuid4().hex[:6]}")
+    cert_b = await movies_service.create_certification(db, f"R-{uuid.uuid4().hex[:6]}")
+    genre_a = await movies_service.create_genre(db, f"Drama-{uuid.uuid4().hex[:6]}")
+    genre_b = await movies_service.create_genre(db, f"Comedy-{uuid.uuid4().hex[:6]}")
+    star = await movies_service.create_star(db, f"Star-{uuid.uuid4().hex[:6]}")
+    director = await movies_service.create_director(db, f"Director-{uuid.uuid4().hex[:6]}")
+
+    movies = []
+    for i in range(8):
+        payload = MovieCreateRequest(
+            name=f"Movie {i} {uuid.uuid4().hex[:6]}",
+            year=2015 + i % 3,
+            time=90 + i,
+            imdb=6.0 + i * 0.3,
+            votes=1000 * (i + 1),
+            description="Snapshot test movie",
+            price=f"{5 + i}.99",
+            certification_id=(cert_a if i % 2 else cert_b).id,
+            genre_ids=[genre_a.id] if i < 5 else [genre_b.id],
+            director_ids=[director.id] if i % 3 == 0 else [],
+            star_ids=[star.id] if i in (1, 4, 7) else [],
+        )
+        movies.append(await movies_service.create_movie(db, payload))
+    await db.commit()
+
+    return {
+        "cert": cert_a.id,
+        "genre": genre_a.id,
+        "star": star.id,
+        "director": director.id,
+        "movies": movies,
+    }
+
+
+@pytest.mark.asyncio
+async def test_snapshot_matches_sql_filters(db_session: AsyncSession):
+    ids = await _seed_catalog(db_session)
+    snapshot = await load_snapshot(db_session)
+
+    cases = [
+        {},
+        {"year": 2016},
+        {"imdb_min": 6.5, "imdb_max": 7.5},
+        {"certification_id": ids["cert"]},
+        {"genre_id": ids["genre"]},
+        {"star_id": ids["star"]},
+        {"director_id": ids["director"], "imdb_min": 6.0},
+    ]
+    filters = dict.fromkeys(
+        ["year", "imdb_min", "imdb_max", "certification_id", "genre_id", "director_id", "star_id"]
+    )
+
+    for case in cases:
+        for sort_by in (MovieSortField.votes, MovieSortField.price):
+            kwargs = {**filters, **case, "sort_by": sort_by, "order": SortOrder.desc}
+
+            sql_total, sql_items = await movies_service._list_movies_sql(
+                db_session, page=1, page_size=100, q=None, **kwargs
+            )
+            snap_total, snap_items = snapshot.query(page=1, page_size=100, **kwargs)
+
+            assert snap_total == sql_total, case
+            assert [m.id for m in snap_items] == [m.id for m in sql_items], case
+
+
+@pytest.mark.asyncio
+async def test_snapshot_incremental_refresh(db_session: AsyncSession):
+    ids = await _seed_catalog(db_session)
+    snapshot = await load_snapshot(db_session)
+    removed = ids["movies"][0]
+
+    await movies_service.delete_movie(db_session, removed.id)
+    added = await movies_service.create_movie(
+        db_session,
+        MovieCreateRequest(
+            name=f"Added {uuid.uuid4().hex[:6]}",
+            year=2030,
+            time=100,
+            imdb=9.5,
+            votes=1,
+            description="Added after snapshot load",
+            price="1.00",
+            certification_id=ids["cert"],
+            genre_ids=[ids["genre"]],
+        ),
+    )
+    await db_session.commit()
+
+    await refresh_movies(db_session, snapshot, {removed.id, added.id})
+
+    total, items = snapshot.query(
+        page=1,
+        page_size=100,
+        genre_id=ids["genre"],
+        sort_by=MovieSortField.imdb,
+        order=SortOrder.desc,
+    )
+    assert total == 5
+    assert items[0].id == added.id
+    assert removed.id not in {m.id for m in items}
+
+
+@pytest.mark.asyncio
+async def test_shared_snapshot_matches_local(db_session: AsyncSession, tmp_path):
+    ids = await _seed_catalog(db_session)
+    local = await load_snapshot(db_session)
+
+    writer = GenerationWriter(tmp_path)
+    generation = writer.publish(local)
+    assert read_current_generation(tmp_path) == generation
+
+    shared = SharedCatalogSnapshot.open(tmp_path, generation)
+    assert len(shared) == len(local)
+
+    for kwargs in ({}, {"genre_id": ids["genre"]}, {"star_id": ids["star"], "imdb_min": 6.5}):
+        for sort_by in (MovieSortField.price, MovieSortField.imdb):
+            expected = local.query(page=1, page_size=100, sort_by=sort_by, **kwargs)
+            assert shared.query(page=1, page_size=100, sort_by=sort_by, **kwargs) == expected
+
+    # a new generation replaces the pointer; old ones beyond the retention window are pruned
+    for _ in range(4):
+        writer.publish(local)
+    assert read_current_generation(tmp_path) == generation + 4
+    assert not (tmp_path / f"gen-{generation:012d}").exists()
@@ -10,10 +10,7 @@ from app.db.models.accounts import ActivationToken
 
 
 @pytest.mark.asyncio
-async def test_docs_are_protected(client, db_session: AsyncSession, monkeypatch):
-    # Prevent real SMTP send
-    monkeypatch.setattr("app.api.v1.accounts.send_activation_email", lambda *args, **kwargs: None)
-
+async def test_docs_are_protected(client, db_session: AsyncSession):
     email = f"user_{uuid.uuid4().hex}@example.com"
     password = "StrongPass123!"
 
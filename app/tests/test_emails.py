@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import socketserver
+import threading
+from collections.abc import Iterator
+
+import pytest
+
+from app.core import emails
+from app.core.emails import SmtpConnectionPool, build_message
+from app.tasks.emails import send_email_batch
+
+REJECTED = "bounce@example.com"
+
+
+class _SmtpSink(socketserver.ThreadingTCPServer):
+    """
+    Minimal local SMTP server: accepts everything except RCPT TO:<bounce@...> and keeps the
+    received messages in memory.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _SmtpHandler)
+        self.messages: list[tuple[list[str], str]] = []
+        self.connections = 0
+        self.drop_connections = False
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    server: _SmtpSink
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        self.server.connections += 1
+        self._reply("220 sink ready")
+        recipients: list[str] = []
+        while line := self.rfile.readline():
+            if self.server.drop_connections:
+                return
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self._reply("250 sink")
+            elif verb == "MAIL":
+                recipients = []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip("<> ")
+                if address == REJECTED:
+                    self._reply("550 No such user")
+                else:
+                    recipients.append(address)
+                    self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while (chunk := self.rfile.readline()) not in (b".\r\n", b""):
+                    data.append(chunk.decode())
+                self.server.messages.append((recipients, "".join(data)))
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:  # NOOP, RSET
+                self._reply("250 OK")
+
+
+@pytest.fixture()
+def smtp_sink() -> Iterator[_SmtpSink]:
+    sink = _SmtpSink()
+    thread = threading.Thread(target=sink.serve_forever, daemon=True)
+    thread.start()
+    yield sink
+    sink.shutdown()
+    sink.server_close()
+
+
+@pytest.fixture()
+def worker_pool(smtp_sink: _SmtpSink, monkeypatch) -> Iterator[SmtpConnectionPool]:
+    pool = SmtpConnectionPool("127.0.0.1", smtp_sink.port, timeout=5)
+    monkeypatch.setattr(emails, "_pool", pool)
+    yield pool
+    emails.close_smtp_pool()
+
+
+def test_pool_reuses_one_connection(smtp_sink: _SmtpSink):
+    pool = SmtpConnectionPool("127.0.0.1", smtp_sink.port, timeout=5)
+    try:
+        for i in range(3):
+            with pool.connection() as server:
+                server.send_message(build_message("a@example.com", f"hello {i}", "body"))
+    finally:
+        pool.close()
+
+    assert len(smtp_sink.messages) == 3
+    assert smtp_sink.connections == 1
+
+
+def test_pool_replaces_dead_connection(smtp_sink: _SmtpSink):
+    # max_idle_seconds=0: every reuse is NOOP-checked first
+    pool = SmtpConnectionPool("127.0.0.1", smtp_sink.port, timeout=5, max_idle_seconds=0)
+    try:
+        with pool.connection() as server:
+            server.send_message(build_message("a@example.com", "first", "body"))
+
+        smtp_sink.drop_connections = True
+        with pool.connection() as server:
+            # the health check sees the closed socket and hands out a fresh connection
+            smtp_sink.drop_connections = False
+            server.send_message(build_message("a@example.com", "second", "body"))
+    finally:
+        pool.close()
+
+    assert [m[0] for m in smtp_sink.messages] == [["a@example.com"], ["a@example.com"]]
+    assert smtp_sink.connections == 2
+
+
+def test_batch_drops_permanently_rejected_recipient(
+    smtp_sink: _SmtpSink, worker_pool: SmtpConnectionPool
+):
+    messages = [
+        ["one@example.com", "s", "b"],
+        [REJECTED, "s", "b"],
+        ["two@example.com", "s", "b"],
+    ]
+    result = send_email_batch.apply(args=(messages,))
+
+    # the 550 is not retried and does not block the rest of the batch
+    assert result.get() == 3
+    assert [m[0] for m in smtp_sink.messages] == [["one@example.com"], ["two@example.com"]]
+    assert smtp_sink.connections == 1
+
+
+def test_deliver_later_only_enqueues(monkeypatch):
+    sent: list[tuple] = []
+    monkeypatch.setattr(
+        emails.celery, "send_task", lambda name, args: sent.append((name, args))
+    )
+
+    emails.deliver_later(
+        [
+            emails.payment_confirmation_email("user@example.com", 7, "9.99"),
+            emails.payment_confirmation_email("other@example.com", 8, "4.99"),
+        ]
+    )
+
+    # one task per batch, in the JSON shape send_email_batch takes
+    assert sent == [
+        (
+            emails.SEND_EMAIL_BATCH_TASK,
+            (
+                [
+                    [
+                        "user@example.com",
+                        "Payment confirmation",
+                        "Thanks for your purchase!\n\nOrder #7 is paid.\nAmount: 9.99\n",
+                    ],
+                    [
+                        "other@example.com",
+                        "Payment confirmation",
+                        "Thanks for your purchase!\n\nOrder #8 is paid.\nAmount: 4.99\n",
+                    ],
+                ],
+            ),
+        )
+    ]
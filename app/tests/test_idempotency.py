@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+import stripe
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.orders import Order
+from app.services import cart as cart_service
+from app.tests.utils import auth_headers, create_movies, create_user
+
+
+async def _order_count(db: AsyncSession) -> int:
+    return await db.scalar(select(func.count()).select_from(Order))
+
+
+@pytest.mark.asyncio
+async def test_order_retry_with_same_key_replays_the_response(client, db_session: AsyncSession):
+    user = await create_user(db_session)
+    movies = await create_movies(db_session, 2)
+    await cart_service.apply_batch(db_session, user.id, [("add", m.id) for m in movies])
+    headers = {**auth_headers(user), "Idempotency-Key": uuid.uuid4().hex}
+
+    first = await client.post("/api/v1/orders", headers=headers)
+    assert first.status_code == 201, first.text
+    retry = await client.post("/api/v1/orders", headers=headers)
+    assert retry.status_code == 201, retry.text
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert await _order_count(db_session) == 1
+
+    # a new key is a new request: the cart is empty by now
+    headers["Idempotency-Key"] = uuid.uuid4().hex
+    r = await client.post("/api/v1/orders", headers=headers)
+    assert r.status_code == 400, r.text
+    assert r.json()["detail"] == "Cart is empty"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_wait_for_the_first_request(
+    concurrent_client: AsyncClient, db_session: AsyncSession
+):
+    user = await create_user(db_session)
+    movies = await create_movies(db_session, 3)
+    await cart_service.apply_batch(db_session, user.id, [("add", m.id) for m in movies])
+    headers = {**auth_headers(user), "Idempotency-Key": uuid.uuid4().hex}
+
+    responses = await asyncio.gather(
+        *(concurrent_client.post("/api/v1/orders", headers=headers) for _ in range(10))
+    )
+
+    assert {r.status_code for r in responses} == {201}, [r.text for r in responses]
+    assert len({r.json()["order_id"] for r in responses}) == 1
+    assert sum("Idempotent-Replayed" in r.headers for r in responses) == 9
+    assert await _order_count(db_session) == 1
+
+
+@pytest.mark.asyncio
+async def test_checkout_session_is_reused_for_a_pending_order(
+    client, db_session: AsyncSession, monkeypatch
+):
+    user = await create_user(db_session)
+    (movie,) = await create_movies(db_session, 1)
+    await cart_service.add_movie_to_cart(db_session, user.id, movie.id)
+    r = await client.post("/api/v1/orders", headers=auth_headers(user))
+    order_id = r.json()["order_id"]
+
+    created: list[dict] = []
+
+    def _fake_create(**kwargs):
+        created.append(kwargs)
+        n = len(created)
+        return SimpleNamespace(
+            id=f"cs_test_{n}",
+            url=f"https://checkout.stripe.com/c/pay/cs_test_{n}",
+            expires_at=int(time.time()) + 24 * 3600,
+        )
+
+    monkeypatch.setattr(stripe.checkout.Session, "create", _fake_create)
+
+    headers = {**auth_headers(user), "Idempotency-Key": uuid.uuid4().hex}
+    first = await client.post(
+        "/api/v1/payments/checkout-session", headers=headers, json={"order_id": order_id}
+    )
+    assert first.status_code == 200, first.text
+
+    # the same key with another body is a client bug, not a retry
+    r = await client.post(
+        "/api/v1/payments/checkout-session", headers=headers, json={"order_id": order_id + 1}
+    )
+    assert r.status_code == 422, r.text
+
+    # no key (or a new one): still the session already open for this order
+    r = await client.post(
+        "/api/v1/payments/checkout-session",
+        headers=auth_headers(user),
+        json={"order_id": order_id},
+    )
+    assert r.status_code == 200, r.text
+    assert r.json() == first.json()
+    assert len(created) == 1
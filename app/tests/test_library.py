@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.models.library import UserLibraryItem
+from app.repositories import UserLibraryRepository
+from app.services import cart as cart_service, library, orders as orders_service
+from app.services.payments import _mark_order_paid_and_create_payment
+from app.tests.utils import auth_headers, count_statements, create_movies, create_user
+
+
+async def _buy(db: AsyncSession, user_id: int, movie_ids: list[int]) -> int:
+    for movie_id in movie_ids:
+        await cart_service.add_movie_to_cart(db, user_id, movie_id)
+    order = await orders_service.create_order_from_cart(db, user_id)
+    assert await _mark_order_paid_and_create_payment(
+        db,
+        order_id=order.id,
+        user_id=user_id,
+        external_payment_id="pi_test",
+        amount=order.total_amount,
+    )
+    return order.id
+
+
+@pytest.mark.asyncio
+async def test_paid_movies_land_in_library_and_cannot_be_re_added(
+    client, db_session: AsyncSession
+):
+    user = await create_user(db_session)
+    bought, other = await create_movies(db_session, 2)
+    order_id = await _buy(db_session, user.id, [bought.id])
+
+    assert await UserLibraryRepository.owned_ids(db_session, user.id, [bought.id, other.id]) == {
+        bought.id
+    }
+
+    with count_statements(db_session) as statements:
+        with pytest.raises(ValueError, match="Movie already purchased"):
+            await cart_service.add_movie_to_cart(db_session, user.id, bought.id)
+    assert len(statements) == 1, statements
+
+    outcomes, _ = await cart_service.apply_batch(
+        db_session, user.id, [("add", bought.id), ("add", other.id)]
+    )
+    assert outcomes == {bought.id: "already_owned", other.id: "added"}
+
+    r = await client.get("/api/v1/accounts/me/library", headers=auth_headers(user))
+    assert r.status_code == 200, r.text
+    items = r.json()["items"]
+    assert [(i["movie_id"], i["order_id"]) for i in items] == [(bought.id, order_id)]
+
+
+@pytest.mark.asyncio
+async def test_backfill_is_idempotent(
+    db_session: AsyncSession, session_factory: async_sessionmaker[AsyncSession]
+):
+    user = await create_user(db_session)
+    movies = await create_movies(db_session, 3)
+    await _buy(db_session, user.id, [movies[0].id, movies[1].id])
+    await _buy(db_session, user.id, [movies[2].id])
+    # as if both orders were paid before user_library existed
+    await db_session.execute(delete(UserLibraryItem))
+    await db_session.commit()
+
+    assert await library.backfill(session_factory, batch_size=1) == 3
+    assert await library.backfill(session_factory, batch_size=1) == 0
+    owned = await UserLibraryRepository.owned_ids(db_session, user.id, [m.id for m in movies])
+    assert owned == {m.id for m in movies}
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.library import UserLibraryItem
+from app.services import cart as cart_service
+from app.tests.utils import auth_headers, count_statements, create_movies, create_user
+
+
+@pytest.mark.asyncio
+async def test_catalog_flags_cost_one_query_per_page(client, db_session: AsyncSession):
+    user = await create_user(db_session)
+    headers = auth_headers(user)
+    movies = await create_movies(db_session, 20)
+    in_cart, owned = movies[0], movies[1]
+    await cart_service.add_movie_to_cart(db_session, user.id, in_cart.id)
+    db_session.add(UserLibraryItem(user_id=user.id, movie_id=owned.id))
+    await db_session.commit()
+
+    with count_statements(db_session) as statements:
+        r = await client.get("/api/v1/movies", headers=headers, params={"page_size": 20})
+    assert r.status_code == 200, r.text
+    flag_statements = [s for s in statements if "user_library" in s]
+    assert len(flag_statements) == 1, flag_statements
+
+    flags = {i["id"]: (i["in_cart"], i["owned"]) for i in r.json()["items"]}
+    assert flags[in_cart.id] == (True, False)
+    assert flags[owned.id] == (False, True)
+    assert flags[movies[2].id] == (False, False)
+
+    r = await client.get(f"/api/v1/movies/{owned.uuid}", headers=headers)
+    assert r.status_code == 200, r.text
+    assert (r.json()["in_cart"], r.json()["owned"]) == (False, True)
+
+    # anonymous callers get the catalog without flags, and no flag query
+    with count_statements(db_session) as statements:
+        r = await client.get("/api/v1/movies", params={"page_size": 20})
+    assert r.status_code == 200, r.text
+    assert [s for s in statements if "user_library" in s] == []
+    assert {(i["in_cart"], i["owned"]) for i in r.json()["items"]} == {(None, None)}
+
+    r = await client.get("/api/v1/movies", headers={"Authorization": "Bearer nope"})
+    assert r.status_code == 401, r.text
@@ -1,7 +1,15 @@
 from __future__ import annotations
 
+import uuid
+from types import SimpleNamespace
+
 import pytest
 
+from app.core.enums import MovieSortField, SortOrder
+from app.schemas.movies import MovieCreateRequest
+from app.services import movies as movies_service
+from app.tests.utils import create_movies
+
 
 @pytest.mark.asyncio
 async def test_movies_list_empty_ok(client):
@@ -22,3 +30,100 @@ async def test_movie_detail_not_found(client):
     r = await client.get("/api/v1/movies/00000000-0000-0000-0000-000000000000")
     assert r.status_code == 404, r.text
     assert r.json()["detail"] == "Movie not found"
+
+
+@pytest.mark.asyncio
+async def test_movies_discover_empty_ok(client):
+    r = await client.get("/api/v1/movies/discover", params={"n": 5})
+    assert r.status_code == 200, r.text
+    assert r.json() == []
+
+
+@pytest.mark.asyncio
+async def test_movies_discover_respects_filters(db_session):
+    cert = await movies_service.create_certification(db_session, f"PG-{uuid.uuid4().hex[:6]}")
+    genre = await movies_service.create_genre(db_session, f"Drama-{uuid.uuid4().hex[:6]}")
+    matching = set()
+    for i in range(12):
+        movie = await movies_service.create_movie(
+            db_session,
+            MovieCreateRequest(
+                name=f"Discover {i} {uuid.uuid4().hex[:6]}",
+                year=2000 + i % 2,
+                time=90,
+                imdb=7.0,
+                votes=100,
+                description="Discover test movie",
+                price="4.99",
+                certification_id=cert.id,
+                genre_ids=[genre.id] if i % 3 == 0 else [],
+            ),
+        )
+        if i % 3 == 0 and movie.year == 2000:
+            matching.add(movie.id)
+    await db_session.commit()
+
+    filters = dict.fromkeys(["q", "imdb_min", "imdb_max", "certification_id", "director_id", "star_id"])
+    picked = await movies_service.discover_movies(
+        db_session, n=10, year=2000, genre_id=genre.id, **filters
+    )
+    # fewer matches than requested: every match, each once
+    assert sorted(m.id for m in picked) == sorted(matching)
+
+    picked = await movies_service.discover_movies(
+        db_session, n=4, year=None, genre_id=None, **filters
+    )
+    assert len({m.id for m in picked}) == 4
+
+
+@pytest.mark.asyncio
+async def test_discover_fallback_does_not_always_pick_the_lowest_ids(db_session, monkeypatch):
+    movies = await create_movies(db_session, 8)
+    # no probe rounds: the pick comes from the fallback alone
+    monkeypatch.setattr(movies_service, "DISCOVER_PROBE_ROUNDS", 0)
+    filters = dict.fromkeys(
+        ["q", "year", "imdb_min", "imdb_max", "certification_id", "genre_id", "director_id"]
+    )
+
+    picks = set()
+    for _ in range(20):
+        picked = await movies_service.discover_movies(db_session, n=3, star_id=None, **filters)
+        assert len({m.id for m in picked}) == 3
+        picks.add(frozenset(m.id for m in picked))
+
+    assert len(picks) > 1
+    assert {m.id for m in movies} >= set().union(*picks)
+
+
+@pytest.mark.asyncio
+async def test_search_hits_beyond_the_bind_parameter_limit(db_session, monkeypatch):
+    movies = await create_movies(db_session, 2)
+    # more ids than asyncpg accepts as separate parameters (32767)
+    hits = set(range(movies[-1].id + 1, movies[-1].id + 40_000)) | {movies[0].id}
+    monkeypatch.setattr(
+        movies_service.catalog_search, "get_index", lambda: SimpleNamespace(match=lambda q: hits)
+    )
+    monkeypatch.setattr(movies_service.catalog_snapshot, "get_snapshot", lambda: None)
+
+    total, items = await movies_service.list_movies(
+        db_session,
+        page=1,
+        page_size=10,
+        q="anything",
+        year=None,
+        imdb_min=None,
+        imdb_max=None,
+        certification_id=None,
+        genre_id=None,
+        director_id=None,
+        star_id=None,
+        sort_by=MovieSortField.year,
+        order=SortOrder.asc,
+    )
+    assert (total, [m.id for m in items]) == (1, [movies[0].id])
+
+    filters = dict.fromkeys(
+        ["year", "imdb_min", "imdb_max", "certification_id", "genre_id", "director_id", "star_id"]
+    )
+    picked = await movies_service.discover_movies(db_session, n=5, q="anything", **filters)
+    assert [m.id for m in picked] == [movies[0].id]
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.cart import CartItem
+from app.db.models.library import UserLibraryItem
+from app.db.models.orders import OrderItem
+from app.services import cart as cart_service, orders as orders_service
+from app.tests.utils import count_statements, create_movies, create_user
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 20])
+async def test_order_creation_statement_count_is_flat(db_session: AsyncSession, size: int):
+    user = await create_user(db_session)
+    movies = await create_movies(db_session, size, price=Decimal("0.10"))
+    await cart_service.apply_batch(db_session, user.id, [("add", m.id) for m in movies])
+
+    with count_statements(db_session) as statements:
+        order = await orders_service.create_order_from_cart(db_session, user.id)
+    order_statements = [s for s in statements if "orders" in s]
+    assert len(order_statements) == 1, statements
+
+    # exact decimal arithmetic in SQL
+    assert order.total_amount == Decimal("0.10") * size
+    prices = await db_session.scalars(
+        select(OrderItem.price_at_order).where(OrderItem.order_id == order.id)
+    )
+    assert list(prices) == [Decimal("0.10")] * size
+    assert await db_session.scalar(select(func.count()).select_from(CartItem)) == 0
+
+
+@pytest.mark.asyncio
+async def test_order_skips_unorderable_movies(db_session: AsyncSession):
+    user = await create_user(db_session)
+    kept, owned = await create_movies(db_session, 2, price=Decimal("4.00"))
+
+    with pytest.raises(ValueError, match="Cart is empty"):
+        await orders_service.create_order_from_cart(db_session, user.id)
+
+    await cart_service.apply_batch(db_session, user.id, [("add", kept.id), ("add", owned.id)])
+    # bought elsewhere after it was put into the cart
+    db_session.add(UserLibraryItem(user_id=user.id, movie_id=owned.id))
+    await db_session.commit()
+
+    order = await orders_service.create_order_from_cart(db_session, user.id)
+    items = await db_session.scalars(
+        select(OrderItem.movie_id).where(OrderItem.order_id == order.id)
+    )
+    assert list(items) == [kept.id]
+    assert order.total_amount == Decimal("4.00")
+
+    # nothing orderable: the cart is left as it was
+    (later,) = await create_movies(db_session, 1)
+    await cart_service.apply_batch(db_session, user.id, [("add", later.id)])
+    db_session.add(UserLibraryItem(user_id=user.id, movie_id=later.id))
+    await db_session.commit()
+    with pytest.raises(ValueError, match="No available movies to order"):
+        await orders_service.create_order_from_cart(db_session, user.id)
+    assert await db_session.scalar(select(func.count()).select_from(CartItem)) == 1
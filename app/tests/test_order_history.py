@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.orders import Order, OrderItem, OrderStatusEnum
+from app.tests.utils import auth_headers, count_statements, create_movies, create_user
+
+
+@pytest.mark.asyncio
+async def test_order_history_pages_by_cursor(client, db_session: AsyncSession):
+    user = await create_user(db_session)
+    headers = auth_headers(user)
+    movies = await create_movies(db_session, 2, price=Decimal("5.00"))
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    orders = []
+    for n in range(5):
+        order = Order(
+            user_id=user.id,
+            status=OrderStatusEnum.paid if n % 2 else OrderStatusEnum.pending,
+            total_amount=Decimal("10.00"),
+            # two orders share a timestamp: the id breaks the tie
+            created_at=start + timedelta(minutes=min(n, 3)),
+            items=[OrderItem(movie_id=m.id, price_at_order=m.price) for m in movies],
+        )
+        db_session.add(order)
+        orders.append(order)
+    await db_session.commit()
+    newest_first = [o.id for o in sorted(orders, key=lambda o: (o.created_at, o.id), reverse=True)]
+
+    seen: list[int] = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        with count_statements(db_session) as statements:
+            r = await client.get("/api/v1/orders", headers=headers, params=params)
+        assert r.status_code == 200, r.text
+        assert len([s for s in statements if "order_items" in s]) == 1, statements
+        body = r.json()
+        seen.extend(o["id"] for o in body["items"])
+        assert all(
+            [i["title"] for i in o["items"]] == [m.name for m in movies] for o in body["items"]
+        )
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == newest_first
+
+    r = await client.get(
+        "/api/v1/orders", headers=headers, params={"status": "paid", "summary": True}
+    )
+    assert r.status_code == 200, r.text
+    paid = {orders[1].id, orders[3].id}
+    body = r.json()["items"]
+    assert [o["id"] for o in body] == [oid for oid in newest_first if oid in paid]
+    assert all("items" not in o and o["item_count"] == 2 for o in body)
+
+    r = await client.get("/api/v1/orders", headers=headers, params={"cursor": "not-a-cursor"})
+    assert r.status_code == 400, r.text
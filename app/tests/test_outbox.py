@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.models.outbox import OutboxEvent
+from app.repositories import OutboxRepository
+from app.services import accounts as accounts_service, outbox
+
+
+async def _events(db: AsyncSession) -> list[OutboxEvent]:
+    res = await db.execute(select(OutboxEvent).order_by(OutboxEvent.id))
+    return list(res.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_register_records_activation_email_in_same_transaction(
+    db_session: AsyncSession, monkeypatch
+):
+    email = f"user_{uuid.uuid4().hex}@example.com"
+    token = await accounts_service.register_user(db_session, email, "StrongPass123!")
+
+    [event] = await _events(db_session)
+    assert event.topic == outbox.TOPIC_EMAIL
+    assert event.payload["to"] == email
+    assert token in event.payload["body"]
+
+    # a failed registration leaves nothing behind
+    with pytest.raises(ValueError):
+        await accounts_service.register_user(db_session, email, "StrongPass123!")
+    await db_session.rollback()
+    assert len(await _events(db_session)) == 1
+
+    batches: list[list[tuple[str, str, str]]] = []
+    monkeypatch.setattr(outbox.emails, "deliver_later", batches.append)
+
+    stats = await outbox.relay_batch(db_session)
+
+    assert (stats.delivered, stats.failed) == (1, 0)
+    assert batches == [[(email, "Activate your account", event.payload["body"])]]
+    assert await _events(db_session) == []
+
+
+@pytest.mark.asyncio
+async def test_relay_hands_due_emails_over_as_one_batch(db_session: AsyncSession, monkeypatch):
+    for i in range(5):
+        outbox.enqueue_email(db_session, (f"user{i}@example.com", "s", "b"))
+    await db_session.commit()
+
+    batches: list[list[tuple[str, str, str]]] = []
+    monkeypatch.setattr(outbox.emails, "deliver_later", batches.append)
+
+    stats = await outbox.relay_batch(db_session)
+
+    assert (stats.delivered, stats.failed) == (5, 0)
+    assert [[to for to, _, _ in batch] for batch in batches] == [
+        [f"user{i}@example.com" for i in range(5)]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_new_events_are_due_whatever_the_server_time_zone(
+    db_session: AsyncSession, monkeypatch
+):
+    # naive UTC timestamps: a session in another zone must not shift when events come due
+    await db_session.execute(text("SET TIME ZONE 'Asia/Tokyo'"))
+    outbox.enqueue_email(db_session, ("a@example.com", "s", "b"))
+    await db_session.commit()
+
+    batches: list[list[tuple[str, str, str]]] = []
+    monkeypatch.setattr(outbox.emails, "deliver_later", batches.append)
+
+    stats = await outbox.relay_batch(db_session)
+
+    assert (stats.delivered, stats.failed) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_failed_delivery_is_rescheduled(db_session: AsyncSession, monkeypatch):
+    outbox.enqueue_email(db_session, ("a@example.com", "s", "b"))
+    await db_session.commit()
+
+    def _broker_down(*_args):
+        raise ConnectionError("broker unavailable")
+
+    monkeypatch.setattr(outbox.emails, "deliver_later", _broker_down)
+    stats = await outbox.relay_batch(db_session)
+    assert (stats.delivered, stats.failed) == (0, 1)
+
+    [event] = await _events(db_session)
+    await db_session.refresh(event)
+    assert event.attempts == 1
+    assert "broker unavailable" in (event.last_error or "")
+    assert event.available_at > datetime.utcnow()
+
+    # not due yet: the next pass leaves it alone
+    stats = await outbox.relay_batch(db_session)
+    assert stats.claimed == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_relays_claim_disjoint_rows(
+    db_session: AsyncSession, session_factory: async_sessionmaker[AsyncSession]
+):
+    for i in range(10):
+        outbox.enqueue(db_session, "test", {"n": i})
+    await db_session.commit()
+
+    now = datetime.utcnow()
+    async with session_factory() as first, session_factory() as second:
+        claimed_first = await OutboxRepository.claim_batch(first, 6, now)
+        claimed_second = await OutboxRepository.claim_batch(second, 10, now)
+
+        ids_first = {e.id for e in claimed_first}
+        ids_second = {e.id for e in claimed_second}
+        assert len(ids_first) == 6
+        assert len(ids_second) == 4
+        assert ids_first.isdisjoint(ids_second)
+
+        await first.rollback()
+        await second.rollback()
+
+    total = await db_session.scalar(select(func.count()).select_from(OutboxEvent))
+    assert total == 10
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import PasswordHasherBusyError
+from app.core.security import passwords
+from app.core.security.passwords import PasswordHasher
+from app.db.models.accounts import ActivationToken, User
+
+
+@pytest.mark.asyncio
+async def test_hasher_round_trip_and_stats():
+    hasher = PasswordHasher(workers=2, max_queue=2)
+    try:
+        hashed = await hasher.hash("StrongPass123!")
+        assert await hasher.verify("StrongPass123!", hashed)
+        assert not await hasher.verify("WrongPass123!", hashed)
+
+        stats = hasher.stats()
+        assert stats["completed"] == 3
+        assert stats["in_flight"] == 0
+        assert stats["hash_p99_ms"] > 0
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hasher_rejects_when_saturated():
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    try:
+        running = [asyncio.create_task(hasher.hash("StrongPass123!")) for _ in range(2)]
+        await asyncio.sleep(0)  # let both tasks take their slot
+
+        with pytest.raises(PasswordHasherBusyError):
+            await hasher.hash("StrongPass123!")
+
+        await asyncio.gather(*running)
+        assert hasher.stats()["rejected"] == 1
+        # capacity is released once the pool drains
+        await hasher.hash("StrongPass123!")
+    finally:
+        hasher.shutdown()
+
+
+def test_needs_rehash_follows_target_rounds():
+    previous = passwords.get_bcrypt_rounds()
+    try:
+        passwords.set_bcrypt_rounds(4)
+        hashed = passwords.hash_password("StrongPass123!")
+        assert passwords.hash_parameters(hashed) == ("2b", 4)
+        assert not passwords.needs_rehash(hashed)
+
+        passwords.set_bcrypt_rounds(5)
+        assert passwords.needs_rehash(hashed)
+        assert passwords.needs_rehash("not-a-bcrypt-hash")
+    finally:
+        passwords.set_bcrypt_rounds(previous)
+
+
+def test_calibration_respects_bounds():
+    assert passwords.calibrate_bcrypt_rounds(target_ms=0, min_rounds=4, max_rounds=6) == 4
+    assert passwords.calibrate_bcrypt_rounds(target_ms=10_000, min_rounds=4, max_rounds=6) == 6
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_to_current_cost(client, db_session: AsyncSession, monkeypatch):
+    previous = passwords.get_bcrypt_rounds()
+    email = f"user_{uuid.uuid4().hex}@example.com"
+    password = "StrongPass123!"
+
+    try:
+        passwords.set_bcrypt_rounds(4)
+        r = await client.post("/api/v1/accounts/register", json={"email": email, "password": password})
+        assert r.status_code == 200, r.text
+        res = await db_session.execute(select(ActivationToken))
+        r = await client.get("/api/v1/accounts/activate", params={"token": res.scalars().first().token})
+        assert r.status_code == 200, r.text
+
+        passwords.set_bcrypt_rounds(5)
+        r = await client.post("/api/v1/accounts/login", json={"email": email, "password": password})
+        assert r.status_code == 200, r.text
+
+        res = await db_session.execute(select(User.hashed_password).where(User.email == email))
+        assert passwords.hash_parameters(res.scalar_one()) == ("2b", 5)
+    finally:
+        passwords.set_bcrypt_rounds(previous)
+
+
+@pytest.mark.asyncio
+async def test_saturated_hasher_answers_503_with_retry_after(client, monkeypatch):
+    hasher = PasswordHasher(workers=1, max_queue=0)
+    hasher.in_flight = hasher.limit
+    monkeypatch.setattr(passwords, "_hasher", hasher)
+    try:
+        r = await client.post(
+            "/api/v1/accounts/register",
+            json={"email": f"user_{uuid.uuid4().hex}@example.com", "password": "StrongPass123!"},
+        )
+        assert r.status_code == 503, r.text
+        assert r.headers["Retry-After"] == "1"
+        assert hasher.stats()["rejected"] == 1
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import (
+    get_current_principal,
+    require_catalog_manager,
+    require_payments_viewer,
+)
+from app.db.models.accounts import ActivationToken, UserGroupEnum
+from app.services import accounts as accounts_service
+from app.services.permissions import ROLE_PERMISSIONS, Permission, has_permission
+from app.tests.utils import auth_headers, count_statements, create_user
+
+
+def test_roles_form_a_hierarchy():
+    assert has_permission(UserGroupEnum.ADMIN, ROLE_PERMISSIONS[UserGroupEnum.MODERATOR])
+    assert has_permission(UserGroupEnum.MODERATOR, ROLE_PERMISSIONS[UserGroupEnum.USER])
+    assert not has_permission(UserGroupEnum.USER, Permission.MANAGE_CATALOG)
+
+    assert has_permission(UserGroupEnum.MODERATOR, Permission.MANAGE_CATALOG | Permission.PURCHASE)
+    assert not has_permission(UserGroupEnum.MODERATOR, Permission.VIEW_ALL_PAYMENTS)
+    assert all(has_permission(UserGroupEnum.ADMIN, p) for p in Permission)
+
+
+@pytest.mark.asyncio
+async def test_permission_checks_run_no_queries(client, db_session: AsyncSession):
+    email = f"user_{uuid.uuid4().hex}@example.com"
+    password = "StrongPass123!"
+    r = await client.post("/api/v1/accounts/register", json={"email": email, "password": password})
+    assert r.status_code == 200, r.text
+    res = await db_session.execute(select(ActivationToken))
+    r = await client.get("/api/v1/accounts/activate", params={"token": res.scalars().first().token})
+    assert r.status_code == 200, r.text
+    r = await client.post("/api/v1/accounts/login", json={"email": email, "password": password})
+    access = r.json()["access_token"]
+
+    # warm the per-worker user state and group map
+    r = await client.get("/api/v1/orders", headers={"Authorization": f"Bearer {access}"})
+    assert r.status_code == 200, r.text
+
+    with count_statements(db_session) as statements:
+        principal = await get_current_principal(token=access, db=db_session)
+        with pytest.raises(HTTPException) as exc:
+            await require_catalog_manager(principal=principal)
+        assert exc.value.status_code == 403
+        with pytest.raises(HTTPException):
+            await require_payments_viewer(principal=principal)
+
+    assert statements == []
+
+
+@pytest.mark.asyncio
+async def test_routes_check_the_permission_they_need(client, db_session: AsyncSession):
+    user = await create_user(db_session)
+    moderator = await create_user(db_session)
+    await accounts_service.change_user_group(db_session, moderator.id, UserGroupEnum.MODERATOR)
+    genre = {"name": f"Noir-{uuid.uuid4().hex[:6]}"}
+
+    r = await client.post("/api/v1/movies/genres", json=genre, headers=auth_headers(user))
+    assert r.status_code == 403, r.text
+
+    headers = auth_headers(moderator, UserGroupEnum.MODERATOR)
+    r = await client.post("/api/v1/movies/genres", json=genre, headers=headers)
+    assert r.status_code == 201, r.text
+    # managing the catalog does not include other users' carts or payments
+    r = await client.get(f"/api/v1/cart/admin/{user.id}", headers=headers)
+    assert r.status_code == 403, r.text
+    r = await client.get("/api/v1/payments/admin", headers=headers)
+    assert r.status_code == 403, r.text
+
+
+@pytest.mark.asyncio
+async def test_group_change_revokes_tokens_at_once(client, db_session: AsyncSession):
+    admin = await create_user(db_session)
+    await accounts_service.change_user_group(db_session, admin.id, UserGroupEnum.ADMIN)
+    headers = auth_headers(admin, UserGroupEnum.ADMIN)
+    r = await client.get("/api/v1/payments/admin", headers=headers)
+    assert r.status_code == 200, r.text  # user state is cached now
+
+    await accounts_service.change_user_group(db_session, admin.id, UserGroupEnum.USER)
+
+    r = await client.get("/api/v1/payments/admin", headers=headers)
+    assert r.status_code == 401, r.text
+    assert r.json()["detail"] == "Token revoked"
+    r = await client.get("/api/v1/orders", headers=auth_headers(admin))
+    assert r.status_code == 200, r.text
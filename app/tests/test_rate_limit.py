@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.services import rate_limit
+from app.services.rate_limit import InMemoryRateLimiter, RateLimit, RedisRateLimiter
+
+
+class _Clock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_counts_previous_window():
+    clock = _Clock(1_000.0)  # start of a 10 s window
+    limiter = InMemoryRateLimiter(clock=clock)
+    rule = RateLimit(limit=4, window_seconds=10)
+
+    for _ in range(4):
+        assert (await limiter.hit("k", rule)).allowed
+    rejected = await limiter.hit("k", rule)
+    assert not rejected.allowed
+    assert rejected.retry_after == 10
+
+    # a quarter into the next window, 3 of the 4 previous hits still count
+    clock.now = 1_012.5
+    assert (await limiter.hit("k", rule)).allowed
+    assert not (await limiter.hit("k", rule)).allowed
+
+    # two windows later everything has expired
+    clock.now = 1_030.0
+    assert (await limiter.hit("k", rule)).allowed
+    # other keys are independent
+    assert (await limiter.hit("other", rule)).allowed
+
+
+@pytest.mark.asyncio
+async def test_login_throttled_before_credentials_are_checked(
+    client, db_session: AsyncSession, monkeypatch
+):
+    attempts: list[str] = []
+
+    async def _login_user(_db, email, _password):
+        attempts.append(email)
+        raise ValueError("Invalid credentials")
+
+    monkeypatch.setattr("app.api.v1.accounts.login_user", _login_user)
+    email = f"user_{uuid.uuid4().hex}@example.com"
+    payload = {"email": email, "password": "WrongPass123!"}
+
+    for _ in range(settings.RATE_LIMIT_LOGIN_PER_EMAIL):
+        r = await client.post("/api/v1/accounts/login", json=payload)
+        assert r.status_code == 400, r.text
+
+    r = await client.post("/api/v1/accounts/login", json=payload)
+    assert r.status_code == 429, r.text
+    assert int(r.headers["Retry-After"]) >= 1
+    # the rejected attempt never reached the user lookup / bcrypt
+    assert len(attempts) == settings.RATE_LIMIT_LOGIN_PER_EMAIL
+
+    # the per-email limit does not lock out other accounts from the same client
+    other = {"email": f"user_{uuid.uuid4().hex}@example.com", "password": "WrongPass123!"}
+    r = await client.post("/api/v1/accounts/login", json=other)
+    assert r.status_code == 400, r.text
+
+
+@pytest.mark.asyncio
+async def test_register_throttled_per_ip(client, db_session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_REGISTER_PER_IP", 2)
+    rate_limit.set_rate_limiter(InMemoryRateLimiter())
+
+    for _ in range(2):
+        r = await client.post(
+            "/api/v1/accounts/register",
+            json={"email": f"user_{uuid.uuid4().hex}@example.com", "password": "StrongPass123!"},
+        )
+        assert r.status_code == 200, r.text
+
+    r = await client.post(
+        "/api/v1/accounts/register",
+        json={"email": f"user_{uuid.uuid4().hex}@example.com", "password": "StrongPass123!"},
+    )
+    assert r.status_code == 429, r.text
+
+
+@pytest.mark.asyncio
+async def test_redis_limiter_shares_counters():
+    redis_asyncio = pytest.importorskip("redis.asyncio")
+    client = redis_asyncio.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        pytest.skip("Redis is not reachable")
+
+    key = f"test:{uuid.uuid4().hex}"
+    rule = RateLimit(limit=3, window_seconds=60)
+    # two limiters on one Redis behave like two API workers
+    first, second = RedisRateLimiter(client), RedisRateLimiter(client)
+    try:
+        assert (await first.hit(key, rule)).allowed
+        assert (await second.hit(key, rule)).allowed
+        assert (await first.hit(key, rule)).allowed
+        rejected = await second.hit(key, rule)
+        assert not rejected.allowed
+        assert rejected.retry_after >= 1
+    finally:
+        keys = await client.keys(f"{RedisRateLimiter.PREFIX}{key}:*")
+        if keys:
+            await client.delete(*keys)
+        await client.aclose()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.accounts import ActivationToken, RefreshToken
+from app.services.refresh_tokens import RedisRefreshTokenStore, token_digest
+
+
+@pytest.mark.asyncio
+async def test_refresh_tokens_stored_as_digest(client, db_session: AsyncSession, monkeypatch):
+
+    email = f"user_{uuid.uuid4().hex}@example.com"
+    password = "StrongPass123!"
+    r = await client.post("/api/v1/accounts/register", json={"email": email, "password": password})
+    assert r.status_code == 200, r.text
+    res = await db_session.execute(select(ActivationToken))
+    r = await client.get("/api/v1/accounts/activate", params={"token": res.scalars().first().token})
+    assert r.status_code == 200, r.text
+
+    r = await client.post("/api/v1/accounts/login", json={"email": email, "password": password})
+    refresh = r.json()["refresh_token"]
+
+    res = await db_session.execute(select(RefreshToken.token_hash))
+    assert res.scalars().all() == [token_digest(refresh)]
+
+    r = await client.post("/api/v1/accounts/refresh", json={"refresh_token": refresh})
+    assert r.status_code == 200, r.text
+    rotated = r.json()["refresh_token"]
+
+    # rotation replaced the row in place; the old token is single-use
+    res = await db_session.execute(select(RefreshToken.token_hash))
+    assert res.scalars().all() == [token_digest(rotated)]
+    r = await client.post("/api/v1/accounts/refresh", json={"refresh_token": refresh})
+    assert r.status_code == 400, r.text
+
+
+@pytest.mark.asyncio
+async def test_redis_store_rotation_and_revocation():
+    redis_asyncio = pytest.importorskip("redis.asyncio")
+    client = redis_asyncio.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        pytest.skip("Redis is not reachable")
+
+    store = RedisRefreshTokenStore(client)
+    user_id = int(uuid.uuid4().int % 1_000_000_000)
+    expires_at = datetime.utcnow() + timedelta(minutes=5)
+    try:
+        await store.add(None, user_id, "token-a", expires_at)
+        assert 0 < await client.ttl(store._token_key("token-a")) <= 300
+
+        assert await store.rotate(None, "token-a", "token-b", user_id, expires_at)
+        assert not await store.rotate(None, "token-a", "token-c", user_id, expires_at)
+        # a token cannot be rotated on behalf of another user
+        assert not await store.rotate(None, "token-b", "token-c", user_id + 1, expires_at)
+
+        await store.add(None, user_id, "token-d", expires_at)
+        await store.revoke_all(None, user_id)
+        assert await client.exists(store._token_key("token-b"), store._token_key("token-d")) == 0
+        assert await client.exists(store._user_key(user_id)) == 0
+    finally:
+        await store.revoke_all(None, user_id)
+        await client.aclose()
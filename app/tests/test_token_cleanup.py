@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.models.accounts import (
+    ActivationToken,
+    RefreshToken,
+    RevokedAccessToken,
+    User,
+    UserGroupEnum,
+)
+from app.services import permissions
+from app.services.refresh_tokens import token_digest
+from app.services.token_cleanup import purge_expired_tokens
+
+
+async def _count(db: AsyncSession, model) -> int:
+    return await db.scalar(select(func.count()).select_from(model))
+
+
+@pytest.mark.asyncio
+async def test_purge_deletes_expired_rows_in_batches(
+    db_session: AsyncSession, session_factory: async_sessionmaker[AsyncSession]
+):
+    now = datetime.utcnow()
+    group_id = await permissions.group_id_for(db_session, UserGroupEnum.USER)
+    users = [
+        User(email=f"user_{uuid.uuid4().hex}@example.com", hashed_password="x", group_id=group_id)
+        for _ in range(30)
+    ]
+    db_session.add_all(users)
+    await db_session.flush()
+
+    for i, user in enumerate(users):
+        # 25 expired, 5 still valid
+        expires_at = now - timedelta(hours=1) if i < 25 else now + timedelta(hours=1)
+        db_session.add(ActivationToken(user_id=user.id, token=uuid.uuid4().hex, expires_at=expires_at))
+        db_session.add(
+            RefreshToken(user_id=user.id, token_hash=token_digest(uuid.uuid4().hex), expires_at=expires_at)
+        )
+    db_session.add(RevokedAccessToken(jti=uuid.uuid4().hex, expires_at=now - timedelta(minutes=1)))
+    await db_session.commit()
+
+    report = await purge_expired_tokens(session_factory, batch_size=10, pause_seconds=0, now=now)
+    stats = {s.table: s for s in report}
+
+    assert stats["activation_tokens"].deleted == 25
+    assert stats["activation_tokens"].batches == 3  # 10 + 10 + 5
+    assert stats["refresh_tokens"].deleted == 25
+    assert stats["revoked_access_tokens"].deleted == 1
+    assert stats["password_reset_tokens"].deleted == 0
+    assert stats["activation_tokens"].max_batch_ms > 0
+
+    assert await _count(db_session, ActivationToken) == 5
+    assert await _count(db_session, RefreshToken) == 5
+    assert await _count(db_session, RevokedAccessToken) == 0
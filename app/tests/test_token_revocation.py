@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_principal
+from app.core.config import settings
+from app.core.security.jwt import decode_access_token
+from app.db.models.accounts import ActivationToken
+from app.repositories import RevokedAccessTokenRepository
+from app.services import token_revocation
+from app.services.token_revocation import BloomFilter
+from app.tests.utils import count_statements
+
+
+async def _login(client, db_session: AsyncSession) -> dict:
+    email = f"user_{uuid.uuid4().hex}@example.com"
+    password = "StrongPass123!"
+    r = await client.post("/api/v1/accounts/register", json={"email": email, "password": password})
+    assert r.status_code == 200, r.text
+    res = await db_session.execute(select(ActivationToken))
+    r = await client.get("/api/v1/accounts/activate", params={"token": res.scalars().first().token})
+    assert r.status_code == 200, r.text
+    r = await client.post("/api/v1/accounts/login", json={"email": email, "password": password})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1_000, error_rate=0.01)
+    members = [uuid.uuid4().hex for _ in range(1_000)]
+    for jti in members:
+        bloom.add(jti)
+
+    assert all(jti in bloom for jti in members)
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10_000))
+    assert false_positives < 300  # ~1% expected
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_paired_access_token(client, db_session: AsyncSession):
+    tokens = await _login(client, db_session)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    r = await client.get("/api/v1/orders", headers=headers)
+    assert r.status_code == 200, r.text
+
+    r = await client.post("/api/v1/accounts/logout", json={"refresh_token": tokens["refresh_token"]})
+    assert r.status_code == 200, r.text
+
+    r = await client.get("/api/v1/orders", headers=headers)
+    assert r.status_code == 401, r.text
+    assert r.json()["detail"] == "Token revoked"
+
+
+@pytest.mark.asyncio
+async def test_other_workers_see_revocation_after_sync(
+    client, db_session: AsyncSession, monkeypatch
+):
+    tokens = await _login(client, db_session)
+    access = tokens["access_token"]
+
+    # warm this worker's filter; unrevoked tokens are then checked without queries
+    await get_current_principal(token=access, db=db_session)
+    with count_statements(db_session) as statements:
+        await get_current_principal(token=access, db=db_session)
+    assert statements == []
+
+    # revoked by "another worker": only the table changes, not this worker's filter
+    jti = decode_access_token(access)["jti"]
+    await RevokedAccessTokenRepository.revoke(
+        db_session, jti, datetime.utcnow() + timedelta(minutes=5)
+    )
+    await db_session.commit()
+
+    monkeypatch.setattr(settings, "AUTH_REVOCATION_SYNC_SECONDS", 0.0)
+    assert await token_revocation.is_revoked(db_session, jti)
+    assert not await token_revocation.is_revoked(db_session, uuid.uuid4().hex)
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import stripe
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.orders import Order, OrderStatusEnum
+from app.db.models.payments import Payment
+from app.services import cart as cart_service
+from app.services.user_locks import CART, _local_lock, _local_locks
+from app.tests.utils import auth_headers, create_movies, create_user
+
+
+@pytest.mark.asyncio
+async def test_parallel_order_requests_create_one_order(
+    concurrent_client: AsyncClient, db_session: AsyncSession
+):
+    user = await create_user(db_session)
+    headers = auth_headers(user)
+    movies = await create_movies(db_session, 3)
+    await cart_service.apply_batch(db_session, user.id, [("add", m.id) for m in movies])
+
+    responses = await asyncio.gather(
+        *(concurrent_client.post("/api/v1/orders", headers=headers) for _ in range(50))
+    )
+
+    codes = sorted(r.status_code for r in responses)
+    assert codes == [201] + [400] * 49, [r.text for r in responses]
+    assert {r.json()["detail"] for r in responses if r.status_code == 400} == {"Cart is empty"}
+    assert await db_session.scalar(select(func.count()).select_from(Order)) == 1
+
+
+@pytest.mark.asyncio
+async def test_webhook_retries_and_cancel_serialize_on_the_order(
+    concurrent_client: AsyncClient, db_session: AsyncSession, monkeypatch
+):
+    user = await create_user(db_session)
+    movies = await create_movies(db_session, 2)
+    await cart_service.apply_batch(db_session, user.id, [("add", m.id) for m in movies])
+    r = await concurrent_client.post("/api/v1/orders", headers=auth_headers(user))
+    assert r.status_code == 201, r.text
+    order_id = r.json()["order_id"]
+
+    event = {
+        "type": "checkout.session.completed",
+        "data": {
+            "object": {
+                "id": "cs_test_1",
+                "payment_intent": "pi_test_1",
+                "amount_total": 1000,
+                "metadata": {"order_id": str(order_id), "user_id": str(user.id)},
+            }
+        },
+    }
+    monkeypatch.setattr(stripe.Webhook, "construct_event", lambda **_: event)
+
+    # Stripe redelivers; the user cancels from another tab at the same time
+    signed = {"Stripe-Signature": "t=1,v1=test"}
+    responses = await asyncio.gather(
+        *(
+            concurrent_client.post("/api/v1/payments/webhook", headers=signed, content=b"{}")
+            for _ in range(10)
+        ),
+        concurrent_client.post(f"/api/v1/orders/{order_id}/cancel", headers=auth_headers(user)),
+    )
+    *deliveries, cancel = responses
+    assert {r.status_code for r in deliveries} == {200}, [r.text for r in deliveries]
+
+    status = await db_session.scalar(
+        select(Order.status).where(Order.id == order_id).execution_options(populate_existing=True)
+    )
+    payments = await db_session.scalar(
+        select(func.count()).select_from(Payment).where(Payment.order_id == order_id)
+    )
+    # whichever flow took the lock first wins; the other sees the state it left behind
+    if cancel.status_code == 200:
+        assert (status, payments) == (OrderStatusEnum.canceled, 0)
+    else:
+        assert cancel.status_code == 400, cancel.text
+        assert (status, payments) == (OrderStatusEnum.paid, 1)
+
+
+@pytest.mark.asyncio
+async def test_cancel_does_not_wait_for_the_stripe_round_trip(
+    concurrent_client: AsyncClient, db_session: AsyncSession, monkeypatch
+):
+    user = await create_user(db_session)
+    (movie,) = await create_movies(db_session, 1)
+    await cart_service.add_movie_to_cart(db_session, user.id, movie.id)
+    r = await concurrent_client.post("/api/v1/orders", headers=auth_headers(user))
+    order_id = r.json()["order_id"]
+
+    in_stripe, release = threading.Event(), threading.Event()
+
+    def _slow_create(**_kwargs):
+        in_stripe.set()
+        release.wait(timeout=10)
+        return SimpleNamespace(
+            id="cs_test_1",
+            url="https://checkout.stripe.com/c/pay/cs_test_1",
+            expires_at=int(time.time()) + 24 * 3600,
+        )
+
+    monkeypatch.setattr(stripe.checkout.Session, "create", _slow_create)
+
+    checkout = asyncio.create_task(
+        concurrent_client.post(
+            "/api/v1/payments/checkout-session",
+            headers=auth_headers(user),
+            json={"order_id": order_id},
+        )
+    )
+    assert await asyncio.to_thread(in_stripe.wait, 10)
+    try:
+        cancel = await asyncio.wait_for(
+            concurrent_client.post(
+                f"/api/v1/orders/{order_id}/cancel", headers=auth_headers(user)
+            ),
+            timeout=5,
+        )
+    finally:
+        release.set()
+    assert cancel.status_code == 200, cancel.text
+
+    # the session came back for an order that is gone by now
+    r = await checkout
+    assert r.status_code == 400, r.text
+    assert r.json()["detail"] == "Only pending orders can be paid"
+    checkout_url = await db_session.scalar(
+        select(Order.checkout_url)
+        .where(Order.id == order_id)
+        .execution_options(populate_existing=True)
+    )
+    assert checkout_url is None
+
+
+@pytest.mark.asyncio
+async def test_local_fallback_serializes_per_user_and_resource():
+    events: list[str] = []
+
+    async def _flow(user_id: int, name: str) -> None:
+        async with _local_lock(CART, user_id):
+            events.append(f"{name}:start")
+            await asyncio.sleep(0)
+            events.append(f"{name}:end")
+
+    await asyncio.gather(*(_flow(1, f"a{n}") for n in range(50)))
+    # no interleaving for one user
+    assert all(events[i].split(":")[0] == events[i + 1].split(":")[0] for i in range(0, 100, 2))
+    assert _local_locks == {}
+
+    events.clear()
+    await asyncio.gather(_flow(1, "a"), _flow(2, "b"))
+    # different users do not wait for each other
+    assert events[:2] == ["a:start", "b:start"]
@@ -1,8 +1,19 @@
 from __future__ import annotations
 
-from sqlalchemy import text
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from decimal import Decimal
+
+from sqlalchemy import event, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.security import create_access_token, principal_claims
+from app.db.models.accounts import User, UserGroup, UserGroupEnum
+from app.db.models.movies import Certification, Movie
+from app.services import permissions
+
 
 async def truncate_all_tables(session: AsyncSession) -> None:
     """
@@ -28,3 +39,79 @@ async def truncate_all_tables(session: AsyncSession) -> None:
     quoted = ", ".join(f'"{t}"' for t in tables)
     await session.execute(text(f"TRUNCATE TABLE {quoted} RESTART IDENTITY CASCADE;"))
     await session.commit()
+
+
+async def seed_user_groups(session: AsyncSession) -> None:
+    """
+    Same groups as scripts/init_db.py (TRUNCATE wipes them).
+    """
+    await session.execute(
+        insert(UserGroup)
+        .values([{"name": group} for group in UserGroupEnum])
+        .on_conflict_do_nothing(index_elements=[UserGroup.name])
+    )
+    await session.commit()
+
+
+@contextmanager
+def count_statements(session: AsyncSession) -> Iterator[list[str]]:
+    """
+    Collect the SQL statements sent through the session's engine inside the block.
+    """
+    statements: list[str] = []
+
+    def _record(_conn, _cursor, statement, *_args) -> None:
+        statements.append(statement)
+
+    sync_engine = session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", _record)
+
+
+async def create_user(session: AsyncSession) -> User:
+    """
+    Committed, active user without going through the HTTP flow.
+    """
+    group_id = await permissions.group_id_for(session, UserGroupEnum.USER)
+    user = User(
+        email=f"user_{uuid.uuid4().hex}@example.com",
+        hashed_password="x",
+        group_id=group_id,
+        is_active=True,
+    )
+    session.add(user)
+    await session.commit()
+    return user
+
+
+def auth_headers(user: User, group: UserGroupEnum = UserGroupEnum.USER) -> dict[str, str]:
+    claims = principal_claims(group, user.is_active, user.token_version)
+    return {"Authorization": f"Bearer {create_access_token(str(user.id), claims)}"}
+
+
+async def create_movies(
+    session: AsyncSession, count: int, price: Decimal = Decimal("9.99")
+) -> list[Movie]:
+    """
+    Committed movies without genres/people - enough for cart and order tests.
+    """
+    cert = Certification(name=f"PG-{uuid.uuid4().hex[:8]}")
+    movies = [
+        Movie(
+            name=f"Movie {uuid.uuid4().hex[:8]}",
+            year=2024,
+            time=120,
+            imdb=8.0,
+            votes=1_000,
+            description="Test movie",
+            price=price,
+            certification=cert,
+        )
+        for _ in range(count)
+    ]
+    session.add_all(movies)
+    await session.commit()
+    return movies
@@ -1,3 +0,0 @@
-"""
-Celery workers package.
-"""
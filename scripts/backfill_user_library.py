@@ -0,0 +1,27 @@
+"""
+Populate `user_library` from orders paid before it existed.
+
+    python -m scripts.backfill_user_library --batch-size 1000
+
+Idempotent; new payments maintain the table themselves.
+"""
+import argparse
+import asyncio
+
+from app.core.logging import setup_logging
+from app.db.session import AsyncSessionLocal
+from app.services.library import backfill
+
+
+async def _main(batch_size: int) -> None:
+    total = await backfill(AsyncSessionLocal, batch_size=batch_size)
+    print(f"user_library: {total} rows added")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_logging()
+    asyncio.run(_main(args.batch_size))
@@ -0,0 +1,86 @@
+"""
+Benchmark: GET /movies filtering via SQL vs the in-memory catalog snapshot.
+
+Runs the same random filter/sort combinations through `_list_movies_sql` and `CatalogSnapshot.query`
+against the configured DATABASE_URL and prints latency percentiles for both paths.
+
+    python -m scripts.bench_catalog_snapshot --queries 500
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app.core.enums import MovieSortField, SortOrder
+from app.db.session import AsyncSessionLocal
+from app.services.catalog_snapshot import load_snapshot
+from app.services.movies import _list_movies_sql
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ms = [s * 1000 for s in samples]
+    print(
+        f"{label:<10} p50={statistics.median(ms):8.3f} ms  "
+        f"p99={_percentile(ms, 0.99):8.3f} ms  max={max(ms):8.3f} ms"
+    )
+
+
+async def main(queries: int, seed: int) -> None:
+    rng = random.Random(seed)
+
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        snapshot = await load_snapshot(db)
+        print(f"snapshot: {len(snapshot)} movies loaded in {time.perf_counter() - started:.3f}s")
+
+        years = sorted({int(y) for y in snapshot.year})
+        certs = sorted({int(c) for c in snapshot.certification_id})
+        genres = list(snapshot.bitsets["genre"])
+        stars = list(snapshot.bitsets["star"])
+
+        combos = []
+        for _ in range(queries):
+            combos.append(
+                dict(
+                    page=rng.randint(1, 5),
+                    page_size=12,
+                    year=rng.choice(years) if years and rng.random() < 0.3 else None,
+                    imdb_min=round(rng.uniform(5, 8), 1) if rng.random() < 0.5 else None,
+                    imdb_max=None,
+                    certification_id=rng.choice(certs) if certs and rng.random() < 0.3 else None,
+                    genre_id=rng.choice(genres) if genres and rng.random() < 0.5 else None,
+                    director_id=None,
+                    star_id=rng.choice(stars) if stars and rng.random() < 0.2 else None,
+                    sort_by=rng.choice(list(MovieSortField)),
+                    order=rng.choice(list(SortOrder)),
+                )
+            )
+
+        sql_samples: list[float] = []
+        for combo in combos:
+            started = time.perf_counter()
+            await _list_movies_sql(db, q=None, **combo)
+            sql_samples.append(time.perf_counter() - started)
+
+    snapshot_samples: list[float] = []
+    for combo in combos:
+        started = time.perf_counter()
+        snapshot.query(**combo)
+        snapshot_samples.append(time.perf_counter() - started)
+
+    _report("sql", sql_samples)
+    _report("snapshot", snapshot_samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(main(args.queries, args.seed))
@@ -0,0 +1,84 @@
+"""
+Benchmark: GET /movies/discover sampling vs ORDER BY random() as the catalog grows.
+
+Inside one transaction (rolled back at the end) the movies table is padded with synthetic rows up
+to each target size, then both strategies are timed at that size. The probe-based sampler should
+stay flat while ORDER BY random() grows linearly with the table.
+
+    python -m scripts.bench_discover --sizes 1000 10000 100000 --n 10 --runs 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import func, select, text
+
+from app.db.models.movies import Certification, Movie
+from app.db.session import AsyncSessionLocal
+from app.services.movies import discover_movies
+
+FILTERS = dict.fromkeys(
+    ["q", "year", "imdb_min", "imdb_max", "certification_id", "genre_id", "director_id", "star_id"]
+)
+
+PAD_SQL = text(
+    """
+    INSERT INTO movies (uuid, name, year, time, imdb, votes, description, price, certification_id)
+    SELECT gen_random_uuid(), 'bench-' || g, 1950 + g % 75, 90, (g % 100) / 10.0, g, 'bench', 9.99,
+           :certification_id
+    FROM generate_series(:start, :stop) AS g
+    """
+)
+
+
+async def _time(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+async def main(sizes: list[int], n: int, runs: int) -> None:
+    async with AsyncSessionLocal() as db:
+        certification_id = (await db.execute(select(Certification.id).limit(1))).scalar()
+        if certification_id is None:
+            certification = Certification(name="bench")
+            db.add(certification)
+            await db.flush()
+            certification_id = certification.id
+
+        print(f"{'movies':>10} {'discover':>12} {'random()':>12}")
+        for size in sorted(sizes):
+            current = int((await db.execute(select(func.count(Movie.id)))).scalar() or 0)
+            if current < size:
+                await db.execute(
+                    PAD_SQL,
+                    {"certification_id": certification_id, "start": current, "stop": size - 1},
+                )
+                await db.execute(text("ANALYZE movies"))
+
+            async def probe() -> None:
+                await discover_movies(db, n=n, **FILTERS)
+
+            async def order_random() -> None:
+                stmt = select(Movie).order_by(func.random()).limit(n)
+                (await db.execute(stmt)).scalars().all()
+
+            print(
+                f"{max(size, current):>10} {await _time(probe, runs):>9.3f} ms "
+                f"{await _time(order_random, runs):>9.3f} ms"
+            )
+
+        await db.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--n", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.n, args.runs))
@@ -0,0 +1,103 @@
+"""
+Benchmark: creating an order from 1-, 20- and 200-item carts.
+
+Compares the set-based `OrderRepository.create_from_cart` with the previous per-row path (one
+movie lookup and one flushed ORM insert per item). Everything runs inside one transaction that is
+rolled back at the end; each run refills the cart inside a savepoint and rolls it back afterwards.
+The set-based path should stay close to flat while the per-row path grows with the cart.
+
+    python -m scripts.bench_order_creation --sizes 1 20 200 --runs 30
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import select, text
+
+from app.db.models.accounts import User, UserGroup, UserGroupEnum
+from app.db.models.movies import Certification, Movie
+from app.db.models.orders import Order, OrderItem, OrderStatusEnum
+from app.db.session import AsyncSessionLocal
+from app.repositories import CartItemRepository, CartRepository, MovieRepository, OrderRepository
+
+PAD_SQL = text(
+    """
+    INSERT INTO movies (uuid, name, year, time, imdb, votes, description, price, certification_id)
+    SELECT gen_random_uuid(), 'bench-order-' || g, 2000, 90, 7.0, g, 'bench', 9.99,
+           :certification_id
+    FROM generate_series(1, :count) AS g
+    """
+)
+
+
+async def _per_row(db, user_id: int) -> None:
+    cart = await CartRepository.get_by_user_id(db, user_id)
+    movies = [await MovieRepository.get_by_id(db, item.movie_id) for item in cart.items]
+    total = sum((Decimal(str(m.price)) for m in movies), Decimal("0.00"))
+    order = Order(user_id=user_id, status=OrderStatusEnum.pending, total_amount=total)
+    db.add(order)
+    await db.flush()
+    for m in movies:
+        db.add(OrderItem(order_id=order.id, movie_id=m.id, price_at_order=m.price))
+        await db.flush()
+    await CartItemRepository.delete_for_cart(db, cart.id)
+
+
+async def _set_based(db, user_id: int) -> None:
+    await OrderRepository.create_from_cart(db, user_id, datetime.utcnow())
+
+
+async def _time(db, user_id: int, movie_ids: list[int], fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        savepoint = await db.begin_nested()
+        await CartItemRepository.add_many_for_user(db, user_id, movie_ids, datetime.utcnow())
+        db.expunge_all()
+        started = time.perf_counter()
+        await fn(db, user_id)
+        samples.append(time.perf_counter() - started)
+        await savepoint.rollback()
+    return statistics.median(samples) * 1000
+
+
+async def main(sizes: list[int], runs: int) -> None:
+    async with AsyncSessionLocal() as db:
+        certification = Certification(name=f"bench-{uuid.uuid4().hex[:8]}")
+        db.add(certification)
+        group_id = await db.scalar(select(UserGroup.id).where(UserGroup.name == UserGroupEnum.USER))
+        user = User(
+            email=f"bench_{uuid.uuid4().hex}@example.com",
+            hashed_password="x",
+            group_id=group_id,
+            is_active=True,
+        )
+        db.add(user)
+        await db.flush()
+        await db.execute(PAD_SQL, {"certification_id": certification.id, "count": max(sizes)})
+        res = await db.execute(
+            select(Movie.id).where(Movie.certification_id == certification.id).order_by(Movie.id)
+        )
+        movie_ids = list(res.scalars().all())
+        user_id = user.id
+
+        print(f"{'items':>6} {'set-based':>12} {'per-row':>12}")
+        for size in sorted(sizes):
+            ids = movie_ids[:size]
+            print(
+                f"{size:>6} {await _time(db, user_id, ids, _set_based, runs):>9.3f} ms "
+                f"{await _time(db, user_id, ids, _per_row, runs):>9.3f} ms"
+            )
+
+        await db.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 20, 200])
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.runs))
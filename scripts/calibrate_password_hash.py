@@ -0,0 +1,26 @@
+"""
+Pick the bcrypt work factor for this hardware.
+
+Prints the highest cost whose hash time stays within the latency budget; pin it fleet-wide with
+PASSWORD_BCRYPT_ROUNDS. Existing hashes are upgraded transparently on the next login.
+
+    python -m scripts.calibrate_password_hash --target-ms 250
+"""
+import argparse
+
+from app.core.config import settings
+from app.core.security.passwords import (
+    BCRYPT_MAX_ROUNDS,
+    BCRYPT_MIN_ROUNDS,
+    calibrate_bcrypt_rounds,
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--target-ms", type=float, default=settings.PASSWORD_HASH_TARGET_MS)
+    parser.add_argument("--min-rounds", type=int, default=BCRYPT_MIN_ROUNDS)
+    parser.add_argument("--max-rounds", type=int, default=BCRYPT_MAX_ROUNDS)
+    args = parser.parse_args()
+
+    rounds = calibrate_bcrypt_rounds(args.target_ms, args.min_rounds, args.max_rounds)
+    print(f"PASSWORD_BCRYPT_ROUNDS={rounds}")
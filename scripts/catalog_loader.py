@@ -0,0 +1,18 @@
+"""
+Catalog loader for CATALOG_SNAPSHOT_MODE=shared.
+
+Run exactly one per host next to the API workers:
+
+    python -m scripts.catalog_loader
+
+It loads the catalog, listens for movie change signals and publishes a new memory-mapped
+generation into CATALOG_SHM_DIR after every refresh.
+"""
+import asyncio
+
+from app.core.logging import setup_logging
+from app.services.catalog_shm import run_loader
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(run_loader())
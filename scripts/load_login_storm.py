@@ -0,0 +1,86 @@
+"""
+Load test: catalog latency while a login storm hits the same API worker.
+
+Measures GET /api/v1/movies latency alone, then again while `--logins` concurrent login
+requests run, and prints p50/p99 for both phases plus how many logins were shed with 503.
+With bcrypt off the event loop the catalog p99 should stay close to the idle baseline.
+
+    python -m scripts.load_login_storm --base-url http://localhost:8000 \\
+        --email user@example.com --password 'StrongPass123!' --logins 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ms = [s * 1000 for s in samples]
+    print(
+        f"{label:<14} n={len(ms):<5} p50={statistics.median(ms):8.2f} ms  "
+        f"p99={_percentile(ms, 0.99):8.2f} ms"
+    )
+
+
+async def _catalog_probe(client: httpx.AsyncClient, stop: asyncio.Event) -> list[float]:
+    samples: list[float] = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        r = await client.get("/api/v1/movies", params={"page_size": 12})
+        r.raise_for_status()
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(0.01)
+    return samples
+
+
+async def main(base_url: str, email: str, password: str, logins: int, baseline_seconds: float) -> None:
+    limits = httpx.Limits(max_connections=logins + 10)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_catalog_probe(client, stop))
+        await asyncio.sleep(baseline_seconds)
+        stop.set()
+        baseline = await probe
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_catalog_probe(client, stop))
+
+        async def login() -> int:
+            r = await client.post(
+                "/api/v1/accounts/login", json={"email": email, "password": password}
+            )
+            return r.status_code
+
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(login() for _ in range(logins)))
+        storm_seconds = time.perf_counter() - started
+        stop.set()
+        during = await probe
+
+        hasher = (await client.get("/health/password-hasher")).json()
+
+    _report("catalog idle", baseline)
+    _report("catalog storm", during)
+    print(
+        f"logins: {statuses.count(200)} ok, {statuses.count(503)} shed (503), "
+        f"{len(statuses) - statuses.count(200) - statuses.count(503)} other in {storm_seconds:.2f}s"
+    )
+    print(f"hasher: {hasher}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--baseline-seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.base_url, args.email, args.password, args.logins, args.baseline_seconds))
@@ -0,0 +1,27 @@
+"""
+Dedicated outbox relay.
+
+    python -m scripts.outbox_relay --concurrency 4
+
+Each loop claims its own batches with FOR UPDATE SKIP LOCKED, so throughput scales by raising
+--concurrency or running more replicas of this process; no coordination is needed.
+"""
+import argparse
+import asyncio
+
+from app.core.logging import setup_logging
+from app.db.session import AsyncSessionLocal
+from app.services.outbox import run_relay
+
+
+async def _main(concurrency: int) -> None:
+    await asyncio.gather(*(run_relay(AsyncSessionLocal) for _ in range(concurrency)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+
+    setup_logging()
+    asyncio.run(_main(args.concurrency))